@@ -0,0 +1,114 @@
+"""
+Quantised Embedding Storage Benchmark
+
+# benchmarks/quantisation.py
+
+Compares the legacy pickle of float lists with the embedding store at each of its dtypes
+(float32, float16, int8) on random embeddings: the bytes on disk, the time and memory to open the
+store and read every vector, and how far cosine similarities computed from the stored vectors
+drift from the float32 originals.
+
+Example usage:
+
+    python benchmarks/quantisation.py --embeddings 10000 --dimensions 1536 --backend mmap
+"""
+
+import argparse
+import os
+import pickle
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from det.det_response.semantic_distance import SemanticDistanceCalculator
+from det.embeddings.store import STORE_DTYPES, open_embedding_store
+
+
+def clustered_embeddings(n: int, dimensions: int, seed: int = 0) -> np.ndarray:
+    """Paraphrase-like embeddings: a few centres, each with many close neighbours."""
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((8, dimensions))
+    noise = rng.standard_normal((n, dimensions)) * 0.3
+    return SemanticDistanceCalculator.normalise(
+        (centres[rng.integers(0, len(centres), n)] + noise).astype(np.float32)
+    )
+
+
+def measure(load):
+    """Returns the seconds and peak traced bytes to run `load`, and its result."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = load()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, result
+
+
+def similarity_error(original: np.ndarray, loaded: np.ndarray, sample: int = 500):
+    """Returns the mean and max absolute error of the pairwise similarities of a sample."""
+    exact = SemanticDistanceCalculator.cosine_similarity_matrix(original[:sample])
+    approximate = SemanticDistanceCalculator.cosine_similarity_matrix(loaded[:sample])
+    error = np.abs(exact - approximate)
+    return float(error.mean()), float(error.max())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--embeddings", type=int, default=10000)
+    parser.add_argument("--dimensions", type=int, default=1536)
+    parser.add_argument("--backend", choices=["mmap", "sqlite"], default="mmap")
+    args = parser.parse_args()
+
+    embeddings = clustered_embeddings(args.embeddings, args.dimensions)
+    keys = [f"model:{i}" for i in range(len(embeddings))]
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "legacy.pkl")
+        with open(path, "wb") as cache_file:
+            pickle.dump(
+                {key: vector.tolist() for key, vector in zip(keys, embeddings)},
+                cache_file,
+            )
+
+        def load_pickle():
+            with open(path, "rb") as cache_file:
+                return np.array(
+                    list(pickle.load(cache_file).values()), dtype=np.float32
+                )
+
+        elapsed, peak, loaded = measure(load_pickle)
+        print(
+            f"{'pickle':>8}: {os.path.getsize(path) / 1e6:8.1f} MB on disk, "
+            f"load {elapsed * 1e3:7.0f} ms, peak {peak / 1e6:7.1f} MB, "
+            f"similarity error mean {0:.1e} max {0:.1e}"
+        )
+
+        for dtype in STORE_DTYPES:
+            extension = ".sqlite" if args.backend == "sqlite" else ""
+            path = os.path.join(directory, f"{dtype}{extension}")
+            store = open_embedding_store(path, args.backend, dtype=dtype)
+            for start in range(0, len(keys), 1000):
+                store.put_many(
+                    zip(keys[start : start + 1000], embeddings[start : start + 1000])
+                )
+            store.close()
+            disk_bytes = open_embedding_store(path, args.backend).disk_bytes()
+
+            def load_store():
+                reopened = open_embedding_store(path, args.backend)
+                return np.vstack([reopened[key] for key in keys])
+
+            elapsed, peak, loaded = measure(load_store)
+            mean_error, max_error = similarity_error(embeddings, loaded)
+            print(
+                f"{dtype:>8}: {disk_bytes / 1e6:8.1f} MB on disk, "
+                f"load {elapsed * 1e3:7.0f} ms, peak {peak / 1e6:7.1f} MB, "
+                f"similarity error mean {mean_error:.1e} max {max_error:.1e}"
+            )
+
+
+if __name__ == "__main__":
+    main()
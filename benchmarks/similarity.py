@@ -0,0 +1,87 @@
+"""
+Similarity Kernel Benchmark
+
+# benchmarks/similarity.py
+
+Compares the per-pair similarity path (`calculate_cosine_similarity` in a Python loop) with the
+matrix kernels of `SemanticDistanceCalculator` on random embeddings, so no embedding API is
+called.
+
+Example usage:
+
+    python benchmarks/similarity.py --responses 1000 5000 --dimensions 1536
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from det.det_response.semantic_distance import SemanticDistanceCalculator
+
+
+class RandomEmbeddingGenerator:
+    def __init__(self, dimensions: int, seed: int = 0):
+        self.dimensions = dimensions
+        self.rng = np.random.default_rng(seed)
+
+    def generate_embeddings(self, texts):
+        return list(self.rng.standard_normal((len(texts), self.dimensions)))
+
+
+def timed(fn, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--responses", type=int, nargs="+", default=[1000, 5000])
+    parser.add_argument("--dimensions", type=int, default=1536)
+    parser.add_argument(
+        "--pairwise-limit",
+        type=int,
+        default=2000,
+        help="Largest N for the per-pair N x N loop, which is quadratic in Python",
+    )
+    args = parser.parse_args()
+
+    calculator = SemanticDistanceCalculator(RandomEmbeddingGenerator(args.dimensions))
+    for n in args.responses:
+        embeddings = calculator.embedding_generator.generate_embeddings(range(n))
+        base = embeddings[0]
+
+        per_pair = timed(
+            lambda: [
+                calculator.calculate_cosine_similarity(base, e) for e in embeddings
+            ]
+        )
+        matrix = timed(
+            lambda: calculator.cosine_similarity_matrix(embeddings, [base])[:, 0]
+        )
+        print(
+            f"one-to-many  n={n:>6}: per-pair {per_pair * 1e3:9.1f} ms, "
+            f"matrix {matrix * 1e3:8.1f} ms ({per_pair / matrix:.0f}x)"
+        )
+
+        pairwise = timed(lambda: calculator.cosine_similarity_matrix(embeddings), 1)
+        if n <= args.pairwise_limit:
+            per_pair = timed(
+                lambda: [
+                    [calculator.calculate_cosine_similarity(a, b) for b in embeddings]
+                    for a in embeddings
+                ],
+                1,
+            )
+            comparison = f"per-pair {per_pair:9.2f} s, "
+        else:
+            comparison = "per-pair skipped, "
+        print(f"pairwise NxN n={n:>6}: {comparison}matrix {pairwise * 1e3:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
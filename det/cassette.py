@@ -0,0 +1,358 @@
+"""
+Cassette Module
+
+# cassette.py
+
+This module records the request/response pairs of LLM and embedding calls to a compact on-disk
+store (a "cassette") and replays them deterministically without any network access. Capturing a
+large run once and replaying it makes changes to the analysis and presentation cheap to iterate
+on, and lets benchmarks of `ResponseAnalysis` run without provider latency.
+
+Example usage:
+
+    from det.cassette import Cassette, CassetteEmbeddingGenerator, CassetteLLMClient
+
+    # Record a run against the real providers
+    cassette = Cassette("run.cassette", mode="record")
+    client = CassetteLLMClient(cassette, client=OpenAIClient(model="gpt-4o-mini"))
+    responses = client.generate_responses("Will you always respond the same?", n=500)
+
+    # Replay it later, offline
+    cassette = Cassette("run.cassette", mode="replay")
+    client = CassetteLLMClient(cassette)
+    responses = client.generate_responses("Will you always respond the same?", n=500)
+
+Key Features:
+    - Requests are keyed by a digest of their parameters; repeated identical requests replay the
+        recorded responses in their recorded order, and asking for more responses than were
+        recorded raises rather than repeating them.
+    - Embeddings are recorded per text and model, above the embeddings cache, so replay does not
+        depend on how texts were batched or which were served from the cache when recording; replay
+        serves them from the cassette and uses no embeddings cache.
+    - The store is gzip-compressed JSON lines, with embeddings packed as float32, and recording
+        appends to an existing cassette.
+    - Pydantic responses from LangChain chains are stored with their class and rebuilt on replay.
+"""
+
+import base64
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import defaultdict
+from typing import Any, List
+
+import numpy as np
+
+from det.embeddings.generator import EmbeddingGeneratorInterface
+from det.helpers import dynamic_import
+from det.llm.base import LLMGeneratorInterface, ResponseGenerationError
+
+logger = logging.getLogger(__name__)
+
+CASSETTE_MODES = ("record", "replay")
+
+
+class CassetteMissError(KeyError):
+    """Raised when a replayed request was never recorded."""
+
+
+class CassetteExhaustedError(CassetteMissError):
+    """Raised when a replayed request asks for more responses than were recorded."""
+
+
+def _encode(value: Any) -> Any:
+    if isinstance(value, ResponseGenerationError):
+        return {"__error__": str(value)}
+    if isinstance(value, np.ndarray) or (
+        isinstance(value, list) and value and isinstance(value[0], float)
+    ):
+        array = np.asarray(value, dtype=np.float32)
+        return {"__vector__": base64.b64encode(array.tobytes()).decode("ascii")}
+    if hasattr(value, "dict") and hasattr(type(value), "__fields__"):
+        model = type(value)
+        return {
+            "__model__": f"{model.__module__}.{model.__name__}",
+            "data": value.dict(),
+        }
+    return value
+
+
+def _decode(value: Any) -> Any:
+    if not isinstance(value, dict):
+        return value
+    if "__error__" in value:
+        return ResponseGenerationError(value["__error__"])
+    if "__vector__" in value:
+        data = base64.b64decode(value["__vector__"])
+        return np.frombuffer(data, dtype=np.float32).tolist()
+    if "__model__" in value:
+        return dynamic_import(value["__model__"])(**value["data"])
+    return value
+
+
+class Cassette:
+    """
+    An append-only store of recorded responses, keyed by a digest of the request.
+    """
+
+    def __init__(self, path: str, mode: str = "replay"):
+        """
+        :param path: The cassette file.
+        :param mode: 'record' to append new pairs, 'replay' to serve recorded ones.
+        :raises ValueError: If the mode is unknown.
+        :raises FileNotFoundError: If replaying a cassette that does not exist.
+        """
+        if mode not in CASSETTE_MODES:
+            raise ValueError(
+                f"Cassette mode must be one of {CASSETTE_MODES}, got {mode}"
+            )
+        self.path = path
+        self.mode = mode
+        self._entries = defaultdict(list)
+        self._cursors = defaultdict(int)
+        self._lock = threading.Lock()
+        if mode == "replay" and not os.path.exists(path):
+            raise FileNotFoundError(f"Cassette {path} does not exist")
+        if os.path.exists(path):
+            self._load()
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == "record"
+
+    def _load(self):
+        count = 0
+        with gzip.open(self.path, "rt", encoding="utf-8") as cassette_file:
+            for line in cassette_file:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                self._entries[entry["key"]].append(entry["response"])
+                count += 1
+        logger.info(f"Loaded {count} recorded responses from: {self.path}")
+
+    @staticmethod
+    def key(kind: str, request: dict) -> str:
+        """Returns the digest identifying a request of the given kind."""
+        payload = json.dumps([kind, request], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def record(self, kind: str, request: dict, responses: List[Any]):
+        """Appends the responses to a request to the cassette."""
+        self.record_many(kind, [(request, responses)])
+
+    def record_many(self, kind: str, pairs: List[tuple]):
+        """Appends several (request, responses) pairs to the cassette in one write."""
+        lines = []
+        with self._lock:
+            for request, responses in pairs:
+                key = self.key(kind, request)
+                for response in responses:
+                    encoded = _encode(response)
+                    self._entries[key].append(encoded)
+                    lines.append(json.dumps({"key": key, "response": encoded}))
+            # Each append is a complete gzip member, so a crash loses at most this batch
+            with gzip.open(self.path, "at", encoding="utf-8") as cassette_file:
+                cassette_file.write("".join(line + "\n" for line in lines))
+
+    def recorded(self, kind: str, request: dict) -> bool:
+        """Returns whether any responses to a request are on the cassette."""
+        with self._lock:
+            return bool(self._entries.get(self.key(kind, request)))
+
+    def replay(
+        self, kind: str, request: dict, count: int = 1, cycle: bool = False
+    ) -> List[Any]:
+        """
+        Returns the next `count` recorded responses to a request, in recorded order.
+
+        :param cycle: Start again from the first response once all have been replayed; only
+            for deterministic requests, such as embeddings, where a repeat is not a new sample.
+        :raises CassetteMissError: If the request was never recorded.
+        :raises CassetteExhaustedError: If fewer than `count` recorded responses remain and
+            `cycle` is not set.
+        """
+        key = self.key(kind, request)
+        with self._lock:
+            recorded = self._entries.get(key)
+            if not recorded:
+                raise CassetteMissError(
+                    f"No recorded {kind} response for request {request}"
+                )
+            cursor = self._cursors[key]
+            if not cycle and cursor + count > len(recorded):
+                raise CassetteExhaustedError(
+                    f"Requested {count} {kind} responses for request {request}, but only "
+                    f"{len(recorded) - cursor} of the {len(recorded)} recorded remain"
+                )
+            self._cursors[key] = cursor + count
+        return [_decode(recorded[(cursor + i) % len(recorded)]) for i in range(count)]
+
+
+class CassetteLLMClient(LLMGeneratorInterface):
+    """
+    Records the responses of a wrapped LLM client, or replays them without one.
+    """
+
+    def __init__(
+        self,
+        cassette: Cassette,
+        client: LLMGeneratorInterface = None,
+        namespace: str = "",
+    ):
+        """
+        :param cassette: The cassette to record to or replay from.
+        :param client: The client to record; not needed when replaying.
+        :param namespace: Distinguishes otherwise identical requests, e.g. 'OpenAI/gpt-4o'.
+        :raises ValueError: If recording without a client.
+        """
+        if cassette.recording and client is None:
+            raise ValueError("A client is required to record a cassette.")
+        self.cassette = cassette
+        self.client = client
+        self.namespace = namespace
+
+    def _request(self, prompt: str, kwargs: dict) -> dict:
+        return {"namespace": self.namespace, "prompt": prompt, "kwargs": kwargs}
+
+    def generate_response(self, prompt: str, **kwargs) -> str:
+        return self.generate_responses(prompt, 1, **kwargs)[0]
+
+    def generate_responses(self, prompt: str, n: int, **kwargs) -> List[str]:
+        request = self._request(prompt, kwargs)
+        if not self.cassette.recording:
+            return self.cassette.replay("llm", request, n)
+        responses = self.client.generate_responses(prompt, n, **kwargs)
+        self._record(request, responses)
+        return responses
+
+    async def agenerate_response(self, prompt: str, **kwargs) -> str:
+        return (await self.agenerate_responses(prompt, 1, **kwargs))[0]
+
+    async def agenerate_responses(self, prompt: str, n: int, **kwargs) -> List[str]:
+        request = self._request(prompt, kwargs)
+        if not self.cassette.recording:
+            return self.cassette.replay("llm", request, n)
+        responses = await self.client.agenerate_responses(prompt, n, **kwargs)
+        self._record(request, responses)
+        return responses
+
+    def _record(self, request: dict, responses: List[str]):
+        # Failed calls return None; replaying them would only repeat the failure
+        self.cassette.record(
+            "llm", request, [response for response in responses if response is not None]
+        )
+
+
+def chain_namespace(
+    prompt_config: str, prompt_group: str, prompts: dict, input_variables: dict
+) -> str:
+    """
+    Returns the namespace of a chain's recorded responses, e.g.
+    'prompts.json/RiskDefinition@<digest>/{...}'. The digest covers the prompt group's
+    templates, model settings and output parser, so replaying after any of them changes
+    misses instead of returning responses to a different chain.
+    """
+    payload = json.dumps(prompts, sort_keys=True, default=str)
+    digest = hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+    return f"{prompt_config}/{prompt_group}@{digest}/{input_variables}"
+
+
+class CassetteChainClient:
+    """
+    Records the responses of a configured `LangChainClient`, or replays them without one.
+    """
+
+    def __init__(self, cassette: Cassette, client=None, namespace: str = ""):
+        """
+        :param cassette: The cassette to record to or replay from.
+        :param client: The configured LangChainClient to record; not needed when replaying.
+        :param namespace: Identifies the chain; see `chain_namespace`.
+        :raises ValueError: If recording without a client.
+        """
+        if cassette.recording and client is None:
+            raise ValueError("A client is required to record a cassette.")
+        self.cassette = cassette
+        self.client = client
+        self.request = {"namespace": namespace}
+
+    def generate_response(self):
+        if not self.cassette.recording:
+            response = self.cassette.replay("chain", self.request)[0]
+            if isinstance(response, ResponseGenerationError):
+                raise response
+            return response
+        try:
+            response = self.client.generate_response()
+        except ResponseGenerationError as e:
+            self.cassette.record("chain", self.request, [e])
+            raise
+        self.cassette.record("chain", self.request, [response])
+        return response
+
+    def generate_responses(
+        self, iterations: int, max_concurrency: int = None, on_complete=None
+    ) -> list:
+        """
+        Returns one (result, attempts) pair per iteration, as `LangChainClient` does; the
+        attempts of replayed iterations are not recorded, so they are None.
+        """
+        if not self.cassette.recording:
+            responses = self.cassette.replay("chain", self.request, iterations)
+            if on_complete:
+                for iteration in range(iterations):
+                    on_complete(iteration)
+            return [(response, None) for response in responses]
+        results = self.client.generate_responses(
+            iterations, max_concurrency, on_complete=on_complete
+        )
+        self.cassette.record("chain", self.request, [result for result, _ in results])
+        return results
+
+
+class CassetteEmbeddingGenerator(EmbeddingGeneratorInterface):
+    """
+    Records the embeddings of a wrapped generator or embedding adapter per text, or replays
+    them without one.
+    """
+
+    def __init__(
+        self,
+        cassette: Cassette,
+        model: str,
+        embedding_generator: EmbeddingGeneratorInterface = None,
+    ):
+        """
+        :param cassette: The cassette to record to or replay from.
+        :param model: The embedding model, part of each recorded request.
+        :param embedding_generator: The generator, or embedding adapter, to record; not needed
+            when replaying.
+        :raises ValueError: If recording without a generator.
+        """
+        if cassette.recording and embedding_generator is None:
+            raise ValueError("An embedding generator is required to record a cassette.")
+        self.cassette = cassette
+        self.model = model
+        self.embedding_generator = embedding_generator
+
+    def generate_embeddings(self, texts: List[str]) -> List[List[float]]:
+        if not self.cassette.recording:
+            return [
+                self.cassette.replay(
+                    "embedding", {"model": self.model, "text": text}, cycle=True
+                )[0]
+                for text in texts
+            ]
+        embeddings = self.embedding_generator.generate_embeddings(texts)
+        # A text's embedding is recorded once however often it is embedded
+        pairs = {}
+        for text, embedding in zip(texts, embeddings):
+            request = {"model": self.model, "text": text}
+            if text not in pairs and not self.cassette.recorded("embedding", request):
+                pairs[text] = (request, [embedding])
+        if pairs:
+            self.cassette.record_many("embedding", list(pairs.values()))
+        return embeddings
@@ -33,6 +33,9 @@ Example usage:
     # Group and count identical responses
     print(response_analysis.response_counts)
 
+    # Add further responses as they arrive
+    response_analysis.add_responses(["Hello, how can I help you today?"])
+
     # Highlight character-level differences from the base response
     print(response_analysis.highlight_differences_char())
 
@@ -40,7 +43,21 @@ Example usage:
     print(response_analysis.highlight_differences_words())
 
     # Calculate semantic similarities between the base response and other responses
-    print(response_analysis.semantic_similarities)
+    print(response_analysis.calculate_semantic_similarities())
+
+    # Compare to the most central response rather than the first
+    response_analysis = ResponseAnalysis(responses, semantic_distance_calculator, baseline="medoid")
+    print(response_analysis.pairwise_statistics()["mean_similarity"])
+
+    # Group paraphrases into behavioural modes
+    for cluster in response_analysis.cluster_responses(threshold=0.9):
+        print(cluster["size"], cluster["representative"])
+
+    # Embed one response per group of lexical near-duplicates
+    response_analysis = ResponseAnalysis(
+        responses, semantic_distance_calculator, near_duplicate_threshold=0.8
+    )
+    print(response_analysis.near_duplicate_groups())
 
 Key Features:
     - Efficient grouping and counting of identical responses to identify common patterns
@@ -49,6 +66,14 @@ Key Features:
         responses and identify variations.
     - Calculating semantic similarities between responses using a custom SemanticDistanceCalculator,
         allowing for a deeper understanding of the textual variations beyond syntactic differences.
+    - A medoid baseline and pairwise statistics (mean and minimum similarity over all pairs,
+        per-response centrality) from the full similarity matrix, computed in blocks.
+    - Per-field similarities of structured responses, with every distinct field value embedded
+        in one batched call and the scores computed in one vectorised pass.
+    - Clustering of responses into behavioural modes by embedding similarity, with each mode's
+        size, representative response and intra-cluster similarity.
+    - Optional lexical near-duplicate grouping with MinHash signatures, so only one response per
+        group of near-identical responses is embedded.
 
 This module is particularly useful in applications where text responses from different sources or
 iterations need to be analyzed for consistency, variations, or improvement over time. It leverages
@@ -59,23 +84,251 @@ dynamics.
 
 from difflib import ndiff
 from deepdiff import DeepDiff
+import numpy as np
 
+from det.det_response.clustering import NOISE, cluster_embeddings
+from det.det_response.near_duplicates import MinHasher, group_near_duplicates
 from det.det_response.semantic_distance import SemanticDistanceCalculator
 
 
+BASELINES = ("first", "medoid")
+
+
 class ResponseAnalysis:
     def __init__(
-        self, responses, semantic_distance_calculator: SemanticDistanceCalculator
+        self,
+        responses,
+        semantic_distance_calculator: SemanticDistanceCalculator,
+        baseline: str = "first",
+        near_duplicate_threshold: float = None,
     ):
+        """
+        :param responses: The responses to analyse, strings or Pydantic objects.
+        :param semantic_distance_calculator: Calculates the similarities between responses.
+        :param baseline: The response the others are compared to: 'first', or 'medoid' for the
+            response most similar to all the others, so an outlier first response cannot skew
+            the report.
+        :param near_duplicate_threshold: If given, responses whose estimated lexical (Jaccard)
+            similarity to a more common response is at least this are treated as copies of it
+            and are not embedded themselves. None embeds every distinct response.
+        :raises ValueError: If the baseline is unknown or the threshold is not between 0 and 1.
+        """
+        if baseline not in BASELINES:
+            raise ValueError(f"Baseline must be one of {BASELINES}, got {baseline}")
+        if (
+            near_duplicate_threshold is not None
+            and not 0 < near_duplicate_threshold <= 1
+        ):
+            raise ValueError(
+                f"Near-duplicate threshold must be between 0 and 1, got {near_duplicate_threshold}"
+            )
         self.responses = responses
-        self.base_response = responses[0] if responses else None
+        self.baseline = baseline
         self.response_counts = self.group_and_count_responses()
         self.semantic_distance_calculator = semantic_distance_calculator
+        self.near_duplicate_threshold = near_duplicate_threshold
+        self._pairwise_statistics = None
+        self._near_duplicates = None
+        self._minhasher = MinHasher()
+        self._signatures = {}
         # self.semantic_similarities = self.calculate_semantic_similarities()
 
+    @property
+    def base_index(self):
+        """The position of the base response, or None without responses."""
+        if not self.responses:
+            return None
+        if self.baseline == "medoid":
+            return self.pairwise_statistics()["medoid_index"]
+        return 0
+
+    @property
+    def base_response(self):
+        return self.responses[self.base_index] if self.responses else None
+
+    def add_responses(self, responses):
+        """Adds responses as they arrive, updating the counts without regrouping."""
+        self.responses = self.responses + list(responses)
+        self._pairwise_statistics = None
+        self._near_duplicates = None
+        for response in responses:
+            response_key = str(response)
+            self.response_counts[response_key] = (
+                self.response_counts.get(response_key, 0) + 1
+            )
+
+    def _group_near_duplicates(self):
+        """Maps each distinct response to its near-duplicate group's representative."""
+        if self._near_duplicates is not None:
+            return self._near_duplicates
+        unique_keys = list(self.response_counts)
+        # Signatures are kept as responses arrive, so only new responses are hashed
+        for key in unique_keys:
+            if key not in self._signatures:
+                self._signatures[key] = self._minhasher.signature(key)
+        representatives, similarities = group_near_duplicates(
+            np.vstack([self._signatures[key] for key in unique_keys]),
+            weights=[self.response_counts[key] for key in unique_keys],
+            threshold=self.near_duplicate_threshold,
+        )
+        self._near_duplicates = {
+            key: (unique_keys[representative], float(similarity))
+            for key, representative, similarity in zip(
+                unique_keys, representatives, similarities
+            )
+        }
+        return self._near_duplicates
+
+    def near_duplicate_groups(self):
+        """
+        Groups the distinct responses into lexical near-duplicates.
+
+        :return: A dict per group, largest first, with its 'representative' (the most common
+            response in it), 'size' (in responses), 'lexical_similarity' (the mean estimated
+            Jaccard similarity of its responses to the representative) and its distinct
+            'responses'; [] unless a near-duplicate threshold was given.
+        """
+        if self.near_duplicate_threshold is None or not self.responses:
+            return []
+        groups = {}
+        for key, (representative, similarity) in self._group_near_duplicates().items():
+            group = groups.setdefault(
+                representative,
+                {
+                    "representative": representative,
+                    "size": 0,
+                    "lexical_similarity": 0.0,
+                    "responses": [],
+                },
+            )
+            count = self.response_counts[key]
+            group["size"] += count
+            group["lexical_similarity"] += similarity * count
+            group["responses"].append(key)
+        for group in groups.values():
+            group["lexical_similarity"] /= group["size"]
+        return sorted(groups.values(), key=lambda group: -group["size"])
+
+    def embed_responses(self, keys):
+        """
+        Embeds responses by their string keys, each distinct response once. With a
+        near-duplicate threshold, each response gets its group representative's embedding.
+
+        :param keys: The `str` of each response to embed.
+        :return: A (len(keys), dimensions) float32 array.
+        """
+        if self.near_duplicate_threshold is not None:
+            near_duplicates = self._group_near_duplicates()
+            keys = [near_duplicates.get(key, (key,))[0] for key in keys]
+        return self.semantic_distance_calculator.embed(keys)
+
+    def pairwise_statistics(self, block_size: int = 1024):
+        """
+        Summarises the similarity of every pair of responses. Each distinct response is
+        embedded and compared once, and the matrix is computed in blocks, so thousands of
+        responses fit in bounded memory.
+
+        :param block_size: The rows of the similarity matrix computed at once.
+        :return: A dict with the 'medoid_index' and 'medoid' (the response with the highest
+            mean similarity to the others), the 'mean_similarity' and 'min_similarity' over
+            all pairs, and per response its 'centrality' (mean similarity to the others).
+        """
+        if self._pairwise_statistics is not None:
+            return self._pairwise_statistics
+        if not self.responses:
+            return {}
+        keys = [str(response) for response in self.responses]
+        unique_keys = list(self.response_counts)
+        row = {key: i for i, key in enumerate(unique_keys)}
+        embeddings = self.embed_responses(unique_keys)
+        means, minimums = self.semantic_distance_calculator.pairwise_summary(
+            embeddings,
+            weights=[self.response_counts[key] for key in unique_keys],
+            block_size=block_size,
+        )
+        centrality = means[[row[key] for key in keys]]
+        medoid_index = int(np.argmax(np.nan_to_num(centrality, nan=1.0)))
+        counts = np.array([self.response_counts[key] for key in unique_keys])
+        self._pairwise_statistics = {
+            "medoid_index": medoid_index,
+            "medoid": self.responses[medoid_index],
+            "mean_similarity": (
+                float(np.average(means, weights=counts))
+                if len(self.responses) > 1
+                else None
+            ),
+            "min_similarity": (
+                float(np.min(minimums)) if len(self.responses) > 1 else None
+            ),
+            "centrality": centrality,
+        }
+        return self._pairwise_statistics
+
+    def cluster_responses(
+        self, threshold: float = 0.9, min_samples: int = 1, block_size: int = 1024
+    ):
+        """
+        Clusters the responses into behavioural modes by the similarity of their embeddings.
+        Each distinct response is embedded once and weighted by its count.
+
+        :param threshold: The least cosine similarity for two responses to be neighbours.
+        :param min_samples: The least responses, itself included, within the threshold of a
+            core response; responses not near a core response are noise.
+        :param block_size: The rows of the similarity matrix computed at once.
+        :return: A dict per cluster, largest first and noise last, with its 'label' (-1 for
+            noise), 'size' (in responses), 'share' of all responses, 'representative' (the
+            member with the highest mean similarity to the others), 'intra_similarity' (the
+            mean similarity over pairs of members, None for a single response) and the
+            distinct 'responses' in it.
+        """
+        if not self.responses:
+            return []
+        unique_keys = list(self.response_counts)
+        counts = np.array([self.response_counts[key] for key in unique_keys])
+        embeddings = self.embed_responses(unique_keys)
+        labels = cluster_embeddings(
+            embeddings,
+            weights=counts,
+            threshold=threshold,
+            min_samples=min_samples,
+            block_size=block_size,
+        )
+        # The first response with each key stands for it, so Pydantic responses keep their type
+        representatives = {}
+        for response in self.responses:
+            representatives.setdefault(str(response), response)
+
+        clusters = []
+        for label in sorted(set(labels.tolist()), key=lambda label: label == NOISE):
+            members = np.flatnonzero(labels == label)
+            means, _ = self.semantic_distance_calculator.pairwise_summary(
+                embeddings[members], weights=counts[members], block_size=block_size
+            )
+            size = int(counts[members].sum())
+            clusters.append(
+                {
+                    "label": label,
+                    "size": size,
+                    "share": size / len(self.responses),
+                    "representative": representatives[
+                        unique_keys[members[np.argmax(np.nan_to_num(means, nan=1.0))]]
+                    ],
+                    "intra_similarity": (
+                        float(np.average(means, weights=counts[members]))
+                        if size > 1
+                        else None
+                    ),
+                    "responses": [representatives[unique_keys[i]] for i in members],
+                }
+            )
+        return clusters
+
     def deep_diff_responses(self):
         diffs = []
-        for response in self.responses[1:]:  # Skip the base response
+        base_index = self.base_index
+        for i, response in enumerate(self.responses):
+            if i == base_index:  # Skip the base response
+                continue
             diff = DeepDiff(
                 self.base_response, response, ignore_order=True, verbose_level=1
             )
@@ -112,6 +365,15 @@ class ResponseAnalysis:
     def calculate_semantic_similarities(self):
         if not self.base_response or len(self.responses) < 2:
             return []
+        if self.near_duplicate_threshold is not None:
+            embeddings = self.embed_responses(
+                [str(self.base_response)]
+                + [str(response) for response in self.responses]
+            )
+            similarities = self.semantic_distance_calculator.cosine_similarity_matrix(
+                embeddings[1:], embeddings[:1]
+            )
+            return similarities[:, 0].tolist()
         return self.semantic_distance_calculator.semantic_similarity(
             self.base_response, self.responses
         )
@@ -120,15 +382,27 @@ class ResponseAnalysis:
         if not self.responses:
             return {}
 
-        similarities = {}
-        base_dict = self.base_response.dict()
-        for field in base_dict.keys():
-            similarities[field] = [1.0]  # First iteration always 1.0
-            base_value = str(getattr(self.base_response, field))
-            for response in self.responses[1:]:
-                compare_value = str(getattr(response, field))
-                score = self.semantic_distance_calculator.semantic_similarity(
-                    base_value, [compare_value]
-                )[0]
-                similarities[field].append(score)
-        return similarities
+        fields = list(self.base_response.dict().keys())
+        # The whole field x response matrix of values is embedded in one batched call
+        values = [
+            str(getattr(response, field))
+            for field in fields
+            for response in self.responses
+        ]
+        embeddings = self.semantic_distance_calculator.embed(values)
+        embeddings = self.semantic_distance_calculator.normalise(
+            embeddings.reshape(len(fields), len(self.responses), -1)
+        )
+        # Cosine similarity of each response's value to the base response's, per field
+        base_index = self.base_index
+        scores = np.einsum("frd,fd->fr", embeddings, embeddings[:, base_index])
+        # Values identical to the base response's, the base itself included, are exactly 1.0
+        values = np.array(values, dtype=object).reshape(
+            len(fields), len(self.responses)
+        )
+        scores[values == values[:, base_index : base_index + 1]] = 1.0
+
+        return {
+            field: [float(score) for score in scores[i]]
+            for i, field in enumerate(fields)
+        }
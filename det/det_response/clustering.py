@@ -0,0 +1,96 @@
+"""
+Response Clustering Module
+
+# det_response/clustering.py
+
+This module groups responses into behavioural "modes" by the similarity of their embeddings.
+Grouping byte-identical responses misses that most non-deterministic output is paraphrase: a
+handful of distinct answers, each worded a few different ways. Clustering the embeddings finds
+those answers.
+
+The clustering is DBSCAN on cosine similarity: two responses are neighbours when their similarity
+is at least `threshold`, a response with at least `min_samples` neighbours (itself included) is a
+core response, clusters are the connected groups of core responses plus their neighbours, and
+anything else is noise. With the default `min_samples=1` every response is a core response, which
+is threshold-based single-linkage clustering. Identical responses are passed once with their count
+as weight.
+
+Example usage:
+
+    from det.det_response.clustering import cluster_embeddings, NOISE
+
+    labels = cluster_embeddings(embeddings, weights=counts, threshold=0.9)
+
+    # or, from a ResponseAnalysis
+    for cluster in analysis.cluster_responses(threshold=0.9):
+        print(cluster["size"], cluster["intra_similarity"], cluster["representative"])
+
+Key Features:
+    - NumPy only: the neighbourhood graph is built from blocked matrix products and the clusters
+        are found with vectorised breadth-first search, so 1,000+ distinct responses cluster in
+        well under a second on a CPU.
+    - Clusters are numbered by size, largest first; noise is labelled -1.
+"""
+
+import numpy as np
+
+from det.det_response.semantic_distance import SemanticDistanceCalculator
+
+NOISE = -1
+
+
+def cluster_embeddings(
+    embeddings,
+    weights=None,
+    threshold: float = 0.9,
+    min_samples: int = 1,
+    block_size: int = 1024,
+) -> np.ndarray:
+    """
+    Clusters embeddings with DBSCAN on cosine similarity.
+
+    :param embeddings: An (n, d) array or list of embeddings.
+    :param weights: How many responses each embedding stands for, 1 each by default.
+    :param threshold: The least cosine similarity for two embeddings to be neighbours.
+    :param min_samples: The least (weighted) neighbours, itself included, of a core embedding.
+    :param block_size: The rows of the similarity matrix computed at once.
+    :return: The cluster label of each embedding, numbered by cluster size; -1 for noise.
+    """
+    normalised = SemanticDistanceCalculator.normalise(
+        SemanticDistanceCalculator.stack(embeddings)
+    )
+    n = len(normalised)
+    if n == 0:
+        return np.empty(0, dtype=int)
+    weights = np.ones(n) if weights is None else np.asarray(weights, dtype=float)
+
+    # The neighbourhood graph; a boolean matrix is 1/32 the size of the similarities
+    neighbours = np.empty((n, n), dtype=bool)
+    for start in range(0, n, block_size):
+        block = normalised[start : start + block_size] @ normalised.T
+        neighbours[start : start + block_size] = block >= threshold
+    np.fill_diagonal(neighbours, True)
+    core = neighbours.astype(float) @ weights >= min_samples
+
+    labels = np.full(n, NOISE)
+    cluster = 0
+    for seed in np.flatnonzero(core):
+        if labels[seed] != NOISE:
+            continue
+        # Breadth-first search through core responses, a whole frontier at a time
+        labels[seed] = cluster
+        frontier = np.zeros(n, dtype=bool)
+        frontier[seed] = True
+        while frontier.any():
+            reached = neighbours[frontier].any(axis=0) & (labels == NOISE)
+            labels[reached] = cluster
+            # Only core responses extend the cluster; the others are its border
+            frontier = reached & core
+        cluster += 1
+
+    # Number the clusters by their weighted size, largest first
+    sizes = np.bincount(labels[labels != NOISE], weights=weights[labels != NOISE])
+    order = np.argsort(-sizes, kind="stable")
+    renumbered = np.empty_like(order)
+    renumbered[order] = np.arange(len(order))
+    return np.where(labels == NOISE, NOISE, renumbered[np.maximum(labels, 0)])
@@ -0,0 +1,174 @@
+"""
+Near-Duplicate Detection Module
+
+# det_response/near_duplicates.py
+
+This module finds responses that are lexically near-identical, differing only in whitespace,
+punctuation, case or a word or two, without embedding them. Each response is normalised, cut
+into character shingles and summarised by a MinHash signature, whose agreement with another
+signature estimates the Jaccard similarity of their shingle sets. Locality-sensitive hashing on
+bands of the signatures finds the candidate pairs, so responses are not all compared to each
+other.
+
+Grouping near-duplicates before embedding means only one response per group needs to be sent to
+the embedding generator, which cuts embedding volume sharply for large runs of a model that
+mostly paraphrases itself.
+
+Example usage:
+
+    from det.det_response.near_duplicates import MinHasher, group_near_duplicates
+
+    hasher = MinHasher()
+    signatures = hasher.signatures(["Yes, I will.", "yes  I will", "No."])
+    representatives, similarities = group_near_duplicates(signatures, threshold=0.8)
+    # representatives == [0, 0, 2]
+
+Key Features:
+    - Signatures are deterministic across processes: shingles are hashed with CRC-32 and the
+        permutations come from a fixed seed.
+    - Groups are formed greedily around the most common responses, so every member is within
+        the threshold of its group's representative, not merely chained to it.
+"""
+
+import re
+import zlib
+from collections import defaultdict
+
+import numpy as np
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalise_text(text: str) -> str:
+    """Lower-cases the text, drops punctuation and collapses whitespace."""
+    return _WHITESPACE.sub(" ", _PUNCTUATION.sub(" ", text.lower())).strip()
+
+
+class MinHasher:
+    """
+    Computes MinHash signatures of the character shingles of normalised texts.
+    """
+
+    def __init__(self, num_perm: int = 128, shingle_size: int = 4, seed: int = 1):
+        """
+        :param num_perm: The length of each signature; longer is more accurate and slower.
+        :param shingle_size: The characters in each shingle.
+        :param seed: Seeds the hash permutations.
+        :raises ValueError: If the signature length or shingle size is not positive.
+        """
+        if num_perm < 1:
+            raise ValueError(f"Signature length must be positive, got {num_perm}")
+        if shingle_size < 1:
+            raise ValueError(f"Shingle size must be positive, got {shingle_size}")
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        # Below 2**31 so that a * hash + b cannot overflow 64 bits
+        generator = np.random.default_rng(seed)
+        self._a = generator.integers(1, 1 << 31, num_perm, dtype=np.uint64)
+        self._b = generator.integers(0, 1 << 31, num_perm, dtype=np.uint64)
+
+    def shingles(self, text: str) -> set:
+        text = normalise_text(text)
+        if len(text) <= self.shingle_size:
+            return {text} if text else set()
+        return {
+            text[i : i + self.shingle_size]
+            for i in range(len(text) - self.shingle_size + 1)
+        }
+
+    def signature(self, text: str) -> np.ndarray:
+        """Returns the MinHash signature of the text as a uint64 array."""
+        shingles = self.shingles(text)
+        if not shingles:
+            return np.full(self.num_perm, _MAX_HASH, dtype=np.uint64)
+        hashes = np.fromiter(
+            (zlib.crc32(shingle.encode("utf-8")) for shingle in shingles),
+            dtype=np.uint64,
+            count=len(shingles),
+        )
+        permuted = (np.outer(self._a, hashes) + self._b[:, None]) % _MERSENNE_PRIME
+        return permuted.min(axis=1)
+
+    def signatures(self, texts) -> np.ndarray:
+        """Returns a (len(texts), num_perm) array of signatures."""
+        if not texts:
+            return np.empty((0, self.num_perm), dtype=np.uint64)
+        return np.vstack([self.signature(text) for text in texts])
+
+
+def lsh_bands(num_perm: int, threshold: float):
+    """
+    Chooses how to split signatures into bands of rows for LSH, so that pairs become
+    candidates with probability 1/2 at about the threshold, erring on the low side so that
+    few pairs above it are missed.
+
+    :return: The number of bands and the rows per band.
+    """
+    options = [
+        (num_perm // rows, rows)
+        for rows in range(1, num_perm + 1)
+        if num_perm % rows == 0
+    ]
+    below = [
+        (bands, rows)
+        for bands, rows in options
+        if (1 / bands) ** (1 / rows) <= threshold
+    ]
+    return max(
+        below or options[:1], key=lambda option: (1 / option[0]) ** (1 / option[1])
+    )
+
+
+def group_near_duplicates(signatures, weights=None, threshold: float = 0.8):
+    """
+    Groups texts whose estimated Jaccard similarity is at least the threshold.
+
+    The most common (then earliest) ungrouped text becomes the representative of a new group
+    and takes in every ungrouped text that shares an LSH bucket with it and is within the
+    threshold.
+
+    :param signatures: An (n, num_perm) array of MinHash signatures.
+    :param weights: How many responses each text stands for, 1 each by default.
+    :param threshold: The least estimated Jaccard similarity to a group's representative.
+    :return: Per text, the index of its group's representative and its estimated similarity
+        to the representative, as two arrays.
+    :raises ValueError: If the threshold is not between 0 and 1.
+    """
+    if not 0 < threshold <= 1:
+        raise ValueError(f"Threshold must be between 0 and 1, got {threshold}")
+    signatures = np.asarray(signatures, dtype=np.uint64)
+    n, num_perm = signatures.shape
+    weights = np.ones(n) if weights is None else np.asarray(weights, dtype=float)
+    bands, rows = lsh_bands(num_perm, threshold)
+
+    buckets = defaultdict(list)
+    for band in range(bands):
+        band_signatures = signatures[:, band * rows : (band + 1) * rows]
+        for i in range(n):
+            buckets[band, band_signatures[i].tobytes()].append(i)
+    member_buckets = defaultdict(list)
+    for members in buckets.values():
+        if len(members) > 1:
+            members = np.array(members)
+            for i in members:
+                member_buckets[i].append(members)
+
+    representatives = np.full(n, -1)
+    similarities = np.zeros(n)
+    for leader in np.lexsort((np.arange(n), -weights)):
+        if representatives[leader] >= 0:
+            continue
+        representatives[leader] = leader
+        similarities[leader] = 1.0
+        if not member_buckets[leader]:
+            continue
+        candidates = np.unique(np.concatenate(member_buckets[leader]))
+        candidates = candidates[representatives[candidates] < 0]
+        estimates = (signatures[candidates] == signatures[leader]).mean(axis=1)
+        joined = candidates[estimates >= threshold]
+        representatives[joined] = leader
+        similarities[joined] = estimates[estimates >= threshold]
+    return representatives, similarities
@@ -31,6 +31,15 @@ Example usage:
     # Display just the response counts
     presenter.display_response_counts()
 
+    # Display the mean and minimum pairwise similarity, the medoid and the outliers
+    presenter.display_pairwise_summary()
+
+    # Display the behavioural modes the responses cluster into
+    presenter.display_clusters(threshold=0.9)
+
+    # Display the groups of lexical near-duplicates that share one embedding
+    presenter.display_near_duplicates()
+
     # Display character-level differences from the base response
     presenter.display_differences_char()
 
@@ -41,6 +50,8 @@ Key Features:
     - Visual presentation of response counts, highlighting the frequency of each unique response.
     - Detailed display of character-level and word-level differences, with added words highlighted
         for quick identification.
+    - A summary of the pairwise similarities listing the least central responses, the likely
+        outliers.
     - Presentation of semantic similarity scores in a table, allowing for a quick overview of how
         closely related the responses are semantically.
 
@@ -50,6 +61,7 @@ for anyone looking to present textual analysis results in a professional and eng
 
 """
 
+import numpy as np
 from rich.console import Console
 from rich.table import Table
 from rich.text import Text
@@ -102,6 +114,83 @@ class ResponsePresenter:
 
         self.console.print(table)
 
+    def display_pairwise_summary(self, outliers: int = 3):
+        """Displays the pairwise similarity statistics and the least central responses."""
+        statistics = self.analysis.pairwise_statistics()
+        if not statistics or statistics["mean_similarity"] is None:
+            return
+        self.console.print(
+            f"Pairwise similarity: mean [bold]{statistics['mean_similarity']:.3f}[/bold], "
+            f"min [bold]{statistics['min_similarity']:.3f}[/bold]; "
+            f"the medoid is response #{statistics['medoid_index']}"
+        )
+
+        table = Table(title="Least Central Responses")
+        table.add_column("Response #", justify="right")
+        table.add_column("Centrality", justify="center")
+        table.add_column("Response", justify="left", no_wrap=False)
+        centrality = statistics["centrality"]
+        shown = set()
+        for i in np.argsort(centrality, kind="stable"):
+            response = str(self.analysis.responses[i])
+            # Identical responses share a centrality; show each once
+            if response in shown:
+                continue
+            shown.add(response)
+            table.add_row(str(i), f"{centrality[i]:.3f}", response)
+            if len(shown) == outliers:
+                break
+        self.console.print(table)
+
+    def display_clusters(self, threshold: float = 0.9, min_samples: int = 1):
+        """Displays the clusters of similar responses, one row per behavioural mode."""
+        clusters = self.analysis.cluster_responses(threshold, min_samples)
+        if not clusters:
+            return
+        table = Table(title=f"Response Clusters (similarity >= {threshold})")
+        table.add_column("Cluster", justify="right")
+        table.add_column("Size", justify="right")
+        table.add_column("Share", justify="right")
+        table.add_column("Distinct", justify="right")
+        table.add_column("Intra-cluster Similarity", justify="center")
+        table.add_column("Representative", justify="left", no_wrap=False)
+        for cluster in clusters:
+            intra_similarity = cluster["intra_similarity"]
+            table.add_row(
+                "noise" if cluster["label"] < 0 else str(cluster["label"]),
+                str(cluster["size"]),
+                f"{cluster['share']:.1%}",
+                str(len(cluster["responses"])),
+                "N/A" if intra_similarity is None else f"{intra_similarity:.3f}",
+                str(cluster["representative"]),
+            )
+        self.console.print(table)
+
+    def display_near_duplicates(self, groups: int = 5):
+        """Displays how many embeddings near-duplicate grouping saved and its largest groups."""
+        near_duplicate_groups = self.analysis.near_duplicate_groups()
+        if not near_duplicate_groups:
+            return
+        distinct = sum(len(group["responses"]) for group in near_duplicate_groups)
+        self.console.print(
+            f"Near-duplicates: {distinct} distinct responses in "
+            f"[bold]{len(near_duplicate_groups)}[/bold] groups, one embedding each"
+        )
+
+        table = Table(title="Largest Near-Duplicate Groups")
+        table.add_column("Size", justify="right")
+        table.add_column("Distinct", justify="right")
+        table.add_column("Lexical Similarity", justify="center")
+        table.add_column("Representative", justify="left", no_wrap=False)
+        for group in near_duplicate_groups[:groups]:
+            table.add_row(
+                str(group["size"]),
+                str(len(group["responses"])),
+                f"{group['lexical_similarity']:.3f}",
+                group["representative"],
+            )
+        self.console.print(table)
+
     def display_response_counts(self):
         response_counts = self.analysis.group_and_count_responses()
         table = Table(title="Response Counts")
@@ -30,10 +30,20 @@ Example usage:
     similarities = semantic_distance_calculator.semantic_similarity(base_text, compare_texts)
     print(similarities)
 
+    # Every pair of responses at once, as an N x N matrix
+    matrix = semantic_distance_calculator.pairwise([base_text] + compare_texts)
+
 Key Features:
     - Calculates cosine similarity between text embeddings to measure semantic closeness.
+    - `embed` embeds many texts in one batched call, each distinct text once, for callers that
+        compare many texts at a time.
+    - Matrix kernels for one-to-many, many-to-many and pairwise NxN similarities stack the
+        embeddings into one float32 array, normalise once and use a single matrix multiplication.
+    - `pairwise_summary` derives per-response centrality and minimum similarity from the full
+        pairwise matrix in bounded memory, computing it a block of rows at a time.
     - Supports comparison of one base text against multiple comparison texts, returning a list of
-         similarity scores.
+         similarity scores. Each distinct text is embedded once, and texts identical to the base
+         score 1.0 without being embedded.
     - Requires an embedding generator for generating text embeddings, making it flexible to use
         with various embedding models.
 
@@ -58,18 +68,137 @@ class SemanticDistanceCalculator:
         similarity = np.dot(norm1, norm2)
         return similarity
 
+    def embed(self, texts):
+        """
+        Embeds the texts with one call to the embedding generator, embedding each distinct
+        text once.
+
+        :param texts: The texts to embed.
+        :return: A (len(texts), dimensions) float32 array, one row per text.
+        """
+        unique_texts = list(dict.fromkeys(texts))
+        if not unique_texts:
+            return np.empty((0, 0), dtype=np.float32)
+        embeddings = self.stack(
+            self.embedding_generator.generate_embeddings(unique_texts)
+        )
+        row = {text: i for i, text in enumerate(unique_texts)}
+        return embeddings[[row[text] for text in texts]]
+
+    @staticmethod
+    def stack(embeddings):
+        """Stacks a list of embeddings into one contiguous float32 matrix."""
+        if len(embeddings) == 0:
+            return np.empty((0, 0), dtype=np.float32)
+        return np.ascontiguousarray(np.vstack(embeddings), dtype=np.float32)
+
+    @staticmethod
+    def normalise(embeddings):
+        """Scales each row to unit length, leaving all-zero rows as they are."""
+        norms = np.linalg.norm(embeddings, axis=-1, keepdims=True)
+        return embeddings / np.where(norms == 0, 1, norms)
+
+    @classmethod
+    def cosine_similarity_matrix(cls, embeddings_a, embeddings_b=None):
+        """
+        Returns the cosine similarity of every row of `embeddings_a` to every row of
+        `embeddings_b` (or of `embeddings_a` itself) with one matrix multiplication.
+
+        :param embeddings_a: An (n, d) array or list of embeddings.
+        :param embeddings_b: An (m, d) array or list of embeddings.
+        :return: An (n, m) float32 array.
+        """
+        a = cls.normalise(cls.stack(embeddings_a))
+        b = a if embeddings_b is None else cls.normalise(cls.stack(embeddings_b))
+        return a @ b.T
+
+    def one_to_many(self, base_text, compare_texts):
+        """
+        Returns the similarity of the base text to each of the compare texts.
+
+        :return: A float32 array of len(compare_texts) scores.
+        """
+        embeddings = self.embed([base_text] + list(compare_texts))
+        return self.cosine_similarity_matrix(embeddings[1:], embeddings[:1])[:, 0]
+
+    def many_to_many(self, texts_a, texts_b):
+        """
+        Returns the similarity of each text in `texts_a` to each text in `texts_b`.
+
+        :return: A (len(texts_a), len(texts_b)) float32 array.
+        """
+        embeddings = self.embed(list(texts_a) + list(texts_b))
+        return self.cosine_similarity_matrix(
+            embeddings[: len(texts_a)], embeddings[len(texts_a) :]
+        )
+
+    def pairwise(self, texts):
+        """
+        Returns the similarity of every pair of texts.
+
+        :return: A symmetric (len(texts), len(texts)) float32 array.
+        """
+        return self.cosine_similarity_matrix(self.embed(list(texts)))
+
+    @classmethod
+    def pairwise_summary(cls, embeddings, weights=None, block_size: int = 1024):
+        """
+        Summarises the full pairwise similarity matrix of the embeddings without holding it in
+        memory: it is computed `block_size` rows at a time.
+
+        Identical responses only need embedding and comparing once; pass each distinct
+        response's embedding with its count as the weight, and every row is summarised as if
+        each copy had its own row.
+
+        :param embeddings: An (n, d) array or list of embeddings.
+        :param weights: How many responses each embedding stands for, 1 each by default.
+        :param block_size: The rows of the matrix computed at once.
+        :return: Per embedding, the mean and the minimum similarity to the other responses,
+            as two float arrays (NaN where there are no other responses).
+        """
+        normalised = cls.normalise(cls.stack(embeddings))
+        n = len(normalised)
+        weights = (
+            np.ones(n, dtype=np.float32)
+            if weights is None
+            else np.asarray(weights, dtype=np.float32)
+        )
+        others = weights.sum() - 1
+        means = np.full(n, np.nan)
+        minimums = np.full(n, np.nan)
+        for start in range(0, n, block_size):
+            stop = min(start + block_size, n)
+            block = normalised[start:stop] @ normalised.T
+            rows = np.arange(stop - start)
+            diagonal = block[rows, rows + start].copy()
+            # Every row's own similarity counts once for each other copy of that response
+            totals = block @ weights - diagonal
+            block[rows, rows + start] = np.where(
+                weights[start:stop] > 1, diagonal, np.inf
+            )
+            if others > 0:
+                means[start:stop] = totals / others
+                minimums[start:stop] = block.min(axis=1)
+        return means, minimums
+
     def semantic_similarity(self, base_text, compare_texts):
         if isinstance(base_text, str):
             base_text = [base_text]
         if isinstance(compare_texts, str):
             compare_texts = [compare_texts]
 
-        embeddings = self.embedding_generator.generate_embeddings(
-            base_text + compare_texts
-        )
-        base_embedding = embeddings[0]
-        similarities = [
-            self.calculate_cosine_similarity(base_embedding, emb)
-            for emb in embeddings[1:]
-        ]
-        return similarities
+        texts = base_text + compare_texts
+        if not texts:
+            return []
+        base, compare_texts = texts[0], texts[1:]
+        # Identical texts are 1.0 by definition; only the distinct others are embedded
+        others = [text for text in dict.fromkeys(compare_texts) if text != base]
+        if not others:
+            return [1.0] * len(compare_texts)
+        embeddings = self.embedding_generator.generate_embeddings([base] + others)
+        if len(embeddings) < len(others) + 1:
+            return []
+        # One matrix-vector product rather than a normalisation and dot product per pair
+        similarities = self.cosine_similarity_matrix(embeddings[1:], embeddings[:1])
+        scores = dict(zip(others, similarities[:, 0].tolist()))
+        return [1.0 if text == base else scores[text] for text in compare_texts]
@@ -0,0 +1,150 @@
+"""
+Sequential Consistency Module
+
+# det_response/sequential.py
+
+This module defines the SequentialConsistencyMonitor class, which decides when a consistency run
+has seen enough responses. Rather than fixing the number of iterations ahead of time, responses
+are fed to the monitor as they arrive and it keeps a confidence interval on a consistency metric;
+once the interval is narrower than the target precision, further responses would not change the
+conclusion and generation can stop. Many prompts answer identically for the first few dozen
+iterations, so this cuts API spend and run time severalfold.
+
+Example usage:
+
+    from det.det_response.analysis import ResponseAnalysis
+    from det.det_response.sequential import SequentialConsistencyMonitor
+
+    analysis = ResponseAnalysis([], semantic_distance_calculator)
+    monitor = SequentialConsistencyMonitor(analysis, metric="agreement", precision=0.05)
+
+    while not monitor.should_stop and len(analysis.responses) < 200:
+        monitor.update(client.generate_responses(prompt, n=10))
+
+    print(monitor.estimate, monitor.interval)
+
+Key Features:
+    - 'agreement' tracks the share of responses identical to the most common response, with a
+        Wilson score interval that stays well behaved when every response is identical.
+    - 'similarity' tracks the mean semantic similarity of the later responses to the first, with
+        a normal interval on the mean; only the new responses are embedded on each update.
+    - A minimum number of iterations guards against stopping on a lucky first few responses.
+"""
+
+from statistics import NormalDist
+from typing import List, Tuple
+
+import numpy as np
+
+from det.det_response.analysis import ResponseAnalysis
+
+CONSISTENCY_METRICS = ("agreement", "similarity")
+
+
+class SequentialConsistencyMonitor:
+    """
+    Keeps a confidence interval on a consistency metric as responses arrive and reports
+    when it is tight enough to stop generating.
+    """
+
+    def __init__(
+        self,
+        analysis: ResponseAnalysis,
+        metric: str = "agreement",
+        precision: float = 0.05,
+        confidence: float = 0.95,
+        min_iterations: int = 10,
+    ):
+        """
+        :param analysis: The analysis the responses are added to.
+        :param metric: 'agreement' or 'similarity'.
+        :param precision: The target half-width of the confidence interval.
+        :param confidence: The confidence level of the interval.
+        :param min_iterations: The fewest responses to see before stopping.
+        :raises ValueError: If the metric is unknown or the precision or confidence is out of range.
+        """
+        if metric not in CONSISTENCY_METRICS:
+            raise ValueError(
+                f"Consistency metric must be one of {CONSISTENCY_METRICS}, got {metric}"
+            )
+        if precision <= 0:
+            raise ValueError(f"Precision must be positive, got {precision}")
+        if not 0 < confidence < 1:
+            raise ValueError(f"Confidence must be between 0 and 1, got {confidence}")
+        self.analysis = analysis
+        self.metric = metric
+        self.precision = precision
+        self.confidence = confidence
+        self.min_iterations = min_iterations
+        self.z = NormalDist().inv_cdf(0.5 + confidence / 2)
+        self.similarities: List[float] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.analysis.responses)
+
+    def update(self, responses: list):
+        """Adds newly generated responses to the analysis and the running statistics."""
+        responses = [response for response in responses if response is not None]
+        if not responses:
+            return
+        first_update = not self.analysis.responses
+        self.analysis.add_responses(responses)
+        if self.metric == "similarity":
+            # The first response is the baseline, and scoring it against itself would
+            # add a certain 1.0 to the sample
+            if first_update:
+                responses = responses[1:]
+            if not responses:
+                return
+            # Only the new responses are compared, always to the first response so that
+            # earlier scores stay valid; a medoid baseline would move as responses arrive
+            self.similarities.extend(
+                float(score)
+                for score in self.analysis.semantic_distance_calculator.semantic_similarity(
+                    self.analysis.responses[0], responses
+                )
+            )
+
+    @property
+    def estimate(self) -> float:
+        """The current value of the metric, or None before there is anything to measure."""
+        if self.metric == "agreement":
+            if not self.count:
+                return None
+            return max(self.analysis.response_counts.values()) / self.count
+        if not self.similarities:
+            return None
+        return float(np.mean(self.similarities))
+
+    @property
+    def interval(self) -> Tuple[float, float]:
+        """The confidence interval of the metric, (0, 1) while there is too little to measure."""
+        if self.metric == "agreement":
+            n = self.count
+            if not n:
+                return (0.0, 1.0)
+            # Wilson score interval for a proportion
+            p = self.estimate
+            z2 = self.z**2
+            centre = (p + z2 / (2 * n)) / (1 + z2 / n)
+            half_width = (
+                self.z * np.sqrt(p * (1 - p) / n + z2 / (4 * n**2)) / (1 + z2 / n)
+            )
+            return (max(0.0, centre - half_width), min(1.0, centre + half_width))
+        # The interval is on the mean of the similarity samples, one fewer than the responses
+        n = len(self.similarities)
+        if n < 2:
+            return (0.0, 1.0)
+        half_width = self.z * np.std(self.similarities, ddof=1) / np.sqrt(n)
+        return (self.estimate - half_width, self.estimate + half_width)
+
+    @property
+    def half_width(self) -> float:
+        low, high = self.interval
+        return (high - low) / 2
+
+    @property
+    def should_stop(self) -> bool:
+        """True once enough responses have been seen for the interval to be tight enough."""
+        return self.count >= self.min_iterations and self.half_width <= self.precision
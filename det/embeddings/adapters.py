@@ -3,10 +3,12 @@ from typing import List
 import logging
 import os
 
-from det.embeddings.cache import EmbeddingsCache
+from det.embeddings.cache import EmbeddingsCache, embedding_namespace
 from det.embeddings.generator import (
     EmbeddingGeneratorInterface,
+    OllamaEmbeddingGenerator,
     OpenAIEmbeddingGenerator,
+    SentenceTransformerEmbeddingGenerator,
 )
 
 logger = logging.getLogger(__name__)
@@ -23,6 +25,31 @@ class EmbeddingGeneratorAdapterInterface(ABC):
     def _create_embedding_generator(self) -> EmbeddingGeneratorInterface:
         pass
 
+    def _create_embeddings_cache(
+        self, cache_file_path: str, namespace: str, cache_options: dict = None
+    ) -> EmbeddingsCache:
+        """
+        Creates the cache of the adapter's embeddings.
+
+        Args:
+            cache_file_path (str): The file path to save the cache.
+            namespace (str): The cache namespace of the model's embeddings.
+            cache_options (dict): Options of the EmbeddingsCache: 'backend' ('mmap' or 'sqlite';
+                by default chosen from the cache file's extension), 'max_entries' and 'max_bytes'
+                (the most embeddings and vector bytes to keep), 'eviction' ('lru' or 'lfu',
+                which embeddings to evict beyond the limits) and 'dtype' ('float32', 'float16'
+                or 'int8', how new embeddings are stored).
+
+        Returns:
+            EmbeddingsCache: The cache, generating missing embeddings with the adapter's generator.
+        """
+        return EmbeddingsCache(
+            embeddings_generator=self.embedding_generator,
+            cache_file_path=cache_file_path,
+            namespace=namespace,
+            **(cache_options or {}),
+        )
+
     @abstractmethod
     def generate_embeddings(self, texts: List[str]) -> List[List[float]]:
         pass
@@ -35,6 +62,9 @@ class OpenAIEmbeddingGeneratorAdapter(EmbeddingGeneratorAdapterInterface):
         embedding_generator: EmbeddingGeneratorInterface = None,
         cache_file_path: str = None,
         api_key: str = None,
+        base_url: str = None,
+        dimensions: int = None,
+        cache_options: dict = None,
     ):
         """
         Initializes the OpenAIEmbeddingGeneratorAdapter instance.
@@ -44,19 +74,22 @@ class OpenAIEmbeddingGeneratorAdapter(EmbeddingGeneratorAdapterInterface):
             embedding_generator (EmbeddingGeneratorInterface): The instance of the EmbeddingGeneratorInterface used for generating embeddings.
             cache_file_path (str): The file path to save the cache.
             api_key (str): The API key for accessing OpenAI's API.
+            base_url (str): An alternative OpenAI-compatible endpoint, e.g. `det stub-server`.
+            dimensions (int): Reduce the embeddings to this many dimensions (text-embedding-3 models);
+                part of the cache namespace, so reduced and full-size embeddings never mix.
+            cache_options (dict): Options of the EmbeddingsCache, e.g. {"max_entries": 100000}.
         """
         # Allow passing a specific embedding_generator; otherwise, use the default
         self.embedding_generator = embedding_generator or OpenAIEmbeddingGenerator(
-            model=model, api_key=api_key
+            model=model, api_key=api_key, base_url=base_url, dimensions=dimensions
         )
 
         # Ensure the cache file is created if it doesn't exist
         if cache_file_path and not os.path.exists(cache_file_path):
             open(cache_file_path, "wb").close()
 
-        self.embeddings_cache = EmbeddingsCache(
-            embeddings_generator=self.embedding_generator,
-            cache_file_path=cache_file_path,
+        self.embeddings_cache = self._create_embeddings_cache(
+            cache_file_path, embedding_namespace(model, dimensions), cache_options
         )
         # called after setting the embedding_generator up as the super init will call it
         super().__init__(model)
@@ -87,6 +120,114 @@ class OpenAIEmbeddingGeneratorAdapter(EmbeddingGeneratorAdapterInterface):
             raise Exception(f"API failure: {str(e)}")
 
 
+class OllamaEmbeddingGeneratorAdapter(EmbeddingGeneratorAdapterInterface):
+    def __init__(
+        self,
+        model: str = "nomic-embed-text",
+        embedding_generator: EmbeddingGeneratorInterface = None,
+        cache_file_path: str = None,
+        base_url: str = "http://localhost:11434",
+        batch_size: int = 256,
+        cache_options: dict = None,
+    ):
+        """
+        Initializes the OllamaEmbeddingGeneratorAdapter instance, so a run using Ollama for
+        generation can embed its responses on the same server.
+
+        Args:
+            model (str): The embedding model pulled on the Ollama server.
+            embedding_generator (EmbeddingGeneratorInterface): The instance of the EmbeddingGeneratorInterface used for generating embeddings.
+            cache_file_path (str): The file path to save the cache.
+            base_url (str): The URL of the Ollama server.
+            batch_size (int): The most texts sent in each request.
+            cache_options (dict): Options of the EmbeddingsCache, e.g. {"max_entries": 100000}.
+        """
+        self.embedding_generator = embedding_generator or OllamaEmbeddingGenerator(
+            model=model, host=base_url, batch_size=batch_size
+        )
+
+        self.embeddings_cache = self._create_embeddings_cache(
+            cache_file_path, model, cache_options
+        )
+        super().__init__(model)
+
+    def _create_embedding_generator(self) -> EmbeddingGeneratorInterface:
+        return self.embedding_generator
+
+    def generate_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """
+        Generates embeddings for a list of texts using the EmbeddingsCache and Ollama.
+
+        Args:
+            texts (List[str]): The list of texts to generate embeddings for.
+
+        Returns:
+            List[List[float]]: The generated embeddings.
+        """
+        try:
+            return self.embeddings_cache.generate_embeddings(texts)
+        except Exception as e:
+            logger.error(f"Error generating embeddings: {str(e)}")
+            raise Exception(f"Ollama failure: {str(e)}")
+
+
+class SentenceTransformerEmbeddingGeneratorAdapter(EmbeddingGeneratorAdapterInterface):
+    def __init__(
+        self,
+        model: str = "all-MiniLM-L6-v2",
+        embedding_generator: EmbeddingGeneratorInterface = None,
+        cache_file_path: str = None,
+        batch_size: int = 64,
+        threads: int = None,
+        backend: str = "torch",
+        cache_options: dict = None,
+    ):
+        """
+        Initializes the SentenceTransformerEmbeddingGeneratorAdapter instance, which embeds
+        texts with a local model on the CPU, for air-gapped and high-volume runs.
+
+        Args:
+            model (str): A sentence-transformers model name or a local path to one.
+            embedding_generator (EmbeddingGeneratorInterface): The instance of the EmbeddingGeneratorInterface used for generating embeddings.
+            cache_file_path (str): The file path to save the cache.
+            batch_size (int): The texts encoded in each forward pass.
+            threads (int): The intra-op threads; the backend's default if not given.
+            backend (str): 'torch', or 'onnx' for an ONNX Runtime export of the model.
+            cache_options (dict): Options of the EmbeddingsCache, e.g. {"max_entries": 100000}.
+        """
+        # The model is only loaded, and sentence-transformers only imported, if no generator is given
+        self.embedding_generator = (
+            embedding_generator
+            or SentenceTransformerEmbeddingGenerator(
+                model=model, batch_size=batch_size, threads=threads, backend=backend
+            )
+        )
+
+        self.embeddings_cache = self._create_embeddings_cache(
+            cache_file_path, model, cache_options
+        )
+        super().__init__(model)
+
+    def _create_embedding_generator(self) -> EmbeddingGeneratorInterface:
+        return self.embedding_generator
+
+    def generate_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """
+        Generates embeddings for a list of texts using the EmbeddingsCache and the local model.
+
+        Args:
+            texts (List[str]): The list of texts to generate embeddings for.
+
+        Returns:
+            List[List[float]]: The generated embeddings.
+        """
+        try:
+            return self.embeddings_cache.generate_embeddings(texts)
+        except Exception as e:
+            logger.error(f"Error generating embeddings: {str(e)}")
+            raise Exception(f"Local embedding failure: {str(e)}")
+
+
 class AnotherEmbeddingGeneratorAdapter(EmbeddingGeneratorAdapterInterface):
     def __init__(self, model):
         super().__init__(model)
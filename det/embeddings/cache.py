@@ -21,7 +21,20 @@ Example usage:
     embeddings = embeddings_cache.generate_embeddings(["Hello, world!"])
 
     print(embeddings)
-    # This will automatically save the cache on exit.
+
+The embeddings are kept in a memory-mapped float32 store (see `embeddings/store.py`), so opening
+a large cache only reads its index, new embeddings are appended as they are generated, and cached
+embeddings are returned as zero-copy NumPy views. An existing pickle cache is migrated on first
+use. Entries are keyed by the model name and a SHA-256 digest of the text, so one cache can
+serve several models (or one model at several `dimensions`) without returning another model's
+vectors, and keys stay small however long the texts are. With `max_entries` or `max_bytes`
+set, the least recently (or, with `eviction="lfu"`, least frequently) used embeddings are
+evicted as new ones are added, so a long-lived cache stays bounded; `det cache` shows and
+maintains a cache. A path ending in .sqlite or .db selects the SQLite backend instead. Either
+way, each batch of new embeddings is committed as it arrives and several processes can share one
+cache file. Repeated texts in a batch are looked up and embedded once, and embeddings come back
+in the order of the texts. With `dtype="float16"` or `dtype="int8"` new embeddings are stored
+quantised, at a half or about a quarter of the size.
 
 The module is designed to be flexible, allowing for the easy integration of different embedding
 models by extending the `EmbeddingGenerator` abstract class. The `EmbeddingsCache` class handles
@@ -30,22 +43,64 @@ requests.
 """
 
 import atexit
+import hashlib
 import logging
-import os
-import pickle
-
 
 from det.embeddings.generator import EmbeddingGeneratorInterface
+from det.embeddings.store import EVICTION_POLICIES, open_embedding_store
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_NAMESPACE = "default"
+# Evicting below the limits leaves room for new entries before the next eviction
+EVICTION_HEADROOM = 0.9
+
+
+def embedding_namespace(model: str, dimensions: int = None) -> str:
+    """
+    Returns the cache namespace of a model's embeddings, e.g. 'text-embedding-3-small@256'
+    for vectors reduced to 256 dimensions, so they never mix with full-size ones.
+    """
+    return f"{model}@{dimensions}" if dimensions else model
+
+
+def cache_key(namespace: str, text: str) -> str:
+    """Returns the fixed-size store key of a text, e.g. 'text-embedding-3-large:<sha256>'."""
+    digest = hashlib.sha256(str(text).encode("utf-8")).hexdigest()
+    return f"{namespace}:{digest}"
+
 
 class EmbeddingsCache:
     def __init__(
         self,
         embeddings_generator: EmbeddingGeneratorInterface,
         cache_file_path,
+        backend: str = None,
+        namespace: str = None,
+        max_entries: int = None,
+        max_bytes: int = None,
+        eviction: str = "lru",
+        dtype: str = "float32",
     ):
+        if eviction not in EVICTION_POLICIES:
+            raise ValueError(
+                f"Eviction policy must be one of {EVICTION_POLICIES}, got {eviction}"
+            )
+        self.backend = backend
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.eviction = eviction
+        self.dtype = dtype
+        # Entries of different models share one store without colliding
+        model = getattr(embeddings_generator, "model", None)
+        dimensions = getattr(embeddings_generator, "dimensions", None)
+        self.namespace = namespace or (
+            embedding_namespace(
+                model, dimensions if isinstance(dimensions, int) else None
+            )
+            if isinstance(model, str)
+            else DEFAULT_NAMESPACE
+        )
         self.cache_file_path = (
             cache_file_path if cache_file_path else "embeddings_cache.pkl"
         )
@@ -56,54 +111,66 @@ class EmbeddingsCache:
         atexit.register(self._save_cache)
 
     def _load_cache(self):
-        """Load the cache from a file if it exists, otherwise return an empty dictionary."""
-        logger.debug(f"Attempting to load cache from: {self.cache_file_path}")
-        if os.path.exists(self.cache_file_path):
-            try:
-                with open(self.cache_file_path, "rb") as cache_file:
-                    cache = pickle.load(cache_file)
-                    logger.info(
-                        f"Cache loaded successfully from: {self.cache_file_path}"
-                    )
-
-                    return cache
-            except (EOFError, pickle.UnpicklingError):
-                logger.warning(
-                    f"Cache file exists but is empty: {self.cache_file_path}"
-                )
-                return {}
-        else:
-            logger.info(
-                f"Cache file does not exist: {self.cache_file_path}, creating empty cache file"
-            )
-            with open(self.cache_file_path, "wb") as cache_file:
-                pickle.dump({}, cache_file)  # Initialize with an empty dictionary
-            return {}
+        """Open the vector store, migrating a pickle cache at the same path if there is one."""
+        # A pickle cache has no record of its model, so it is assumed to be this one's
+        return open_embedding_store(
+            self.cache_file_path, self.backend, migrate_key=self.key, dtype=self.dtype
+        )
+
+    def key(self, text: str) -> str:
+        return cache_key(self.namespace, text)
 
     def generate_embeddings(self, texts):
-        """Generate embeddings for a list of texts, using cached results where available."""
-        embeddings_to_return = []
+        """
+        Generate embeddings for a list of texts, using cached results where available.
+
+        Each distinct text is looked up and, on a miss, embedded once; the embeddings are
+        returned in the order of `texts`, repeats included.
+        """
+        keys = [self.key(text) for text in texts]
+        embeddings = {}
         texts_without_embeddings = []
-        for text in texts:
-            if text in self.embeddings_cache and self.embeddings_cache is not None:
-                logger.debug("Cache hit for text.")
-                embeddings_to_return.append(self.embeddings_cache[text])
+        for key, text in dict(zip(keys, texts)).items():
+            embedding = self.embeddings_cache.get(key)
+            if embedding is not None:
+                embeddings[key] = embedding
             else:
-                logger.debug("Cache miss for text.")
                 texts_without_embeddings.append(text)
+        logger.debug(
+            f"Cache hits for {len(embeddings)} and misses for {len(texts_without_embeddings)} distinct texts"
+        )
+        # Recorded before any eviction, so the entries just used are kept; a repeat of a
+        # missed text is served without a call, so it counts as a hit
+        self.embeddings_cache.record_usage(
+            list(embeddings),
+            hits=len(texts) - len(texts_without_embeddings),
+            misses=len(texts_without_embeddings),
+        )
 
         if texts_without_embeddings:
             new_embeddings = self.embeddings_generator.generate_embeddings(
                 texts_without_embeddings
             )
-            for text, embedding in zip(texts_without_embeddings, new_embeddings):
-                self.embeddings_cache[text] = embedding
-                logger.debug("Added new embeddings to cache")
-                embeddings_to_return.append(embedding)
-
-        return embeddings_to_return
+            self.embeddings_cache.put_many(
+                (self.key(text), embedding)
+                for text, embedding in zip(texts_without_embeddings, new_embeddings)
+            )
+            logger.debug("Added new embeddings to cache")
+            # Return the stored float32 views, so hits and misses look the same
+            for text in texts_without_embeddings:
+                key = self.key(text)
+                embeddings[key] = self.embeddings_cache[key]
+            self._enforce_limits()
+
+        return [embeddings[key] for key in keys]
+
+    def _enforce_limits(self):
+        if self.max_entries is None and self.max_bytes is None:
+            return
+        self.embeddings_cache.evict(
+            self.max_entries, self.max_bytes, self.eviction, headroom=EVICTION_HEADROOM
+        )
 
     def _save_cache(self):
-        """Save the current state of the cache to a file."""
-        with open(self.cache_file_path, "wb") as cache_file:
-            pickle.dump(self.embeddings_cache, cache_file)
+        """Flush the store; entries are appended as they are added, so nothing is rewritten."""
+        self.embeddings_cache.close()
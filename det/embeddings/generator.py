@@ -4,9 +4,13 @@ from abc import ABC, abstractmethod
 from typing import List
 import logging
 
+import numpy as np
+from ollama import Client as OllamaClient
 from openai import OpenAI
 import openai
 
+from det.runner import run_iterations
+
 logger = logging.getLogger(__name__)
 
 
@@ -42,28 +46,85 @@ class EmbeddingGenerator(EmbeddingGeneratorInterface):
         raise NotImplementedError("This method should be implemented by subclasses.")
 
 
+class EmbeddingGenerationError(Exception):
+    """Raised when embeddings could not be generated for every text."""
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimates the tokens in a text without a tokenizer, at about four bytes of UTF-8 per
+    token; requests the estimate gets wrong are split and retried.
+    """
+    return len(text.encode("utf-8")) // 4 + 1
+
+
+def _pool(embeddings: List[List[float]], weights: List[int]) -> List[float]:
+    """Averages the embeddings of a text's chunks by chunk length, scaled to unit length."""
+    pooled = np.average(np.asarray(embeddings, dtype=float), axis=0, weights=weights)
+    norm = np.linalg.norm(pooled)
+    return (pooled / norm if norm else pooled).tolist()
+
+
 class OpenAIEmbeddingGenerator(EmbeddingGeneratorInterface):
     """
     Embedding generator using OpenAI's API.
+
+    Texts are sent in batches within the API's limits on inputs and tokens per request, several
+    batches at a time, and the embeddings are returned in the order of the texts. Texts over the
+    model's input limit are embedded in chunks whose embeddings are pooled.
     """
 
-    def __init__(self, model: str = "text-embedding-ada-002", api_key: str = None):
+    def __init__(
+        self,
+        model: str = "text-embedding-ada-002",
+        api_key: str = None,
+        base_url: str = None,
+        dimensions: int = None,
+        max_batch_size: int = 2048,
+        max_batch_tokens: int = 300_000,
+        max_input_tokens: int = 8191,
+        max_concurrency: int = 4,
+    ):
         """
         Initialize the OpenAI embedding generator.
 
         :param model: The model to use for generating embeddings.
         :param api_key: The API key for accessing the OpenAI API.
+        :param base_url: An alternative OpenAI-compatible endpoint, e.g. `det stub-server`.
+        :param dimensions: Reduce the embeddings to this many dimensions; only the
+            text-embedding-3 and later models support it. The model's full size by default.
+        :param max_batch_size: The most texts sent in one request.
+        :param max_batch_tokens: The most (estimated) tokens sent in one request.
+        :param max_input_tokens: The most (estimated) tokens of one text; longer texts are
+            chunked and their chunks' embeddings pooled.
+        :param max_concurrency: The most requests in flight at once.
+        :raises ValueError: If a limit is not positive.
         """
+        if dimensions is not None and dimensions < 1:
+            raise ValueError(f"Dimensions must be positive, got {dimensions}")
+        for name, limit in [
+            ("batch size", max_batch_size),
+            ("batch tokens", max_batch_tokens),
+            ("input tokens", max_input_tokens),
+            ("concurrency", max_concurrency),
+        ]:
+            if limit < 1:
+                raise ValueError(f"Maximum {name} must be positive, got {limit}")
         self.model = model
-        self._instantiate_openai_client(api_key)
+        self.dimensions = dimensions
+        self.max_batch_size = max_batch_size
+        self.max_batch_tokens = max_batch_tokens
+        self.max_input_tokens = max_input_tokens
+        self.max_concurrency = max_concurrency
+        self._instantiate_openai_client(api_key, base_url)
 
-    def _instantiate_openai_client(self, api_key: str):
+    def _instantiate_openai_client(self, api_key: str, base_url: str = None):
         try:
             if api_key:
-                self.client = OpenAI(api_key=api_key)
+                self.client = OpenAI(api_key=api_key, base_url=base_url)
                 logger.info("OpenAI client instantiated successfully using api_key.")
             else:
-                self.client = OpenAI()
+                self.client = OpenAI(base_url=base_url)
                 logger.info("OpenAI client instantiated successfully without api_key.")
             self.client.models.list()
         except openai.APIConnectionError as e:
@@ -81,19 +142,238 @@ class OpenAIEmbeddingGenerator(EmbeddingGeneratorInterface):
             logger.error(f"Error instantiating OpenAI client: {str(e)}")
             self.client = None
 
+    def _chunk(self, text: str) -> List[str]:
+        """Splits a text into chunks of at most `max_input_tokens` estimated tokens."""
+        chunks = -(-estimate_tokens(text) // self.max_input_tokens)
+        if chunks <= 1:
+            return [text]
+        size = -(-len(text) // chunks)
+        return [text[start : start + size] for start in range(0, len(text), size)]
+
+    def _batches(self, pieces: List[str]) -> List[List[str]]:
+        """Groups the pieces, in order, into requests within the item and token limits."""
+        batches = [[]]
+        tokens = 0
+        for piece in pieces:
+            piece_tokens = estimate_tokens(piece)
+            if batches[-1] and (
+                len(batches[-1]) == self.max_batch_size
+                or tokens + piece_tokens > self.max_batch_tokens
+            ):
+                batches.append([])
+                tokens = 0
+            batches[-1].append(piece)
+            tokens += piece_tokens
+        return batches
+
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        try:
+            # Older models reject the parameter, so it is only sent when set
+            options = {"dimensions": self.dimensions} if self.dimensions else {}
+            response = self.client.embeddings.create(
+                input=texts, model=self.model, **options
+            )
+        except openai.BadRequestError as e:
+            # The estimate was too low: split the batch, or the text, and try again
+            if "token" not in str(e).lower() or (len(texts) == 1 and len(texts[0]) < 2):
+                raise
+            if len(texts) > 1:
+                middle = len(texts) // 2
+                return self._embed_batch(texts[:middle]) + self._embed_batch(
+                    texts[middle:]
+                )
+            middle = len(texts[0]) // 2
+            halves = [texts[0][:middle], texts[0][middle:]]
+            logger.debug(f"Splitting a text of {len(texts[0])} characters to embed it")
+            return [_pool(self._embed_batch(halves), [len(half) for half in halves])]
+        data = sorted(response.data, key=lambda embedding: embedding.index)
+        if len(data) != len(texts):
+            raise EmbeddingGenerationError(
+                f"Expected {len(texts)} embeddings, got {len(data)}"
+            )
+        return [embedding.embedding for embedding in data]
+
     def generate_embeddings(self, texts: List[str]) -> List[List[float]]:
         """
         Generate embeddings using OpenAI's API.
 
         :param texts: A list of strings for which to generate embeddings.
-        :return: A list of embeddings.
+        :return: A list of embeddings, one per text, in the order of the texts.
+        :raises EmbeddingGenerationError: If any request fails.
         """
+        if not texts:
+            return []
+        # Over-length texts become several pieces, remembering which text each came from
+        pieces, owners = [], []
+        for i, text in enumerate(texts):
+            for chunk in self._chunk(text):
+                pieces.append(chunk)
+                owners.append(i)
+        batches = self._batches(pieces)
         try:
-            response = self.client.embeddings.create(input=texts, model=self.model)
-            return [embedding.embedding for embedding in response.data]
+            results = run_iterations(
+                lambda i: self._embed_batch(batches[i]),
+                len(batches),
+                concurrency=self.max_concurrency,
+            )
         except Exception as e:
             logger.error(f"Error generating embeddings: {str(e)}")
+            raise EmbeddingGenerationError(str(e)) from e
+        embeddings = [embedding for batch in results for embedding in batch]
+
+        chunks = [[] for _ in texts]
+        for owner, piece, embedding in zip(owners, pieces, embeddings):
+            chunks[owner].append((piece, embedding))
+        return [
+            (
+                chunk[0][1]
+                if len(chunk) == 1
+                else _pool(
+                    [embedding for _, embedding in chunk],
+                    [len(piece) for piece, _ in chunk],
+                )
+            )
+            for chunk in chunks
+        ]
+
+
+class OllamaEmbeddingGenerator(EmbeddingGeneratorInterface):
+    """
+    Embedding generator using a local Ollama server's batched embed endpoint, or one request
+    per text with ollama clients older than 0.3, which lack it.
+    """
+
+    def __init__(
+        self,
+        model: str = "nomic-embed-text",
+        host: str = "http://localhost:11434",
+        batch_size: int = 256,
+        keep_alive: str = "5m",
+    ):
+        """
+        Initialize the Ollama embedding generator.
+
+        :param model: The embedding model pulled on the Ollama server.
+        :param host: The URL of the Ollama server.
+        :param batch_size: The most texts sent in each request.
+        :param keep_alive: How long the server keeps the model loaded between requests.
+        :raises ValueError: If the batch size is not positive.
+        """
+        if batch_size < 1:
+            raise ValueError(f"Batch size must be positive, got {batch_size}")
+        self.model = model
+        self.batch_size = batch_size
+        self.keep_alive = keep_alive
+        # One client, and so one pooled HTTP connection, for every request
+        self.client = OllamaClient(host=host)
+
+    def generate_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """
+        Generate embeddings with Ollama, `batch_size` texts per request.
+
+        :param texts: A list of strings for which to generate embeddings.
+        :return: A list of embeddings.
+        :raises Exception: If a request fails.
+        """
+        embeddings = []
+        for start in range(0, len(texts), self.batch_size):
+            try:
+                embeddings.extend(
+                    self._embed_batch(texts[start : start + self.batch_size])
+                )
+            except Exception as e:
+                logger.error(f"Error generating embeddings: {str(e)}")
+                raise
+        return embeddings
+
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        # The batched endpoint arrived in ollama 0.3; older clients embed one text per request
+        if not hasattr(self.client, "embed"):
+            return [
+                self.client.embeddings(
+                    model=self.model, prompt=text, keep_alive=self.keep_alive
+                )["embedding"]
+                for text in texts
+            ]
+        response = self.client.embed(
+            model=self.model, input=list(texts), keep_alive=self.keep_alive
+        )
+        return response["embeddings"]
+
+
+class SentenceTransformerEmbeddingGenerator(EmbeddingGeneratorInterface):
+    """
+    Embedding generator running a sentence-transformers model locally on the CPU, so no text
+    leaves the machine and no call costs a network round trip.
+
+    The `sentence-transformers` package is optional and only imported when this generator is
+    created; it is installed, with ONNX Runtime for the ONNX backend, by `pip install "det[local]"`.
+    """
+
+    def __init__(
+        self,
+        model: str = "all-MiniLM-L6-v2",
+        batch_size: int = 64,
+        threads: int = None,
+        backend: str = "torch",
+        device: str = "cpu",
+    ):
+        """
+        Initialize the local embedding generator, loading the model once.
+
+        :param model: A sentence-transformers model name or a local path to one.
+        :param batch_size: The texts encoded in each forward pass.
+        :param threads: The intra-op threads of the backend; the backend's default, about one per
+            core, if not given.
+        :param backend: 'torch', or 'onnx' for an ONNX Runtime export of the model.
+        :param device: The device to run the model on.
+        :raises ImportError: If sentence-transformers is not installed.
+        """
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError as e:
+            raise ImportError(
+                'Local embeddings need sentence-transformers: pip install "det[local]"'
+            ) from e
+        self.model = model
+        self.batch_size = batch_size
+        model_kwargs = {}
+        if backend != "torch":
+            model_kwargs["backend"] = backend
+        if threads and backend == "onnx":
+            import onnxruntime
+
+            # The ONNX session has its own thread pool, configured per model
+            session_options = onnxruntime.SessionOptions()
+            session_options.intra_op_num_threads = threads
+            model_kwargs["model_kwargs"] = {"session_options": session_options}
+        elif threads:
+            import torch
+
+            # torch's thread count is process-wide, so it is only changed when asked for
+            torch.set_num_threads(threads)
+        self.client = SentenceTransformer(model, device=device, **model_kwargs)
+        logger.info(
+            f"Loaded local embedding model {model} with the {backend} backend"
+            + (f" on {threads} threads" if threads else "")
+        )
+
+    def generate_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """
+        Generate embeddings with the local model, `batch_size` texts at a time.
+
+        :param texts: A list of strings for which to generate embeddings.
+        :return: A list of float32 embeddings.
+        """
+        if not texts:
             return []
+        embeddings = self.client.encode(
+            list(texts),
+            batch_size=self.batch_size,
+            convert_to_numpy=True,
+            show_progress_bar=False,
+        )
+        return list(embeddings)
 
 
 class AnotherEmbeddingGenerator(EmbeddingGeneratorInterface):
@@ -0,0 +1,843 @@
+"""
+Embedding Store Module
+
+# embeddings/store.py
+
+This module provides the on-disk stores behind `EmbeddingsCache`. The original cache was a pickled
+dict of Python float lists that was loaded whole at start-up and rewritten whole at exit; with
+hundreds of thousands of 1536-d vectors both steps take seconds and the float lists use about 8x
+the memory of float32.
+
+`MmapEmbeddingStore` instead keeps the vectors in one contiguous float32 file that is memory
+mapped, plus a small append-only index of key to offset. Start-up only reads the index, new
+entries are appended to both files, and lookups return zero-copy NumPy views into the mapping.
+`SQLiteEmbeddingStore` keeps them as float32 blobs in a SQLite database in WAL mode.
+
+Both stores commit each batch of new embeddings as it arrives, so a killed process loses nothing
+it had already embedded, and both can be shared by many `det` processes at once: appends to the
+mmap store are serialised with an advisory file lock and each process picks up the others'
+entries on a miss, while SQLite does its own locking.
+
+Example usage:
+
+    from det.embeddings.store import open_embedding_store
+
+    store = open_embedding_store("embeddings_cache.pkl")  # or "embeddings_cache.sqlite"
+    store.put_many([("Hello, world!", [0.1, 0.2, 0.3])])
+
+    vector = store["Hello, world!"]  # a read-only float32 view, no copy
+    print("Hello, world!" in store, len(store))
+
+Key Features:
+    - The index (at the given path) is JSON lines of key, offset, dimension and, for quantised
+        vectors, their encoding; the vectors live next to it in `<path>.f32`. Vectors of
+        different dimensions can share a store.
+    - Writes append the vectors before the index entries, so a crash leaves at most some
+        unreferenced bytes, never an entry pointing at missing data.
+    - A legacy pickle cache at the path is migrated on first open and kept as `<path>.bak`.
+    - `open_embedding_store` picks the SQLite backend for .sqlite, .sqlite3 and .db paths.
+    - Each store tracks when and how often its entries are used (buffered in memory and written
+        on `flush`) so `evict` can bound it by entries or bytes with an LRU or LFU policy.
+        Evicted space in the mmap store is reclaimed by `compact`, which runs automatically once
+        more than half the data file is dead.
+    - `stats` reports entries, bytes, hit rate and a per-model breakdown, and `copy_entries`
+        exports to or imports from another store.
+    - With `dtype="float16"` or `dtype="int8"` new vectors are quantised as they are written, to
+        a half or about a quarter of the float32 size, and dequantised to float32 on read. Cosine
+        similarities move by at most around 1e-4 (float16) or 1e-3 (int8), well below the
+        differences between responses; see `benchmarks/quantisation.py`. Each entry records its encoding, so one store can mix them.
+"""
+
+import json
+import logging
+import mmap
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows; appends are then only safe within one process
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+DTYPE = np.dtype(np.float32)
+# How vectors are encoded on disk: as float32, as float16, or as int8 with a float32 scale
+STORE_DTYPES = ("float32", "float16", "int8")
+_PICKLE_MAGIC = b"\x80"
+_TOMBSTONE = -1
+
+EVICTION_POLICIES = ("lru", "lfu")
+
+
+def namespace_of(key: str) -> str:
+    """Returns the namespace (model) of a cache key, '' for keys without one."""
+    return key.rsplit(":", 1)[0] if ":" in key else ""
+
+
+class EmbeddingStore(ABC):
+    """
+    A persistent mapping of cache keys to embedding vectors.
+    """
+
+    def __init__(self):
+        # Usage is buffered so lookups never write; it is persisted by `flush`
+        self._pending_usage: Dict[str, list] = {}
+        self._pending_counters = {"hits": 0, "misses": 0}
+        self._usage_lock = threading.Lock()
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[np.ndarray]:
+        """Returns the vector stored under the key, or None."""
+
+    @abstractmethod
+    def put_many(self, items: Iterable[Tuple[str, List[float]]]):
+        """Stores several (key, vector) pairs in one write."""
+
+    @abstractmethod
+    def delete_many(self, keys: Iterable[str]):
+        """Removes the entries of the keys."""
+
+    @abstractmethod
+    def keys(self) -> Iterator[str]:
+        pass
+
+    @abstractmethod
+    def sizes(self) -> Dict[str, int]:
+        """Returns the size in bytes of every entry's vector."""
+
+    @abstractmethod
+    def __len__(self) -> int:
+        pass
+
+    @abstractmethod
+    def _read_usage(self) -> Tuple[Dict[str, list], Dict[str, int]]:
+        """Returns the persisted [last used, uses] per key and the hit and miss counters."""
+
+    @abstractmethod
+    def _write_usage(self, usage: Dict[str, list], counters: Dict[str, int]):
+        """Persists usage and counter increments."""
+
+    def compact(self):
+        """Reclaims the space of deleted entries."""
+
+    def disk_bytes(self) -> int:
+        """Returns the bytes the store occupies on disk."""
+        return 0
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+
+    def __getitem__(self, key: str) -> np.ndarray:
+        vector = self.get(key)
+        if vector is None:
+            raise KeyError(key)
+        return vector
+
+    def __setitem__(self, key: str, vector: List[float]):
+        self.put_many([(key, vector)])
+
+    def record_usage(self, keys: Iterable[str], hits: int = 0, misses: int = 0):
+        """Marks the keys as used now and counts cache hits and misses."""
+        now = time.time()
+        with self._usage_lock:
+            for key in keys:
+                entry = self._pending_usage.setdefault(key, [now, 0])
+                entry[0] = now
+                entry[1] += 1
+            self._pending_counters["hits"] += hits
+            self._pending_counters["misses"] += misses
+
+    def usage(self) -> Tuple[Dict[str, list], Dict[str, int]]:
+        """Returns [last used, uses] per key and the hit and miss counters, including unflushed ones."""
+        usage, counters = self._read_usage()
+        with self._usage_lock:
+            for key, (last_used, uses) in self._pending_usage.items():
+                entry = usage.setdefault(key, [0.0, 0])
+                entry[0] = max(entry[0], last_used)
+                entry[1] += uses
+            counters = {
+                name: counters.get(name, 0) + value
+                for name, value in self._pending_counters.items()
+            }
+        return usage, counters
+
+    def flush(self):
+        """Persists the buffered usage; entries themselves are written through."""
+        with self._usage_lock:
+            usage, self._pending_usage = self._pending_usage, {}
+            counters = self._pending_counters
+            self._pending_counters = {"hits": 0, "misses": 0}
+        if usage or any(counters.values()):
+            self._write_usage(usage, counters)
+
+    def close(self):
+        self.flush()
+
+    def reclaimable_bytes(self) -> int:
+        """Returns the bytes `compact` would free."""
+        return 0
+
+    def evict(
+        self,
+        max_entries: int = None,
+        max_bytes: int = None,
+        policy: str = "lru",
+        headroom: float = 1.0,
+    ) -> int:
+        """
+        Evicts the least recently (LRU) or least frequently (LFU) used entries until the store
+        is back within the limits.
+
+        :param max_entries: The most entries to keep.
+        :param max_bytes: The most vector bytes to keep.
+        :param policy: 'lru' or 'lfu'.
+        :param headroom: The share of the limits to evict down to once they are exceeded, e.g.
+            0.9 leaves room for new entries before the next eviction; 1 evicts to the limits.
+        :return: The number of evicted entries.
+        :raises ValueError: If the policy is unknown.
+        """
+        if policy not in EVICTION_POLICIES:
+            raise ValueError(
+                f"Eviction policy must be one of {EVICTION_POLICIES}, got {policy}"
+            )
+        sizes = self.sizes()
+        total = sum(sizes.values())
+        if (max_entries is None or len(sizes) <= max_entries) and (
+            max_bytes is None or total <= max_bytes
+        ):
+            return 0
+        keep_entries = int(max_entries * headroom) if max_entries is not None else None
+        keep_bytes = int(max_bytes * headroom) if max_bytes is not None else None
+        usage, _ = self.usage()
+
+        def rank(key):
+            last_used, uses = usage.get(key, (0.0, 0))
+            return (last_used, uses) if policy == "lru" else (uses, last_used)
+
+        victims = []
+        entries = len(sizes)
+        for key in sorted(sizes, key=rank):
+            if (keep_entries is None or entries <= keep_entries) and (
+                keep_bytes is None or total <= keep_bytes
+            ):
+                break
+            victims.append(key)
+            entries -= 1
+            total -= sizes[key]
+        self.delete_many(victims)
+        logger.info(f"Evicted {len(victims)} embeddings ({policy}) from: {self.path}")
+        if self.reclaimable_bytes() > total:
+            self.compact()
+        return len(victims)
+
+    def stats(self) -> dict:
+        """Returns entries, bytes, hit rate and a per-model breakdown of the store."""
+        sizes = self.sizes()
+        usage, counters = self.usage()
+        lookups = counters["hits"] + counters["misses"]
+        models = {}
+        for key, size in sizes.items():
+            model = models.setdefault(
+                namespace_of(key), {"entries": 0, "bytes": 0, "uses": 0}
+            )
+            model["entries"] += 1
+            model["bytes"] += size
+            model["uses"] += usage.get(key, (0.0, 0))[1]
+        return {
+            "entries": len(sizes),
+            "bytes": sum(sizes.values()),
+            "disk_bytes": self.disk_bytes(),
+            "reclaimable_bytes": self.reclaimable_bytes(),
+            "hits": counters["hits"],
+            "misses": counters["misses"],
+            "hit_rate": counters["hits"] / lookups if lookups else None,
+            "models": models,
+        }
+
+
+def is_legacy_pickle(path: str) -> bool:
+    """True if the file is a pickle cache written by older versions."""
+    with open(path, "rb") as f:
+        return f.read(1) == _PICKLE_MAGIC
+
+
+def read_legacy_pickle(path: str) -> dict:
+    """Returns the text to embedding dict of a pickle cache, empty if the file is empty."""
+    try:
+        with open(path, "rb") as cache_file:
+            return pickle.load(cache_file)
+    except (EOFError, pickle.UnpicklingError):
+        return {}
+
+
+@contextmanager
+def _file_lock(path: str, shared: bool = False):
+    """Holds an advisory lock on `path` across processes, where supported."""
+    with open(path, "a") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+def encoded_size(dim: int, dtype: str) -> int:
+    """Returns the bytes of a vector of `dim` values encoded as `dtype`."""
+    if dtype == "float16":
+        return dim * 2
+    if dtype == "int8":
+        return DTYPE.itemsize + dim
+    return dim * DTYPE.itemsize
+
+
+def quantise(vector: np.ndarray, dtype: str) -> bytes:
+    """
+    Encodes a float32 vector as `dtype`. int8 vectors are scaled so that their largest
+    magnitude is 127, and the scale is stored in front of them.
+    """
+    if dtype == "float16":
+        return vector.astype(np.float16).tobytes()
+    if dtype == "int8":
+        peak = float(np.abs(vector).max()) if len(vector) else 0.0
+        scale = np.float32(peak / 127 if peak else 1.0)
+        return scale.tobytes() + np.rint(vector / scale).astype(np.int8).tobytes()
+    return vector.tobytes()
+
+
+def dequantise(buffer, dim: int, dtype: str, offset: int = 0) -> np.ndarray:
+    """
+    Decodes a vector written by `quantise` from `buffer` at byte `offset`. float32 vectors are
+    returned as zero-copy views, the others as new float32 arrays.
+    """
+    if dtype == "float16":
+        return np.frombuffer(buffer, np.float16, dim, offset).astype(DTYPE)
+    if dtype == "int8":
+        scale = np.frombuffer(buffer, DTYPE, 1, offset)[0]
+        values = np.frombuffer(buffer, np.int8, dim, offset + DTYPE.itemsize)
+        return values.astype(DTYPE) * scale
+    return np.frombuffer(buffer, DTYPE, dim, offset)
+
+
+def _check_dtype(dtype: str):
+    if dtype not in STORE_DTYPES:
+        raise ValueError(f"Store dtype must be one of {STORE_DTYPES}, got {dtype}")
+
+
+def _as_vectors(items) -> List[Tuple[str, np.ndarray]]:
+    return [
+        (key, np.ascontiguousarray(vector, dtype=DTYPE).ravel())
+        for key, vector in items
+    ]
+
+
+def _words(dim: int, dtype: str) -> int:
+    """Returns the float32 words a vector occupies in the mmap data file."""
+    return -(-encoded_size(dim, dtype) // DTYPE.itemsize)
+
+
+def _index_entry(key: str, offset: int, dim: int, dtype: str) -> tuple:
+    # float32 entries keep the original three fields, so older versions can read them
+    return (key, offset, dim) if dtype == "float32" else (key, offset, dim, dtype)
+
+
+class MmapEmbeddingStore(EmbeddingStore):
+    """
+    Vectors in a memory-mapped float32 file, located through an append-only key index.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        migrate_key: Callable[[str], str] = None,
+        dtype: str = "float32",
+    ):
+        """
+        :param path: The index file; the vectors are stored in `<path>.f32` and the usage log
+            in `<path>.usage`.
+        :param migrate_key: Maps the keys of a legacy pickle cache onto store keys.
+        :param dtype: How new vectors are encoded: 'float32', 'float16' or 'int8'.
+        :raises ValueError: If the dtype is unknown.
+        """
+        _check_dtype(dtype)
+        super().__init__()
+        self.path = path
+        self.dtype = dtype
+        self.data_path = f"{path}.f32"
+        self.usage_path = f"{path}.usage"
+        self.lock_path = f"{path}.lock"
+        self._index = {}
+        self._index_position = 0
+        self._index_inode = None
+        self._mmap = None
+        self._mapped_size = 0
+        self._lock = threading.Lock()
+        with self._lock, _file_lock(self.lock_path):
+            legacy = None
+            if os.path.exists(path) and is_legacy_pickle(path):
+                legacy = self._read_legacy_pickle()
+            if not os.path.exists(path):
+                open(path, "a").close()
+            self._read_index()
+            if legacy:
+                migrate_key = migrate_key or (lambda key: key)
+                self._append(
+                    _as_vectors(
+                        (migrate_key(key), vector) for key, vector in legacy.items()
+                    )
+                )
+                logger.info(f"Migrated {len(legacy)} embeddings from the pickle cache")
+        logger.info(f"Loaded {len(self._index)} embeddings from: {self.path}")
+
+    def _read_legacy_pickle(self) -> dict:
+        legacy = read_legacy_pickle(self.path)
+        backup_path = f"{self.path}.bak"
+        os.replace(self.path, backup_path)
+        logger.info(f"Moved the pickle cache to: {backup_path}")
+        return legacy
+
+    def _index_changed(self) -> bool:
+        status = os.stat(self.path)
+        return (
+            status.st_ino != self._index_inode or status.st_size > self._index_position
+        )
+
+    def _read_index(self):
+        """
+        Reads the index entries appended since the last read, by this or other processes.
+        The caller holds the file lock, so a compaction cannot swap the files mid-read.
+        """
+        status = os.stat(self.path)
+        if status.st_ino != self._index_inode:
+            # Compacted (by any process) since it was read; start again on the new files
+            self._index = {}
+            self._index_position = 0
+            self._index_inode = status.st_ino
+            self._mmap = None
+            self._mapped_size = 0
+        if status.st_size <= self._index_position:
+            return
+        data_size = (
+            os.path.getsize(self.data_path) if os.path.exists(self.data_path) else 0
+        )
+        with open(self.path, "rb") as index_file:
+            index_file.seek(self._index_position)
+            chunk = index_file.read()
+        # A line still being written by another process is read next time
+        chunk = chunk[: chunk.rfind(b"\n") + 1]
+        self._index_position += len(chunk)
+        for line in chunk.splitlines():
+            if not line.strip():
+                continue
+            try:
+                # Entries of quantised vectors carry their encoding
+                key, offset, dim, *encoding = json.loads(line)
+            except ValueError:
+                logger.warning(f"Skipping a corrupt index entry in: {self.path}")
+                continue
+            dtype = encoding[0] if encoding else "float32"
+            if offset == _TOMBSTONE:
+                self._index.pop(key, None)
+            # An entry whose vector was never fully written is ignored
+            elif (offset + _words(dim, dtype)) * DTYPE.itemsize <= data_size:
+                self._index[key] = (offset, dim, dtype)
+
+    def _refresh(self):
+        if self._index_changed():
+            with _file_lock(self.lock_path, shared=True):
+                self._read_index()
+
+    def _view(self, offset: int, dim: int, dtype: str) -> np.ndarray:
+        return dequantise(self._mmap, dim, dtype, offset * DTYPE.itemsize)
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        with self._lock:
+            location = self._index.get(key)
+            if location is None:
+                # Another process may have added it since
+                self._refresh()
+                location = self._index.get(key)
+                if location is None:
+                    return None
+            offset, dim, dtype = location
+            if (offset + _words(dim, dtype)) * DTYPE.itemsize > self._mapped_size:
+                # The file has grown since it was mapped; existing views keep the old
+                # mapping alive. The lock keeps a compaction from swapping the file meanwhile.
+                with _file_lock(self.lock_path, shared=True):
+                    self._read_index()
+                    location = self._index.get(key)
+                    if location is None:
+                        return None
+                    with open(self.data_path, "rb") as data_file:
+                        self._mmap = mmap.mmap(
+                            data_file.fileno(), 0, access=mmap.ACCESS_READ
+                        )
+                    self._mapped_size = len(self._mmap)
+                offset, dim, dtype = location
+            return self._view(offset, dim, dtype)
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            if key not in self._index:
+                self._refresh()
+            return key in self._index
+
+    def put_many(self, items: Iterable[Tuple[str, List[float]]]):
+        vectors = _as_vectors(items)
+        if not vectors:
+            return
+        with self._lock, _file_lock(self.lock_path):
+            self._read_index()
+            self._append(vectors)
+        self.record_usage(key for key, _ in vectors)
+
+    def _append(self, vectors: List[Tuple[str, np.ndarray]]):
+        # Called holding the file lock, so no other process appends in between
+        with open(self.data_path, "ab") as data_file:
+            # Realign after a write that was cut short
+            data_file.write(b"\0" * (-data_file.tell() % DTYPE.itemsize))
+            offset = data_file.tell() // DTYPE.itemsize
+            entries = []
+            for key, vector in vectors:
+                words = _words(len(vector), self.dtype)
+                data = quantise(vector, self.dtype)
+                # Every vector starts on a 4-byte boundary, so offsets count float32 words
+                data_file.write(data + b"\0" * (words * DTYPE.itemsize - len(data)))
+                entries.append(_index_entry(key, offset, len(vector), self.dtype))
+                offset += words
+        self._append_index(entries)
+
+    def _append_index(self, entries: List[tuple]):
+        with open(self.path, "ab") as index_file:
+            index_file.write(
+                "".join(json.dumps(entry) + "\n" for entry in entries).encode("utf-8")
+            )
+        self._read_index()
+
+    def delete_many(self, keys: Iterable[str]):
+        keys = list(keys)
+        if not keys:
+            return
+        with self._lock, _file_lock(self.lock_path):
+            self._read_index()
+            self._append_index(
+                [(key, _TOMBSTONE, 0) for key in keys if key in self._index]
+            )
+
+    def keys(self) -> Iterator[str]:
+        with self._lock:
+            self._refresh()
+            return iter(list(self._index))
+
+    def sizes(self) -> Dict[str, int]:
+        with self._lock:
+            self._refresh()
+            return {
+                key: _words(dim, dtype) * DTYPE.itemsize
+                for key, (_, dim, dtype) in self._index.items()
+            }
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._refresh()
+            return len(self._index)
+
+    def _read_usage(self) -> Tuple[Dict[str, list], Dict[str, int]]:
+        usage = {}
+        counters = {"hits": 0, "misses": 0}
+        if not os.path.exists(self.usage_path):
+            return usage, counters
+        with open(self.usage_path, "r", encoding="utf-8") as usage_file:
+            for line in usage_file:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(record, dict):
+                    for name in counters:
+                        counters[name] += record.get(name, 0)
+                    continue
+                key, last_used, uses = record
+                entry = usage.setdefault(key, [0.0, 0])
+                entry[0] = max(entry[0], last_used)
+                entry[1] += uses
+        return usage, counters
+
+    def _write_usage(self, usage: Dict[str, list], counters: Dict[str, int]):
+        lines = [
+            json.dumps([key, last_used, uses])
+            for key, (last_used, uses) in usage.items()
+        ]
+        lines.append(json.dumps(counters))
+        # Usage is an append-only log too, so writing it costs only what was used
+        with self._lock, _file_lock(self.lock_path):
+            with open(self.usage_path, "a", encoding="utf-8") as usage_file:
+                usage_file.write("".join(line + "\n" for line in lines))
+
+    def disk_bytes(self) -> int:
+        return sum(
+            os.path.getsize(path)
+            for path in (self.path, self.data_path, self.usage_path)
+            if os.path.exists(path)
+        )
+
+    def reclaimable_bytes(self) -> int:
+        if not os.path.exists(self.data_path):
+            return 0
+        return os.path.getsize(self.data_path) - sum(self.sizes().values())
+
+    def compact(self):
+        """
+        Rewrites the data file, index and usage log without deleted or superseded entries.
+        Views handed out earlier stay valid; they keep the old data file mapped.
+        """
+        self.flush()
+        with self._lock, _file_lock(self.lock_path):
+            self._read_index()
+            usage, counters = self._read_usage()
+            self._ensure_mapped()
+            entries = []
+            with open(f"{self.data_path}.tmp", "wb") as data_file:
+                offset = 0
+                for key, (old_offset, dim, dtype) in self._index.items():
+                    # The encoded bytes are copied as they are, never re-quantised
+                    start = old_offset * DTYPE.itemsize
+                    words = _words(dim, dtype)
+                    data_file.write(self._mmap[start : start + words * DTYPE.itemsize])
+                    entries.append(_index_entry(key, offset, dim, dtype))
+                    offset += words
+            with open(f"{self.path}.tmp", "wb") as index_file:
+                index_file.write(
+                    "".join(json.dumps(entry) + "\n" for entry in entries).encode(
+                        "utf-8"
+                    )
+                )
+            with open(f"{self.usage_path}.tmp", "w", encoding="utf-8") as usage_file:
+                usage_file.write(
+                    "".join(
+                        json.dumps([key, *usage[key]]) + "\n"
+                        for key in self._index
+                        if key in usage
+                    )
+                    + json.dumps(counters)
+                    + "\n"
+                )
+            # The data file goes first; readers take the lock, so they never see a mix
+            os.replace(f"{self.data_path}.tmp", self.data_path)
+            os.replace(f"{self.usage_path}.tmp", self.usage_path)
+            os.replace(f"{self.path}.tmp", self.path)
+            self._read_index()
+        logger.info(f"Compacted {len(entries)} embeddings in: {self.path}")
+
+    def _ensure_mapped(self):
+        if os.path.exists(self.data_path) and os.path.getsize(self.data_path):
+            with open(self.data_path, "rb") as data_file:
+                self._mmap = mmap.mmap(data_file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._mapped_size = len(self._mmap)
+
+
+class SQLiteEmbeddingStore(EmbeddingStore):
+    """
+    Vectors as float32 blobs in a SQLite database in WAL mode.
+    """
+
+    def __init__(self, path: str, timeout: float = 30.0, dtype: str = "float32"):
+        """
+        :param path: The database file.
+        :param timeout: Seconds to wait for another process's write to finish.
+        :param dtype: How new vectors are encoded: 'float32', 'float16' or 'int8'.
+        :raises ValueError: If the dtype is unknown.
+        """
+        _check_dtype(dtype)
+        super().__init__()
+        self.path = path
+        self.dtype = dtype
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            path, timeout=timeout, check_same_thread=False, isolation_level=None
+        )
+        # WAL lets readers in every process run alongside the single writer
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings "
+            "(key TEXT PRIMARY KEY, dim INTEGER NOT NULL, vector BLOB NOT NULL, "
+            "last_used REAL NOT NULL DEFAULT 0, uses INTEGER NOT NULL DEFAULT 0)"
+        )
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)"
+        )
+        columns = [
+            row[1] for row in self._connection.execute("PRAGMA table_info(embeddings)")
+        ]
+        if "dtype" not in columns:
+            # Databases from before quantisation hold only float32 vectors
+            self._connection.execute(
+                "ALTER TABLE embeddings ADD COLUMN dtype TEXT NOT NULL DEFAULT 'float32'"
+            )
+        logger.info(f"Opened {len(self)} embeddings from: {self.path}")
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT vector, dim, dtype FROM embeddings WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        return dequantise(*row)
+
+    def put_many(self, items: Iterable[Tuple[str, List[float]]]):
+        now = time.time()
+        rows = [
+            (key, len(vector), quantise(vector, self.dtype), self.dtype, now)
+            for key, vector in _as_vectors(items)
+        ]
+        if not rows:
+            return
+        with self._lock:
+            # One transaction per batch, committed as soon as it is written
+            with self._connection:
+                self._connection.execute("BEGIN IMMEDIATE")
+                self._connection.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, dim, vector, dtype, last_used, uses) "
+                    "VALUES (?, ?, ?, ?, ?, 1)",
+                    rows,
+                )
+
+    def delete_many(self, keys: Iterable[str]):
+        with self._lock:
+            with self._connection:
+                self._connection.execute("BEGIN IMMEDIATE")
+                self._connection.executemany(
+                    "DELETE FROM embeddings WHERE key = ?", ((key,) for key in keys)
+                )
+
+    def keys(self) -> Iterator[str]:
+        with self._lock:
+            rows = self._connection.execute("SELECT key FROM embeddings").fetchall()
+        return (row[0] for row in rows)
+
+    def sizes(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT key, length(vector) FROM embeddings"
+            ).fetchall()
+        return dict(rows)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection.execute(
+                "SELECT COUNT(*) FROM embeddings"
+            ).fetchone()[0]
+
+    def _read_usage(self) -> Tuple[Dict[str, list], Dict[str, int]]:
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT key, last_used, uses FROM embeddings"
+            ).fetchall()
+            counters = dict(
+                self._connection.execute("SELECT name, value FROM counters").fetchall()
+            )
+        return (
+            {key: [last_used, uses] for key, last_used, uses in rows},
+            {"hits": counters.get("hits", 0), "misses": counters.get("misses", 0)},
+        )
+
+    def _write_usage(self, usage: Dict[str, list], counters: Dict[str, int]):
+        with self._lock:
+            with self._connection:
+                self._connection.execute("BEGIN IMMEDIATE")
+                self._connection.executemany(
+                    "UPDATE embeddings SET last_used = MAX(last_used, ?), uses = uses + ? "
+                    "WHERE key = ?",
+                    (
+                        (last_used, uses, key)
+                        for key, (last_used, uses) in usage.items()
+                    ),
+                )
+                self._connection.executemany(
+                    "INSERT INTO counters (name, value) VALUES (?, ?) "
+                    "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+                    counters.items(),
+                )
+
+    def disk_bytes(self) -> int:
+        return sum(
+            os.path.getsize(path)
+            for path in (self.path, f"{self.path}-wal")
+            if os.path.exists(path)
+        )
+
+    def compact(self):
+        self.flush()
+        with self._lock:
+            self._connection.execute("VACUUM")
+            self._connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            self._connection.close()
+
+
+def copy_entries(
+    source: EmbeddingStore, destination: EmbeddingStore, namespace: str = None
+) -> int:
+    """
+    Copies the entries of one store into another, e.g. to export or import a cache.
+
+    :param source: The store to copy from.
+    :param destination: The store to copy into; existing keys are overwritten.
+    :param namespace: Only copy the entries of this model.
+    :return: The number of copied entries.
+    """
+    keys = [
+        key
+        for key in source.keys()
+        if namespace is None or namespace_of(key) == namespace
+    ]
+    for start in range(0, len(keys), 1000):
+        batch = keys[start : start + 1000]
+        destination.put_many((key, source[key]) for key in batch)
+    return len(keys)
+
+
+SQLITE_EXTENSIONS = (".sqlite", ".sqlite3", ".db")
+STORE_BACKENDS = ("mmap", "sqlite")
+
+
+def open_embedding_store(
+    path: str,
+    backend: str = None,
+    migrate_key: Callable[[str], str] = None,
+    dtype: str = "float32",
+) -> EmbeddingStore:
+    """
+    Opens the embedding store at `path`.
+
+    :param path: The store file.
+    :param backend: 'mmap' or 'sqlite'; by default 'sqlite' for .sqlite, .sqlite3 and .db files
+        and 'mmap' otherwise.
+    :param migrate_key: Maps the keys of a legacy pickle cache onto store keys.
+    :param dtype: How new vectors are encoded: 'float32', 'float16' or 'int8'.
+    :raises ValueError: If the backend or dtype is unknown.
+    """
+    if backend is None:
+        backend = "sqlite" if path.lower().endswith(SQLITE_EXTENSIONS) else "mmap"
+    if backend == "sqlite":
+        return SQLiteEmbeddingStore(path, dtype=dtype)
+    if backend == "mmap":
+        return MmapEmbeddingStore(path, migrate_key, dtype)
+    raise ValueError(
+        f"Embedding store backend must be one of {STORE_BACKENDS}, got {backend}"
+    )
@@ -53,7 +53,7 @@ def _get_client_class(module_path: str, class_name: str):
     return getattr(module, class_name)
 
 
-def get_llm_client(llm_provider: str, llm_model: str, api_key: str = None):
+def get_llm_client(llm_provider: str, llm_model: str, api_key: str = None, **kwargs):
     if not llm_provider:
         raise ValueError(f"Could not import class for {llm_provider}")
     if not llm_model:
@@ -66,24 +66,28 @@ def get_llm_client(llm_provider: str, llm_model: str, api_key: str = None):
         # Dynamically import the client class from the constructed module path
         ClientClass = _get_client_class(module_path, class_name)
         # Instantiate the client class, assuming a constructor that takes a model parameter
+        # plus any client specific options, e.g. base_url
         if api_key:
-            return ClientClass(model=llm_model, api_key=api_key)
+            return ClientClass(model=llm_model, api_key=api_key, **kwargs)
         else:
-            return ClientClass(model=llm_model)
+            return ClientClass(model=llm_model, **kwargs)
     except ImportError as e:
         # Handle cases where the module or class does not exist
         raise ImportError(f"Could not import {class_name} from {module_path}: {e}")
 
 
-def get_embedding_generator_adapter(embeddings_provider: str, embeddings_model: str):
+def get_embedding_generator_adapter(
+    embeddings_provider: str, embeddings_model: str, **kwargs
+):
     class_name = f"{embeddings_provider}EmbeddingGeneratorAdapter"
     module_path = "det.embeddings.adapters"
 
     try:
         # Use the dynamic module path and class name to get the class
         EmbeddingGeneratorClass = _get_client_class(module_path, class_name)
-        # Instantiate the embedding generator class with the model name
-        return EmbeddingGeneratorClass(model=embeddings_model)
+        # Instantiate the embedding generator class with the model name and any
+        # adapter specific options, e.g. a pre-built embedding_generator
+        return EmbeddingGeneratorClass(model=embeddings_model, **kwargs)
     except ImportError as e:
         # Handle cases where the module or class does not exist
         raise ImportError(f"Could not import {class_name} from {module_path}: {e}")
@@ -1,6 +1,9 @@
 # det/llm/base.py
 
+import asyncio
 from abc import ABC, abstractmethod
+from functools import partial
+from typing import List
 
 
 class LLMGeneratorInterface(ABC):
@@ -17,6 +20,10 @@ class LLMGeneratorInterface(ABC):
         def generate_response(self, prompt: str, **kwargs) -> str:
             # Implementation for a specific LLM provider
             pass
+
+        async def agenerate_response(self, prompt: str, **kwargs) -> str:
+            # Optional: a native async implementation for the provider
+            pass
     """
 
     def __init__(self, **kwargs):
@@ -36,6 +43,57 @@ class LLMGeneratorInterface(ABC):
         """
         pass
 
+    async def agenerate_response(self, prompt: str, **kwargs) -> str:
+        """
+        Asynchronously generates a response to a given prompt using the LLM.
+
+        Clients with a native async SDK should override this. The default runs the
+        synchronous `generate_response` in the event loop's default executor.
+
+        :param prompt: The input prompt to generate text for.
+        :param kwargs: Additional parameters specific to the LLM provider.
+        :return: The generated text response.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None, partial(self.generate_response, prompt, **kwargs)
+        )
+
+    def generate_responses(self, prompt: str, n: int, **kwargs) -> List[str]:
+        """
+        Generates `n` independent responses to the same prompt.
+
+        Providers able to return several completions from one request should override this.
+        The default makes `n` separate calls to `generate_response`.
+
+        :param prompt: The input prompt to generate text for.
+        :param n: The number of responses to generate.
+        :param kwargs: Additional parameters specific to the LLM provider.
+        :return: A list of `n` generated text responses.
+        """
+        return [self.generate_response(prompt, **kwargs) for _ in range(n)]
+
+    async def agenerate_responses(self, prompt: str, n: int, **kwargs) -> List[str]:
+        """
+        Asynchronously generates `n` independent responses to the same prompt.
+
+        The default makes `n` concurrent calls to `agenerate_response`.
+
+        :param prompt: The input prompt to generate text for.
+        :param n: The number of responses to generate.
+        :param kwargs: Additional parameters specific to the LLM provider.
+        :return: A list of `n` generated text responses.
+        """
+        return list(
+            await asyncio.gather(
+                *(self.agenerate_response(prompt, **kwargs) for _ in range(n))
+            )
+        )
+
 
 class ResponseGenerationError(Exception):
-    pass
+    """Raised when no valid response was generated; `attempts` is how many were made."""
+
+    def __init__(self, *args, attempts: int = None):
+        super().__init__(*args)
+        self.attempts = attempts
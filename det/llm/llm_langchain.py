@@ -12,11 +12,28 @@ from det.utils.prompt_manager import PromptManager
 from det.llm.base import LLMGeneratorInterface, ResponseGenerationError
 from det.helpers import dynamic_import
 
+import asyncio
+import concurrent.futures
+import threading
+import openai
 from rich.console import Console
-from time import sleep
+from time import monotonic, sleep
+
+from det.llm.output_repair import OutputRepairer
+from det.llm.rate_limit import backoff_delay, retry_after_seconds
+from det.runner import run_iterations
 
 console = Console()
 
+_RETRYABLE_ERRORS = (
+    OutputParserException,
+    TimeoutError,
+    asyncio.TimeoutError,
+    concurrent.futures.TimeoutError,
+    ConnectionError,
+    openai.APIConnectionError,
+)
+
 
 class LangChainClient(LLMGeneratorInterface):
     """
@@ -37,12 +54,35 @@ class LangChainClient(LLMGeneratorInterface):
           to be imported from the appropriate modules.
     """
 
-    def __init__(self, prompts_file_path=None, max_retries=3):
+    def __init__(
+        self,
+        prompts_file_path=None,
+        max_retries=3,
+        backoff_base=1.0,
+        backoff_max=30.0,
+        attempt_timeout=None,
+        deadline=None,
+    ):
+        """
+        Parameters:
+        - prompts_file_path (str): Custom path to the prompts.json configuration file.
+        - max_retries (int): The maximum number of attempts per response.
+        - backoff_base (float): The delay in seconds before the first retry; doubles with
+            each retry, with full jitter.
+        - backoff_max (float): The upper bound in seconds of the delay between retries.
+        - attempt_timeout (float): Seconds allowed per attempt; None waits indefinitely.
+        - deadline (float): Seconds allowed for all attempts of one response; None for no limit.
+        """
         self.llm_handler = LLMHandler()
         self.prompt_manager = PromptManager(prompts_file_path=prompts_file_path)
         self.chain = None
         self.input_variables = None
+        self.output_repairer = None
         self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.attempt_timeout = attempt_timeout
+        self.deadline = deadline
 
     def configure_chain(self, prompt_group: str, input_variables: dict, **kwargs):
         """
@@ -132,40 +172,166 @@ class LangChainClient(LLMGeneratorInterface):
         # Prepare the initial part of the chain with prompt and LLM
         self.chain = prompt | llm
 
-        # If an output_parser is defined, extend the chain to include it
+        # If an output_parser is defined, extend the chain to include it, repairing
+        # malformed output locally before a parser failure costs another LLM call
         if output_parser is not None:
-            self.chain |= output_parser
+            self.output_repairer = OutputRepairer(output_parser, pydantic_object)
+            self.chain |= self.output_repairer.parse
 
     def generate_response(self) -> str:
         """
         Generate a response based on the configured language learning model (LLM)
           chain and input variables.
 
+        Parser failures, timeouts, rate limits and transport errors are retried with
+        exponential backoff and jitter, each attempt bounded by `attempt_timeout` and
+        all attempts together by `deadline`.
+
         Returns:
             str: The generated response.
 
+        Raises:
+            ValueError: If the LLM client has not been configured with a chain
+              or input variables.
+            ResponseGenerationError: If no valid response was generated within the
+              retries or the deadline.
+        """
+        return self.generate_response_with_attempts()[0]
+
+    def generate_response_with_attempts(self) -> tuple:
+        """
+        Generate a response as in `generate_response`, also returning the attempts it took.
+
+        Returns:
+            tuple: The generated response and the number of attempts made.
+
+        Raises:
+            ValueError: If the LLM client has not been configured with a chain
+              or input variables.
+            ResponseGenerationError: If no valid response was generated within the
+              retries or the deadline.
+        """
+        self._check_configured()
+        started = monotonic()
+        attempts = 0
+        while True:
+            try:
+                response = self._invoke(self._attempt_timeout(started))
+                return response, attempts + 1  # Return if successful
+            except Exception as e:
+                attempts += 1
+                delay = self._retry_delay(e, attempts, started)
+                sleep(delay)
+
+    def generate_responses(
+        self, iterations: int, max_concurrency: int = None, on_complete=None
+    ) -> list:
+        """
+        Generate several responses in parallel.
+
+        Each iteration runs its own retry loop, exactly as in `generate_response`, so a
+        failing or hung iteration backs off and times out without holding up the others.
+
+        Parameters:
+            iterations (int): The number of responses to generate.
+            max_concurrency (int): The maximum number of chain invocations in flight at once.
+                Defaults to the number of iterations.
+            on_complete (callable): Optional callback invoked with the iteration index as
+                each iteration finishes, e.g. to advance a progress bar.
+
+        Returns:
+            list: One (result, attempts) pair per iteration, in iteration order. The result
+              is either the generated response or the `ResponseGenerationError` raised for
+              that iteration, and attempts is the number of attempts the iteration made.
+
         Raises:
             ValueError: If the LLM client has not been configured with a chain
               or input variables.
         """
+        self._check_configured()
+
+        def generate(_iteration):
+            try:
+                return self.generate_response_with_attempts()
+            except ResponseGenerationError as e:
+                return e, e.attempts
+
+        return run_iterations(
+            generate,
+            iterations,
+            concurrency=max_concurrency or max(iterations, 1),
+            on_complete=on_complete,
+        )
+
+    def _check_configured(self):
         if self.chain is None or self.input_variables is None:
             raise ValueError(
                 "The Langchain client has not been configured with a chain or input variables."
             )
-        attempts = 0
-        while attempts < self.max_retries:
+
+    def _invoke(self, timeout):
+        """Invokes the chain, abandoning the attempt after `timeout` seconds unless None."""
+        if timeout is None:
+            return self.chain.invoke(self.input_variables)
+        # Each attempt runs on its own daemon thread, so it starts at once however many
+        # iterations are in flight, and a hung request that is abandoned neither holds
+        # up later attempts nor keeps the interpreter from exiting
+        future = concurrent.futures.Future()
+
+        def attempt():
             try:
-                # Try generating the response
-                response = self.chain.invoke(self.input_variables)
-                return response  # Return if successful
-            except OutputParserException as e:
-                attempts += 1
-                if attempts < self.max_retries:
-                    console.print(
-                        f"[yellow]Warning: Failed to generate response. Retrying {attempts}/{self.max_retries}...[/yellow]"
-                    )
-                    sleep(1)  # Optional: Introduce a small delay between retries
-                else:
-                    raise ResponseGenerationError(
-                        f"Failed after {self.max_retries} attempts: {str(e)}"
-                    )
+                future.set_result(self.chain.invoke(self.input_variables))
+            except BaseException as e:
+                future.set_exception(e)
+
+        threading.Thread(target=attempt, name="langchain-attempt", daemon=True).start()
+        return future.result(timeout=timeout)
+
+    def _attempt_timeout(self, started: float):
+        """The time allowed for the next attempt, or None if unbounded."""
+        timeout = self.attempt_timeout
+        if self.deadline is not None:
+            remaining = max(self.deadline - (monotonic() - started), 0.0)
+            timeout = remaining if timeout is None else min(timeout, remaining)
+        return timeout
+
+    def _retry_delay(self, error: Exception, attempts: int, started: float) -> float:
+        """
+        Decides whether a failed attempt is retried and returns the delay before the
+        next attempt, raising ResponseGenerationError if it is not.
+        """
+        if not _is_retryable(error):
+            raise error
+        if attempts >= self.max_retries:
+            raise ResponseGenerationError(
+                f"Failed after {self.max_retries} attempts: {_describe(error)}",
+                attempts=attempts,
+            ) from error
+        delay = retry_after_seconds(error)
+        if delay is None:
+            delay = backoff_delay(attempts - 1, self.backoff_base, self.backoff_max)
+        if self.deadline is not None and (
+            monotonic() - started + delay >= self.deadline
+        ):
+            raise ResponseGenerationError(
+                f"Deadline of {self.deadline}s exceeded after {attempts} attempts: {_describe(error)}",
+                attempts=attempts,
+            ) from error
+        console.print(
+            f"[yellow]Warning: Failed to generate response. Retrying {attempts}/{self.max_retries}...[/yellow]"
+        )
+        return delay
+
+
+def _is_retryable(error: Exception) -> bool:
+    """Parser failures, timeouts, rate limits, server errors and transport errors are retried."""
+    if isinstance(error, _RETRYABLE_ERRORS):
+        return True
+    status_code = getattr(error, "status_code", None)
+    return status_code is not None and (
+        status_code in (408, 409, 429) or status_code >= 500
+    )
+
+
+def _describe(error: Exception) -> str:
+    return str(error) or f"{type(error).__name__} after timeout"
@@ -1,8 +1,9 @@
 # det/llm/llm_ollama.py
 
 from abc import ABC, abstractmethod
+import asyncio
 
-from ollama import Client
+from ollama import AsyncClient, Client
 
 import logging
 
@@ -37,7 +38,10 @@ class OllamaClient(LLMGeneratorInterface):
         if not isinstance(host, str):
             raise TypeError("Host parameter must be a string.")
         self.model = model
+        self.host = host
         self.client = Client(host=host)
+        self.async_client = None
+        self._async_client_loop = None
 
     def generate_response(self, prompt: str, **kwargs) -> str:
         """
@@ -66,6 +70,42 @@ class OllamaClient(LLMGeneratorInterface):
         except Exception as e:
             logging.error(f"An error occurred: {e}")
 
+    def _get_async_client(self) -> AsyncClient:
+        # Created in each new event loop, as a client's connections are bound to the loop
+        # they were opened in and die with it
+        loop = asyncio.get_running_loop()
+        if self.async_client is None or self._async_client_loop is not loop:
+            self._async_client_loop = loop
+            self.async_client = AsyncClient(host=self.host)
+        return self.async_client
+
+    async def agenerate_response(self, prompt: str, **kwargs) -> str:
+        """
+        Asynchronously generates a response to a given prompt using the Ollama LLM.
+
+        Parameters:
+        - prompt (str): The prompt for generating the response.
+        - **kwargs: Additional parameters specific to the LLM provider.
+
+        Raises:
+        - ValueError: If the prompt is not a string.
+
+        Returns:
+        - str: The generated text response.
+        """
+        if not isinstance(prompt, str):
+            raise ValueError("Prompt must be a string.")
+        try:
+            response = await self._get_async_client().chat(
+                model=self.model,  # Use the model specified during initialization
+                messages=[{"role": "user", "content": prompt}],
+                stream=False,
+                options={"temperature": 0},
+            )
+            return response["message"]["content"]
+        except Exception as e:
+            logging.error(f"An error occurred: {e}")
+
 
 class LLMAdapterInterface(ABC):
     """
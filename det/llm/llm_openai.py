@@ -20,16 +20,20 @@ This setup facilitates seamless integration with different Large Language Models
 BaseLLMClient interface, promoting a plug-and-play architecture for text generation tasks.
 """
 
-from openai import OpenAI
+import asyncio
+
+from openai import AsyncOpenAI, OpenAI
 import openai
 import logging
 
 from det.llm.base import LLMGeneratorInterface
+from det.llm.multi_sampling import MultiSamplingMixin
+from det.llm.rate_limit import RateLimiter, estimate_tokens, get_rate_limiter
 
 logger = logging.getLogger(__name__)
 
 
-class OpenAIClient(LLMGeneratorInterface):
+class OpenAIClient(MultiSamplingMixin, LLMGeneratorInterface):
     """
     Example:
     --------
@@ -37,15 +41,34 @@ class OpenAIClient(LLMGeneratorInterface):
         prompt = "Explain the significance of abstract classes in object-oriented programming."
         response = llm_client.generate_response(prompt, temperature=0.5, max_tokens=100)
         print(response)
+
+        # n samples of the same prompt from a single request
+        responses = llm_client.generate_responses(prompt, n=5, temperature=0.5)
     """
 
-    def __init__(self, model: str = "gpt-3.5-turbo", api_key: str = None):
+    bad_request_error = openai.BadRequestError
+
+    def __init__(
+        self,
+        model: str = "gpt-3.5-turbo",
+        api_key: str = None,
+        rate_limiter: RateLimiter = None,
+        base_url: str = None,
+    ):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.async_client = None
+        self._async_client_loop = None
+        # Shared with every other OpenAI client in the process unless one is given
+        self.rate_limiter = rate_limiter or get_rate_limiter("openai")
         try:
+            # 429s and transient failures are retried by the rate limiter, which only sees
+            # them if the SDK does not retry them itself
             if api_key:
-                self.client = OpenAI(api_key=api_key)
+                self.client = OpenAI(api_key=api_key, base_url=base_url, max_retries=0)
                 logger.info("OpenAI client instantiated successfully using api_key.")
             else:
-                self.client = OpenAI()
+                self.client = OpenAI(base_url=base_url, max_retries=0)
                 logger.info("OpenAI client instantiated successfully without api_key.")
             self.model = model
             self.client.models.list()
@@ -66,10 +89,43 @@ class OpenAIClient(LLMGeneratorInterface):
 
     def generate_response(self, prompt: str, **kwargs):
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,  # Use the model specified during initialization
-                messages=[{"role": "user", "content": prompt}],
-                **kwargs,
+            response = self.rate_limiter.call(
+                lambda: self.client.chat.completions.create(
+                    model=self.model,  # Use the model specified during initialization
+                    messages=[{"role": "user", "content": prompt}],
+                    **kwargs,
+                ),
+                estimated_tokens=estimate_tokens(prompt, kwargs.get("max_tokens")),
+            )
+            return response.choices[0].message.content
+        except Exception as e:
+            print(f"An error occurred: {e}")
+            return None
+
+    def _get_async_client(self) -> AsyncOpenAI:
+        # Created on first use so that sync-only runs never construct it, and again in
+        # each new event loop, as a client's connections are bound to the loop they were
+        # opened in and die with it
+        loop = asyncio.get_running_loop()
+        if self.async_client is None or self._async_client_loop is not loop:
+            self._async_client_loop = loop
+            if self.api_key:
+                self.async_client = AsyncOpenAI(
+                    api_key=self.api_key, base_url=self.base_url, max_retries=0
+                )
+            else:
+                self.async_client = AsyncOpenAI(base_url=self.base_url, max_retries=0)
+        return self.async_client
+
+    async def agenerate_response(self, prompt: str, **kwargs):
+        try:
+            response = await self.rate_limiter.acall(
+                lambda: self._get_async_client().chat.completions.create(
+                    model=self.model,  # Use the model specified during initialization
+                    messages=[{"role": "user", "content": prompt}],
+                    **kwargs,
+                ),
+                estimated_tokens=estimate_tokens(prompt, kwargs.get("max_tokens")),
             )
             return response.choices[0].message.content
         except Exception as e:
@@ -0,0 +1,111 @@
+"""
+# llm/multi_sampling.py
+
+This module provides the `n` multi-sampling shared by the clients of OpenAI-compatible chat
+completion APIs. One request with `n` asks the provider for `n` independent completions of the
+same prompt, saving the prompt tokens and round trips of `n` separate requests. Models that
+reject `n` are remembered, and their clients fall back to separate requests from then on.
+
+Example:
+--------
+    class MyClient(MultiSamplingMixin, LLMGeneratorInterface):
+        bad_request_error = mysdk.BadRequestError
+
+        def _get_async_client(self):
+            return self.async_client
+
+    responses = MyClient(model="my-model").generate_responses(prompt, n=5, temperature=0.5)
+
+Clients using the mixin provide `client`, `model`, `rate_limiter` and `_get_async_client`.
+"""
+
+import logging
+import re
+from typing import List
+
+from det.llm.rate_limit import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# Providers that leave out the parameter name quote `n` in the message, e.g. "'n' : ..."
+_QUOTED_N = re.compile(r"""['"`]n['"`]""")
+
+
+class MultiSamplingMixin:
+    """
+    Adds `generate_responses` and `agenerate_responses` using the `n` parameter to a client of
+    an OpenAI-compatible chat completions API.
+    """
+
+    # The SDK's exception for a 400 response, set by each client
+    bad_request_error = Exception
+
+    # Cleared on the first request the provider rejects because of `n`
+    supports_multi_sampling = True
+
+    def _multi_sampling_unsupported(self, error: Exception) -> bool:
+        # Only a rejection naming the `n` parameter turns multi-sampling off
+        if getattr(error, "param", None) == "n" or _QUOTED_N.search(str(error)):
+            logger.warning(
+                f"{self.model} does not support multi-sampling, falling back to separate calls: {error}"
+            )
+            self.supports_multi_sampling = False
+            return True
+        return False
+
+    def _create_kwargs(self, prompt: str, n: int, kwargs: dict) -> dict:
+        return dict(
+            model=self.model,
+            messages=[{"role": "user", "content": prompt}],
+            n=n,
+            **kwargs,
+        )
+
+    def generate_responses(self, prompt: str, n: int, **kwargs) -> List[str]:
+        """
+        Generates `n` responses to the same prompt from a single request using the `n`
+        parameter, saving the prompt tokens and round trips of separate calls. Falls back to
+        separate calls if the model does not support `n`.
+        """
+        if n == 1 or not self.supports_multi_sampling:
+            return super().generate_responses(prompt, n, **kwargs)
+        try:
+            response = self.rate_limiter.call(
+                lambda: self.client.chat.completions.create(
+                    **self._create_kwargs(prompt, n, kwargs)
+                ),
+                estimated_tokens=estimate_tokens(prompt, kwargs.get("max_tokens"), n),
+            )
+            return [choice.message.content for choice in response.choices]
+        except self.bad_request_error as e:
+            if self._multi_sampling_unsupported(e):
+                return super().generate_responses(prompt, n, **kwargs)
+            logger.error(f"An error occurred: {e}")
+            return [None] * n
+        except Exception as e:
+            logger.error(f"An error occurred: {e}")
+            return [None] * n
+
+    async def agenerate_responses(self, prompt: str, n: int, **kwargs) -> List[str]:
+        """
+        Asynchronously generates `n` responses to the same prompt from a single request,
+        falling back to separate calls if the model does not support `n`.
+        """
+        if n == 1 or not self.supports_multi_sampling:
+            return await super().agenerate_responses(prompt, n, **kwargs)
+        try:
+            response = await self.rate_limiter.acall(
+                lambda: self._get_async_client().chat.completions.create(
+                    **self._create_kwargs(prompt, n, kwargs)
+                ),
+                estimated_tokens=estimate_tokens(prompt, kwargs.get("max_tokens"), n),
+            )
+            return [choice.message.content for choice in response.choices]
+        except self.bad_request_error as e:
+            if self._multi_sampling_unsupported(e):
+                return await super().agenerate_responses(prompt, n, **kwargs)
+            logger.error(f"An error occurred: {e}")
+            return [None] * n
+        except Exception as e:
+            logger.error(f"An error occurred: {e}")
+            return [None] * n
@@ -0,0 +1,286 @@
+"""
+Output Repair Module
+
+# llm/output_repair.py
+
+This module repairs structured LLM output locally before a parser failure is turned into another
+full LLM call. Most `OutputParserException`s raised by the `PydanticOutputParser` are caused by
+small, mechanical defects: the JSON wrapped in a code fence with surrounding prose, a trailing
+comma, a missing closing brace, Python literals, or a `Literal` value that differs only in case
+(e.g. "moderate" for "Moderate"). Fixing these locally costs microseconds instead of a round trip
+and another completion's worth of tokens.
+
+Example usage:
+
+    from langchain.output_parsers import PydanticOutputParser
+    from det.llm.output_repair import OutputRepairer
+
+    parser = PydanticOutputParser(pydantic_object=RiskDefinition)
+    repairer = OutputRepairer(parser, RiskDefinition)
+
+    chain = prompt | llm | repairer.parse
+    risk_definition = chain.invoke(input_variables)
+
+    print(repairer.repairs_attempted, repairer.repairs_succeeded)
+
+Key Features:
+    - `repair_json` extracts the JSON object from fenced or chatty output and fixes trailing
+        commas, unbalanced brackets, raw newlines in strings, smart quotes and Python literals,
+        leaving the contents of string values as they are.
+    - `coerce_literals` maps `Literal` field values that differ only in case, spacing or
+        underscores onto the allowed value.
+    - `OutputRepairer` counts attempted and successful repairs; every successful repair is one
+        LLM call saved.
+"""
+
+import json
+import logging
+import re
+import threading
+from typing import Literal, Optional, Union, get_args, get_origin
+
+from langchain_core.exceptions import OutputParserException
+
+logger = logging.getLogger(__name__)
+
+_CODE_FENCE = re.compile(r"```(?:json|JSON)?\s*(.*?)```", re.DOTALL)
+_PYTHON_LITERALS = {"True": "true", "False": "false", "None": "null"}
+_SMART_QUOTES = ("“", "”")
+_CLOSERS = {"{": "}", "[": "]"}
+
+
+def _extract_json(text: str) -> str:
+    """Strips code fences and any prose around the outermost JSON object or array."""
+    fenced = _CODE_FENCE.search(text)
+    if fenced:
+        text = fenced.group(1)
+    starts = [i for i in (text.find("{"), text.find("[")) if i != -1]
+    if not starts:
+        return text.strip()
+    start = min(starts)
+    # Find where the outermost structure closes; a truncated completion never does
+    depth = 0
+    in_string = False
+    escaped = False
+    for i in range(start, len(text)):
+        char = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in "{[":
+            depth += 1
+        elif char in "}]":
+            depth -= 1
+            if depth == 0:
+                return text[start : i + 1]
+    return text[start:].strip()
+
+
+def _fix_delimiters(text: str) -> str:
+    """
+    Replaces smart quotes used as string delimiters and drops trailing commas, leaving the
+    contents of string literals untouched.
+    """
+    out = []
+    opener = None  # The quote that opened the current string, if in one
+    escaped = False
+    for i, char in enumerate(text):
+        if opener is not None:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"' or (opener in _SMART_QUOTES and char == "”"):
+                # A string opened with a smart quote is closed by either kind
+                opener = None
+                char = '"'
+            out.append(char)
+        elif char == '"' or char in _SMART_QUOTES:
+            opener = char
+            out.append('"')
+        elif char == "," and text[i + 1 :].lstrip()[:1] in ("}", "]"):
+            continue
+        else:
+            out.append(char)
+    return "".join(out)
+
+
+def _fix_structure(text: str) -> str:
+    """
+    Escapes raw newlines inside strings, replaces Python literals and closes any brackets
+    or string left open by a truncated completion.
+    """
+    out = []
+    stack = []
+    in_string = False
+    escaped = False
+    i = 0
+    while i < len(text):
+        char = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+            elif char == "\n":
+                char = "\\n"
+            out.append(char)
+            i += 1
+            continue
+        if char == '"':
+            in_string = True
+        elif char in _CLOSERS:
+            stack.append(_CLOSERS[char])
+        elif char in "}]":
+            if stack and stack[-1] == char:
+                stack.pop()
+        else:
+            for literal, replacement in _PYTHON_LITERALS.items():
+                if text.startswith(literal, i) and not text[i - 1 : i].isalnum():
+                    out.append(replacement)
+                    i += len(literal)
+                    break
+            else:
+                out.append(char)
+                i += 1
+            continue
+        out.append(char)
+        i += 1
+    if in_string:
+        out.append('"')
+    repaired = "".join(out).rstrip().rstrip(",")
+    return repaired + "".join(reversed(stack))
+
+
+def repair_json(text: str) -> Optional[str]:
+    """
+    Attempts to turn malformed LLM output into valid JSON.
+
+    :param text: The raw LLM output.
+    :return: The repaired JSON text, or None if it still cannot be parsed.
+    """
+    extracted = _extract_json(text)
+    delimited = _fix_delimiters(extracted)
+    # Each fix only runs if the output is still invalid without it
+    for candidate in (extracted, delimited, _fix_structure(delimited)):
+        try:
+            json.loads(candidate)
+            return candidate
+        except json.JSONDecodeError:
+            continue
+    return None
+
+
+def _field_annotations(pydantic_object) -> dict:
+    # pydantic v2 models expose `model_fields`; v1 models (langchain_core.pydantic_v1) `__fields__`
+    if hasattr(pydantic_object, "model_fields"):
+        return {
+            name: field.annotation
+            for name, field in pydantic_object.model_fields.items()
+        }
+    return {
+        name: field.outer_type_ for name, field in pydantic_object.__fields__.items()
+    }
+
+
+def _literal_values(annotation) -> tuple:
+    if get_origin(annotation) is Literal:
+        return get_args(annotation)
+    if get_origin(annotation) is Union:
+        return tuple(
+            value for arg in get_args(annotation) for value in _literal_values(arg)
+        )
+    return ()
+
+
+def _normalise(value: str) -> str:
+    return re.sub(r"[\s_\-]+", " ", value).strip().lower()
+
+
+def coerce_literals(obj: dict, pydantic_object) -> dict:
+    """
+    Maps `Literal` field values that differ only in case, spacing or underscores onto the
+    allowed values of `pydantic_object`, e.g. "very_high" to "Very High".
+
+    :param obj: The parsed JSON object.
+    :param pydantic_object: The Pydantic model the object should validate against.
+    :return: The object with coerced values.
+    """
+    for name, annotation in _field_annotations(pydantic_object).items():
+        allowed = _literal_values(annotation)
+        value = obj.get(name)
+        if not allowed or not isinstance(value, str) or value in allowed:
+            continue
+        for candidate in allowed:
+            if isinstance(candidate, str) and _normalise(candidate) == _normalise(
+                value
+            ):
+                obj[name] = candidate
+                break
+    return obj
+
+
+class OutputRepairer:
+    """
+    Wraps an output parser so that parser failures are repaired locally before they
+    propagate and trigger a retry of the whole chain.
+    """
+
+    def __init__(self, output_parser, pydantic_object=None):
+        """
+        :param output_parser: The parser to wrap, e.g. a `PydanticOutputParser`.
+        :param pydantic_object: The Pydantic model used to coerce `Literal` values.
+        """
+        self.output_parser = output_parser
+        self.pydantic_object = pydantic_object
+        self.repairs_attempted = 0
+        self.repairs_succeeded = 0
+        self._lock = threading.Lock()
+
+    @property
+    def llm_calls_saved(self) -> int:
+        """Every successful repair replaces a full re-invocation of the chain."""
+        return self.repairs_succeeded
+
+    def parse(self, output):
+        """
+        Parses an LLM output, repairing it locally if the wrapped parser rejects it.
+
+        :param output: The LLM output, a message or a string.
+        :return: The parsed object.
+        :raises OutputParserException: The original error if the output cannot be repaired.
+        """
+        text = output.content if hasattr(output, "content") else str(output)
+        try:
+            return self.output_parser.parse(text)
+        except OutputParserException as error:
+            with self._lock:
+                self.repairs_attempted += 1
+            repaired = self._repair(text)
+            if repaired is None:
+                raise
+            try:
+                result = self.output_parser.parse(repaired)
+            except OutputParserException:
+                raise error
+            with self._lock:
+                self.repairs_succeeded += 1
+            logger.info("Repaired LLM output locally, saving an LLM call")
+            return result
+
+    def _repair(self, text: str) -> Optional[str]:
+        repaired = repair_json(text)
+        if repaired is None or self.pydantic_object is None:
+            return repaired
+        obj = json.loads(repaired)
+        if isinstance(obj, dict):
+            obj = coerce_literals(obj, self.pydantic_object)
+        return json.dumps(obj)
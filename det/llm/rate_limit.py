@@ -0,0 +1,418 @@
+"""
+Rate Limiting Module
+
+# llm/rate_limit.py
+
+This module provides a provider-aware rate limiter shared by the LLM clients. It combines:
+
+    - token buckets on requests per minute and tokens per minute, so a run never starts more
+        work than the account allows;
+    - an adaptive concurrency limit that grows additively while requests succeed and shrinks
+        multiplicatively whenever a 429 is received (AIMD);
+    - a pause honouring the provider's `Retry-After` header, falling back to exponential backoff
+        with jitter when the header is missing.
+
+Rate-limited calls are retried instead of being discarded, so parallel runs go as fast as the
+account allows without losing iterations. Transient failures (connection errors, timeouts, 408,
+409 and 5xx responses) are retried with backoff too, by the failing caller alone; the clients
+turn off their SDK's own retries so that every retry goes through the limiter.
+
+Example usage:
+
+    from det.llm.rate_limit import get_rate_limiter
+
+    limiter = get_rate_limiter("openai", requests_per_minute=500, tokens_per_minute=200_000)
+
+    response = limiter.call(
+        lambda: client.chat.completions.create(model="gpt-4o-mini", messages=messages),
+        estimated_tokens=300,
+    )
+
+    print(limiter.current_rate, limiter.concurrency_limit)
+
+Limiters are shared per provider through `get_rate_limiter`, so every client talking to the same
+provider within a process draws from the same budget.
+"""
+
+import asyncio
+import logging
+import random
+import threading
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# How long to wait before re-checking when the only constraint is the concurrency limit
+_POLL_INTERVAL = 0.05
+
+
+def backoff_delay(
+    attempt: int, base: float = 1.0, maximum: float = 60.0, jitter: bool = True
+) -> float:
+    """
+    Calculates an exponential backoff delay for a zero-based retry attempt.
+
+    :param attempt: The zero-based retry attempt.
+    :param base: The delay of the first attempt in seconds.
+    :param maximum: The upper bound on the delay in seconds.
+    :param jitter: Use "full jitter", a uniformly random delay up to the exponential bound, so
+        that concurrent callers do not retry in lockstep.
+    :return: The delay in seconds.
+    """
+    delay = min(maximum, base * (2**attempt))
+    return random.uniform(0, delay) if jitter else delay
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """Returns True if the exception represents an HTTP 429 from the provider."""
+    return getattr(error, "status_code", None) == 429
+
+
+def is_transient_error(error: Exception) -> bool:
+    """
+    Returns True if the exception is a failure worth retrying other than a 429: a connection
+    error or timeout, or an HTTP 408, 409 or 5xx from the provider.
+    """
+    status_code = getattr(error, "status_code", None)
+    if isinstance(status_code, int):
+        return status_code in (408, 409) or status_code >= 500
+    # The SDKs' connection errors carry no status code; matched by name so that no SDK
+    # needs to be imported
+    return isinstance(error, (ConnectionError, TimeoutError)) or any(
+        cls.__name__ in ("APIConnectionError", "APITimeoutError")
+        for cls in type(error).__mro__
+    )
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """
+    Reads the delay requested by the provider from the `Retry-After` headers of an error.
+
+    :param error: An exception raised by a provider SDK, typically carrying the HTTP response.
+    :return: The delay in seconds, or None if the provider did not specify one.
+    """
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms:
+        try:
+            return float(retry_after_ms) / 1000
+        except ValueError:
+            pass
+    retry_after = headers.get("retry-after")
+    if retry_after:
+        try:
+            return float(retry_after)
+        except ValueError:
+            try:
+                return max(
+                    0.0, parsedate_to_datetime(retry_after).timestamp() - time.time()
+                )
+            except (TypeError, ValueError):
+                return None
+    return None
+
+
+def _tokens_used(response) -> Optional[int]:
+    usage = getattr(response, "usage", None)
+    return getattr(usage, "total_tokens", None)
+
+
+class RateLimiter:
+    """
+    A token bucket rate limiter with AIMD adaptive concurrency.
+
+    Example:
+    --------
+        limiter = RateLimiter(requests_per_minute=60, tokens_per_minute=40_000)
+        response = limiter.call(lambda: send_request(), estimated_tokens=500)
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        max_concurrency: int = 64,
+        min_concurrency: int = 1,
+        increase: float = 1.0,
+        decrease: float = 0.5,
+        max_retries: int = 6,
+        backoff_base: float = 1.0,
+        backoff_max: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Initializes the rate limiter.
+
+        :param requests_per_minute: The request budget; None means unlimited.
+        :param tokens_per_minute: The token budget; None means unlimited.
+        :param max_concurrency: The upper bound of the adaptive concurrency limit.
+        :param min_concurrency: The lower bound of the adaptive concurrency limit.
+        :param increase: Additive increase of the concurrency limit per limit's worth of
+            successful requests.
+        :param decrease: Multiplicative factor applied to the concurrency limit on a 429.
+        :param max_retries: How many times a rate-limited or transiently failing call is retried
+            before giving up.
+        :param backoff_base: Base delay in seconds when no `Retry-After` is provided.
+        :param backoff_max: Maximum delay in seconds when no `Retry-After` is provided.
+        :param clock: A monotonic clock, replaceable for testing.
+        """
+        self._lock = threading.Lock()
+        self._clock = clock
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.increase = increase
+        self.decrease = decrease
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self._concurrency_limit = float(max_concurrency)
+        self._in_flight = 0
+        self._blocked_until = 0.0
+        self._completions = deque()
+        self.rate_limited_count = 0
+        self.configure(requests_per_minute, tokens_per_minute)
+
+    def configure(
+        self,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+    ):
+        """Sets the request and token budgets, resetting both buckets to full."""
+        with self._lock:
+            self.requests_per_minute = requests_per_minute
+            self.tokens_per_minute = tokens_per_minute
+            self._request_bucket = float(requests_per_minute or 0)
+            self._token_bucket = float(tokens_per_minute or 0)
+            self._last_refill = self._clock()
+
+    @property
+    def concurrency_limit(self) -> int:
+        """The number of requests currently allowed in flight."""
+        return int(self._concurrency_limit)
+
+    @property
+    def current_rate(self) -> float:
+        """The observed throughput in completed requests per minute over the last minute."""
+        with self._lock:
+            now = self._clock()
+            self._expire_completions(now)
+            if not self._completions:
+                return 0.0
+            window = max(now - self._completions[0], 1.0)
+            return len(self._completions) * 60.0 / min(window, 60.0)
+
+    def stats(self) -> dict:
+        """Returns a snapshot of the limiter state for reporting."""
+        return {
+            "current_rate": self.current_rate,
+            "concurrency_limit": self.concurrency_limit,
+            "in_flight": self._in_flight,
+            "rate_limited": self.rate_limited_count,
+        }
+
+    def _expire_completions(self, now: float):
+        while self._completions and now - self._completions[0] > 60.0:
+            self._completions.popleft()
+
+    def _refill(self, now: float):
+        elapsed = now - self._last_refill
+        self._last_refill = now
+        if self.requests_per_minute:
+            self._request_bucket = min(
+                float(self.requests_per_minute),
+                self._request_bucket + elapsed * self.requests_per_minute / 60.0,
+            )
+        if self.tokens_per_minute:
+            self._token_bucket = min(
+                float(self.tokens_per_minute),
+                self._token_bucket + elapsed * self.tokens_per_minute / 60.0,
+            )
+
+    def _reserve(self, tokens: int) -> float:
+        """Reserves capacity for one request, returning 0 on success or the seconds to wait."""
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            if now < self._blocked_until:
+                return self._blocked_until - now
+            if self._in_flight >= self.concurrency_limit:
+                return _POLL_INTERVAL
+            if self.requests_per_minute and self._request_bucket < 1:
+                return (1 - self._request_bucket) * 60.0 / self.requests_per_minute
+            if self.tokens_per_minute:
+                # A request larger than the whole budget waits for a full bucket
+                needed = min(tokens, self.tokens_per_minute)
+                if self._token_bucket < needed:
+                    return (needed - self._token_bucket) * 60.0 / self.tokens_per_minute
+                self._token_bucket -= tokens
+            if self.requests_per_minute:
+                self._request_bucket -= 1
+            self._in_flight += 1
+            return 0.0
+
+    def acquire(self, tokens: int = 0):
+        """Blocks until a request using `tokens` tokens may be sent."""
+        while True:
+            wait = self._reserve(tokens)
+            if not wait:
+                return
+            time.sleep(wait)
+
+    async def aacquire(self, tokens: int = 0):
+        """Waits, without blocking the event loop, until a request may be sent."""
+        while True:
+            wait = self._reserve(tokens)
+            if not wait:
+                return
+            await asyncio.sleep(wait)
+
+    def release(self, reserved_tokens: int = 0, used_tokens: Optional[int] = None):
+        """
+        Releases a request slot, reconciling the token bucket with the actual usage if known.
+        """
+        with self._lock:
+            self._in_flight -= 1
+            if self.tokens_per_minute and used_tokens is not None:
+                # A refund never fills the bucket beyond its capacity
+                self._token_bucket = min(
+                    float(self.tokens_per_minute),
+                    self._token_bucket + reserved_tokens - used_tokens,
+                )
+
+    def on_success(self):
+        """Records a successful request: additive increase of the concurrency limit."""
+        with self._lock:
+            self._completions.append(self._clock())
+            self._concurrency_limit = min(
+                float(self.max_concurrency),
+                self._concurrency_limit + self.increase / self._concurrency_limit,
+            )
+
+    def on_rate_limited(self, delay: float):
+        """Records a 429: multiplicative decrease and a pause of `delay` seconds for everyone."""
+        with self._lock:
+            self.rate_limited_count += 1
+            self._concurrency_limit = max(
+                float(self.min_concurrency), self._concurrency_limit * self.decrease
+            )
+            self._blocked_until = max(self._blocked_until, self._clock() + delay)
+        logger.warning(
+            f"Rate limited; pausing for {delay:.2f}s with concurrency limit {self.concurrency_limit}"
+        )
+
+    def _handle_error(self, error: Exception, attempt: int) -> float:
+        """
+        Raises the error unless the call is to be retried, otherwise returns the seconds the
+        failing caller waits before retrying.
+        """
+        rate_limited = is_rate_limit_error(error)
+        if (
+            not (rate_limited or is_transient_error(error))
+            or attempt >= self.max_retries
+        ):
+            raise error
+        delay = retry_after_seconds(error)
+        if delay is None:
+            delay = backoff_delay(attempt, self.backoff_base, self.backoff_max)
+        if rate_limited:
+            # Every caller waits out a 429, through the pause in `_reserve`
+            self.on_rate_limited(delay)
+            return 0.0
+        logger.warning(f"Transient error; retrying in {delay:.2f}s: {error}")
+        return delay
+
+    def call(self, fn: Callable, estimated_tokens: int = 0):
+        """
+        Calls `fn` within the limits, retrying it when the provider responds with a 429 or
+        the request fails transiently.
+
+        :param fn: A callable sending one request to the provider.
+        :param estimated_tokens: The tokens the request is expected to consume.
+        :return: The result of `fn`.
+        :raises Exception: The last error if it is not retried or the retries are exhausted.
+        """
+        attempt = 0
+        while True:
+            self.acquire(estimated_tokens)
+            try:
+                response = fn()
+            except Exception as e:
+                self.release(estimated_tokens)
+                delay = self._handle_error(e, attempt)
+                attempt += 1
+                if delay:
+                    time.sleep(delay)
+                continue
+            self.release(estimated_tokens, _tokens_used(response))
+            self.on_success()
+            return response
+
+    async def acall(self, fn: Callable[[], Awaitable], estimated_tokens: int = 0):
+        """
+        Awaits `fn()` within the limits, retrying it when the provider responds with a 429 or
+        the request fails transiently.
+
+        :param fn: A callable returning an awaitable that sends one request to the provider.
+        :param estimated_tokens: The tokens the request is expected to consume.
+        :return: The result of the awaitable.
+        :raises Exception: The last error if it is not retried or the retries are exhausted.
+        """
+        attempt = 0
+        while True:
+            await self.aacquire(estimated_tokens)
+            try:
+                response = await fn()
+            except Exception as e:
+                self.release(estimated_tokens)
+                delay = self._handle_error(e, attempt)
+                attempt += 1
+                if delay:
+                    await asyncio.sleep(delay)
+                continue
+            self.release(estimated_tokens, _tokens_used(response))
+            self.on_success()
+            return response
+
+
+def estimate_tokens(prompt: str, max_tokens: Optional[int] = None, n: int = 1) -> int:
+    """
+    Roughly estimates the tokens a chat request will consume, prompt plus completions.
+
+    Uses the common approximation of four characters per token; the bucket is reconciled with
+    the provider's reported usage once the response arrives. A request for `n` completions
+    sends the prompt once.
+    """
+    return len(prompt) // 4 + n * (max_tokens or 256)
+
+
+_rate_limiters = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(
+    provider: str,
+    requests_per_minute: Optional[float] = None,
+    tokens_per_minute: Optional[float] = None,
+) -> RateLimiter:
+    """
+    Returns the rate limiter shared by all clients of a provider, creating it if needed.
+
+    :param provider: The provider name, e.g. 'openai'. Case-insensitive.
+    :param requests_per_minute: If given, (re)configures the provider's request budget.
+    :param tokens_per_minute: If given, (re)configures the provider's token budget.
+    :return: The shared RateLimiter.
+    """
+    key = provider.lower()
+    with _rate_limiters_lock:
+        limiter = _rate_limiters.get(key)
+        if limiter is None:
+            limiter = _rate_limiters[key] = RateLimiter()
+    if requests_per_minute is not None or tokens_per_minute is not None:
+        limiter.configure(requests_per_minute, tokens_per_minute)
+    return limiter
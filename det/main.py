@@ -1,15 +1,44 @@
 # det/main.py
 
+import asyncio
+import os
 import re
 import typer
 from rich.console import Console
 from rich.progress import Progress
-
+from rich.table import Table
+
+from det.cassette import (
+    CASSETTE_MODES,
+    Cassette,
+    CassetteChainClient,
+    CassetteEmbeddingGenerator,
+    CassetteLLMClient,
+    chain_namespace,
+)
 from det.det_response.analysis import ResponseAnalysis
 from det.det_response.presentation import ResponsePresenter
 from det.det_response.semantic_distance import SemanticDistanceCalculator
+from det.det_response.sequential import (
+    CONSISTENCY_METRICS,
+    SequentialConsistencyMonitor,
+)
+from det.embeddings.cache import cache_key, embedding_namespace
+from det.embeddings.store import (
+    EVICTION_POLICIES,
+    STORE_DTYPES,
+    EmbeddingStore,
+    copy_entries,
+    is_legacy_pickle,
+    namespace_of,
+    open_embedding_store,
+    read_legacy_pickle,
+)
 from det.helpers import get_embedding_generator_adapter, get_llm_client, dynamic_import
 from det.llm.llm_langchain import LangChainClient, ResponseGenerationError
+from det.llm.rate_limit import get_rate_limiter
+from det.runner import arun_iterations, run_iterations
+from det.stub_server import LATENCY_DISTRIBUTIONS, create_stub_server
 
 app = typer.Typer()
 
@@ -48,9 +77,99 @@ def parse_input_variables(input_vars_str: str) -> dict:
     return result
 
 
+def validate_cassette_mode(mode: str) -> str:
+    if mode not in CASSETTE_MODES:
+        raise typer.BadParameter(f"must be one of {', '.join(CASSETTE_MODES)}")
+    return mode
+
+
+def cache_kwargs(
+    cache_file_path: str,
+    max_entries: int,
+    max_bytes: int,
+    eviction: str,
+    dtype: str = "float32",
+) -> dict:
+    """Returns the embedding adapter options for the embeddings cache."""
+    if eviction not in EVICTION_POLICIES:
+        raise typer.BadParameter(
+            f"eviction must be one of {', '.join(EVICTION_POLICIES)}"
+        )
+    if dtype not in STORE_DTYPES:
+        raise typer.BadParameter(f"dtype must be one of {', '.join(STORE_DTYPES)}")
+    cache_options = {"max_entries": max_entries, "max_bytes": max_bytes}
+    cache_options = {
+        name: value for name, value in cache_options.items() if value is not None
+    }
+    if eviction != "lru":
+        cache_options["eviction"] = eviction
+    if dtype != "float32":
+        cache_options["dtype"] = dtype
+    kwargs = {"cache_file_path": cache_file_path} if cache_file_path else {}
+    if cache_options:
+        kwargs["cache_options"] = cache_options
+    return kwargs
+
+
+def base_url_kwargs(embeddings_provider: str, base_url: str) -> dict:
+    """Returns the embedding adapter option pointing it at another endpoint."""
+    if base_url is None:
+        return {}
+    # Local embeddings make no network calls
+    if embeddings_provider not in ("OpenAI", "Ollama"):
+        raise typer.BadParameter(
+            f"--embeddings-base-url is only supported by the OpenAI and Ollama embeddings providers, not {embeddings_provider}"
+        )
+    return {"base_url": base_url}
+
+
+def dimensions_kwargs(embeddings_provider: str, dimensions: int) -> dict:
+    """Returns the embedding adapter option reducing the dimensions of the embeddings."""
+    if dimensions is None:
+        return {}
+    if embeddings_provider != "OpenAI":
+        raise typer.BadParameter(
+            f"--embeddings-dimensions is only supported by the OpenAI embeddings provider, not {embeddings_provider}"
+        )
+    return {"dimensions": dimensions}
+
+
+def get_embedding_generator(
+    embeddings_provider: str,
+    embeddings_model: str,
+    cassette: Cassette = None,
+    **adapter_kwargs,
+):
+    """
+    Returns the embedding generator adapter for the provider, recording its embeddings to
+    the cassette if one is given, or a generator replaying them from a cassette in replay mode.
+    """
+    # Reduced embeddings are recorded apart from full-size ones, as they are cached
+    dimensions = adapter_kwargs.get("dimensions")
+    cassette_model = embedding_namespace(embeddings_model, dimensions)
+    if cassette is not None and not cassette.recording:
+        # Every embedding is served from the cassette, so neither a provider client nor
+        # an embeddings cache is built and replay needs no network or disk access
+        return CassetteEmbeddingGenerator(cassette, cassette_model)
+    adapter = get_embedding_generator_adapter(
+        embeddings_provider, embeddings_model, **adapter_kwargs
+    )
+    if cassette is None:
+        return adapter
+    # Recorded above the embeddings cache, so embeddings the cache already holds are
+    # on the cassette too
+    return CassetteEmbeddingGenerator(cassette, cassette_model, adapter)
+
+
 @app.command()
 def check_responses(
-    iterations: int = typer.Option(10, help="Number of iterations to check responses"),
+    iterations: int = typer.Option(
+        10,
+        "--iterations",
+        "--max-iterations",
+        min=1,
+        help="Number of iterations to check responses; the cap when --adaptive",
+    ),
     llm_provider: str = typer.Option(..., help="LLM provider, e.g., 'OpenAI'"),
     llm_model: str = typer.Option(..., help="LLM model, e.g., 'gpt-3.5-turbo'"),
     embeddings_provider: str = typer.Option(
@@ -59,6 +178,93 @@ def check_responses(
     embeddings_model: str = typer.Option(
         ..., help="Embeddings model, e.g., 'text-embedding-ada-002'"
     ),
+    embeddings_dimensions: int = typer.Option(
+        None,
+        min=1,
+        help="Reduce the embeddings to this many dimensions, e.g., 256 (OpenAI text-embedding-3 models)",
+    ),
+    concurrency: int = typer.Option(
+        1, min=1, help="Number of iterations to run in parallel"
+    ),
+    requests_per_minute: float = typer.Option(
+        None, help="Request budget for the LLM provider, e.g., 500"
+    ),
+    tokens_per_minute: float = typer.Option(
+        None, help="Token budget for the LLM provider, e.g., 200000"
+    ),
+    samples_per_request: int = typer.Option(
+        1,
+        min=1,
+        help="Responses to request per call using the provider's `n` parameter",
+    ),
+    base_url: str = typer.Option(
+        None,
+        help="Alternative API endpoint for the LLM provider, e.g., det stub-server",
+    ),
+    embeddings_base_url: str = typer.Option(
+        None, help="Alternative API endpoint for the embeddings provider"
+    ),
+    embeddings_cache: str = typer.Option(
+        None,
+        help="Embeddings cache file, shareable between processes; .sqlite or .db uses SQLite",
+    ),
+    embeddings_cache_max_entries: int = typer.Option(
+        None, min=1, help="Most embeddings to keep in the cache"
+    ),
+    embeddings_cache_max_bytes: int = typer.Option(
+        None, min=1, help="Most vector bytes to keep in the cache"
+    ),
+    embeddings_cache_eviction: str = typer.Option(
+        "lru",
+        help=f"Eviction policy beyond the cache limits, one of: {', '.join(EVICTION_POLICIES)}",
+    ),
+    embeddings_cache_dtype: str = typer.Option(
+        "float32",
+        help=f"How new embeddings are stored in the cache, one of: {', '.join(STORE_DTYPES)}",
+    ),
+    cassette_path: str = typer.Option(
+        None, "--cassette", help="File to record responses to or replay them from"
+    ),
+    cassette_mode: str = typer.Option(
+        "record",
+        callback=validate_cassette_mode,
+        help="'record' calls the providers and saves the responses, 'replay' serves them offline",
+    ),
+    adaptive: bool = typer.Option(
+        False,
+        help="Stop early once the consistency metric is known to within --precision",
+    ),
+    precision: float = typer.Option(
+        0.05, help="Target half-width of the 95% confidence interval when --adaptive"
+    ),
+    consistency_metric: str = typer.Option(
+        "agreement",
+        help=f"Metric to estimate when --adaptive, one of: {', '.join(CONSISTENCY_METRICS)}",
+    ),
+    min_iterations: int = typer.Option(
+        10, min=1, help="Fewest iterations to run before stopping when --adaptive"
+    ),
+    baseline: str = typer.Option(
+        "first",
+        help="Response the others are compared to: 'first', or 'medoid' for the most central one",
+    ),
+    pairwise_summary: bool = typer.Option(
+        False,
+        help="Summarise the similarity of every pair of responses; shown anyway with --baseline medoid",
+    ),
+    cluster_threshold: float = typer.Option(
+        None,
+        min=-1.0,
+        max=1.0,
+        help="Cluster the responses into modes whose members are at least this similar, e.g., 0.9",
+    ),
+    cluster_min_samples: int = typer.Option(
+        1, min=1, help="Fewest similar responses for a cluster core; the rest are noise"
+    ),
+    near_duplicate_threshold: float = typer.Option(
+        None,
+        help="Embed one response per group of lexical near-duplicates this similar, e.g., 0.8",
+    ),
 ):
     """
     Check the consistency of responses from a language model.
@@ -66,17 +272,51 @@ def check_responses(
     This command generates multiple responses using the specified LLM and analyzes
     their semantic similarity. It's useful for assessing the determinism and
     consistency of language model outputs.
+
+    With --adaptive, responses are generated in rounds and generation stops as soon
+    as the consistency metric is known to within --precision, or after
+    --max-iterations responses.
     """
 
-    responses = []
     console = Console()
 
-    # get the LLM client
-    client = get_llm_client(llm_provider, llm_model)
+    # Configure the rate limiter shared by the provider's clients
+    rate_limiter = get_rate_limiter(
+        llm_provider,
+        requests_per_minute=requests_per_minute,
+        tokens_per_minute=tokens_per_minute,
+    )
+
+    cassette = Cassette(cassette_path, mode=cassette_mode) if cassette_path else None
+
+    client_kwargs = {"base_url": base_url} if base_url else {}
+    adapter_kwargs = cache_kwargs(
+        embeddings_cache,
+        embeddings_cache_max_entries,
+        embeddings_cache_max_bytes,
+        embeddings_cache_eviction,
+        embeddings_cache_dtype,
+    )
+    adapter_kwargs.update(base_url_kwargs(embeddings_provider, embeddings_base_url))
+    adapter_kwargs.update(dimensions_kwargs(embeddings_provider, embeddings_dimensions))
+
+    # get the LLM client, recording to or replaying from the cassette if one is given
+    if cassette is None:
+        client = get_llm_client(llm_provider, llm_model, **client_kwargs)
+    else:
+        client = CassetteLLMClient(
+            cassette,
+            client=(
+                get_llm_client(llm_provider, llm_model, **client_kwargs)
+                if cassette.recording
+                else None
+            ),
+            namespace=f"{llm_provider}/{llm_model}",
+        )
 
     # Dynamic selection of the embedding generator based on the provider
-    embedding_generator_adapter = get_embedding_generator_adapter(
-        embeddings_provider, embeddings_model
+    embedding_generator_adapter = get_embedding_generator(
+        embeddings_provider, embeddings_model, cassette, **adapter_kwargs
     )
 
     # Initialize the SemanticDistanceCalculator with the adapter
@@ -84,24 +324,129 @@ def check_responses(
         embedding_generator=embedding_generator_adapter
     )
 
-    with Progress() as progress:
-        for _ in progress.track(range(iterations), description="Processing..."):
-            response = client.generate_response(
-                prompt="This is a test of determinism. Will you always respond the same?",
-                temperature=0,
-                max_tokens=256,
-                top_p=1,
-                frequency_penalty=0,
-                presence_penalty=0,
-            )
-            responses.append(response)
+    generation_kwargs = dict(
+        prompt="This is a test of determinism. Will you always respond the same?",
+        temperature=0,
+        max_tokens=256,
+        top_p=1,
+        frequency_penalty=0,
+        presence_penalty=0,
+    )
 
-    console.print("The first response:", style="bold underline")
-    console.print(responses[0])
+    def generate(count: int, on_advance) -> list:
+        # Split the iterations into requests of up to `samples_per_request` responses each
+        chunks = [samples_per_request] * (count // samples_per_request)
+        if count % samples_per_request:
+            chunks.append(count % samples_per_request)
+        if concurrency > 1:
+            # Drive all in-flight requests from one event loop
+            results = loop.run_until_complete(
+                arun_iterations(
+                    lambda i: client.agenerate_responses(
+                        n=chunks[i], **generation_kwargs
+                    ),
+                    len(chunks),
+                    concurrency=concurrency,
+                    on_complete=lambda i: on_advance(chunks[i]),
+                )
+            )
+        else:
+            results = run_iterations(
+                lambda i: client.generate_responses(n=chunks[i], **generation_kwargs),
+                len(chunks),
+                on_complete=lambda i: on_advance(chunks[i]),
+            )
+        return [response for chunk in results for response in chunk]
+
+    try:
+        analysis = ResponseAnalysis(
+            [],
+            semantic_distance_calculator,
+            baseline=baseline,
+            near_duplicate_threshold=near_duplicate_threshold,
+        )
+    except ValueError as e:
+        raise typer.BadParameter(str(e))
+    monitor = None
+    if adaptive:
+        try:
+            monitor = SequentialConsistencyMonitor(
+                analysis,
+                metric=consistency_metric,
+                precision=precision,
+                min_iterations=min(min_iterations, iterations),
+            )
+        except ValueError as e:
+            raise typer.BadParameter(str(e))
+        # Each round keeps every concurrent slot busy with full requests
+        round_size = concurrency * samples_per_request
+
+    generated = 0
+    failed = 0
+    # Every round runs in the same event loop, as the async clients' connections are
+    # bound to the loop they were opened in
+    loop = asyncio.new_event_loop() if concurrency > 1 else None
+    try:
+        with Progress() as progress:
+            task = progress.add_task("Processing...", total=iterations)
+            while generated < iterations:
+                if monitor is None:
+                    count = iterations
+                else:
+                    count = max(
+                        round_size, monitor.min_iterations - len(analysis.responses)
+                    )
+                    count = min(count, iterations - generated)
+                responses = generate(count, lambda n: progress.advance(task, n))
+                generated += count
+                failed += sum(1 for response in responses if response is None)
+                if monitor is None:
+                    analysis.add_responses(
+                        [response for response in responses if response is not None]
+                    )
+                else:
+                    monitor.update(responses)
+                    if monitor.should_stop:
+                        progress.update(task, total=generated)
+                        break
+    finally:
+        if loop is not None:
+            loop.run_until_complete(loop.shutdown_asyncgens())
+            loop.close()
+    responses = analysis.responses
+
+    if failed:
+        console.print(
+            f"[bold red]Warning![/bold red] Failed to get a response for [bold yellow]{failed}[/bold yellow] of {generated} iterations"
+        )
+    if monitor is not None and monitor.estimate is not None:
+        low, high = monitor.interval
+        console.print(
+            f"Stopped after {generated} of at most {iterations} iterations: "
+            f"{monitor.metric} {monitor.estimate:.3f} ({monitor.confidence:.0%} interval {low:.3f} to {high:.3f})"
+        )
+    if rate_limiter.rate_limited_count:
+        stats = rate_limiter.stats()
+        console.print(
+            f"Rate limited {stats['rate_limited']} times; "
+            f"{stats['current_rate']:.0f} requests/min at concurrency limit {stats['concurrency_limit']}"
+        )
+
+    if not responses:
+        console.print("[bold red]Error![/bold red] No responses to analyse")
+        raise typer.Exit(code=1)
+
+    console.print(f"The {baseline} response:", style="bold underline")
+    console.print(analysis.base_response)
 
-    analysis = ResponseAnalysis(responses, semantic_distance_calculator)
     presenter = ResponsePresenter(analysis, None)
     presenter.display_responses_and_differences_table()
+    # Every pair of responses is embedded and compared, which a medoid baseline has done anyway
+    if pairwise_summary or baseline == "medoid":
+        presenter.display_pairwise_summary()
+    presenter.display_near_duplicates()
+    if cluster_threshold is not None:
+        presenter.display_clusters(cluster_threshold, cluster_min_samples)
 
 
 @app.command()
@@ -121,6 +466,67 @@ def check_chain(
     embeddings_model: str = typer.Option(
         ..., help="Embeddings model, e.g., 'text-embedding-ada-002'"
     ),
+    embeddings_dimensions: int = typer.Option(
+        None,
+        min=1,
+        help="Reduce the embeddings to this many dimensions, e.g., 256 (OpenAI text-embedding-3 models)",
+    ),
+    concurrency: int = typer.Option(
+        1, min=1, help="Number of chain invocations to run in parallel"
+    ),
+    embeddings_cache: str = typer.Option(
+        None,
+        help="Embeddings cache file, shareable between processes; .sqlite or .db uses SQLite",
+    ),
+    embeddings_cache_max_entries: int = typer.Option(
+        None, min=1, help="Most embeddings to keep in the cache"
+    ),
+    embeddings_cache_max_bytes: int = typer.Option(
+        None, min=1, help="Most vector bytes to keep in the cache"
+    ),
+    embeddings_cache_eviction: str = typer.Option(
+        "lru",
+        help=f"Eviction policy beyond the cache limits, one of: {', '.join(EVICTION_POLICIES)}",
+    ),
+    embeddings_cache_dtype: str = typer.Option(
+        "float32",
+        help=f"How new embeddings are stored in the cache, one of: {', '.join(STORE_DTYPES)}",
+    ),
+    attempt_timeout: float = typer.Option(
+        None, help="Seconds allowed for each attempt of an iteration"
+    ),
+    deadline: float = typer.Option(
+        None, help="Seconds allowed for all attempts of an iteration"
+    ),
+    cassette_path: str = typer.Option(
+        None, "--cassette", help="File to record responses to or replay them from"
+    ),
+    cassette_mode: str = typer.Option(
+        "record",
+        callback=validate_cassette_mode,
+        help="'record' calls the providers and saves the responses, 'replay' serves them offline",
+    ),
+    baseline: str = typer.Option(
+        "first",
+        help="Response the others are compared to: 'first', or 'medoid' for the most central one",
+    ),
+    pairwise_summary: bool = typer.Option(
+        False,
+        help="Summarise the similarity of every pair of responses; shown anyway with --baseline medoid",
+    ),
+    cluster_threshold: float = typer.Option(
+        None,
+        min=-1.0,
+        max=1.0,
+        help="Cluster the responses into modes whose members are at least this similar, e.g., 0.9",
+    ),
+    cluster_min_samples: int = typer.Option(
+        1, min=1, help="Fewest similar responses for a cluster core; the rest are noise"
+    ),
+    near_duplicate_threshold: float = typer.Option(
+        None,
+        help="Embed one response per group of lexical near-duplicates this similar, e.g., 0.8",
+    ),
 ):
     """
     Run a LangChain-based Structured Output prompt chain and analyze the consistency of responses.
@@ -136,28 +542,80 @@ def check_chain(
     # Ensure input_variables are parsed and used to configure the LangChainClient
     input_variables = parse_input_variables(input_variables_str)
 
-    lang_chain_client = LangChainClient(prompts_file_path=prompt_config)
-    lang_chain_client.configure_chain(
-        prompt_group=prompt_group,
-        input_variables=input_variables,
+    # Checked before any responses are generated
+    adapter_kwargs = cache_kwargs(
+        embeddings_cache,
+        embeddings_cache_max_entries,
+        embeddings_cache_max_bytes,
+        embeddings_cache_eviction,
+        embeddings_cache_dtype,
     )
+    adapter_kwargs.update(dimensions_kwargs(embeddings_provider, embeddings_dimensions))
 
+    lang_chain_client = LangChainClient(
+        prompts_file_path=prompt_config,
+        attempt_timeout=attempt_timeout,
+        deadline=deadline,
+    )
+    cassette = Cassette(cassette_path, mode=cassette_mode) if cassette_path else None
+
+    # Replaying needs no configured chain, so no LLM is built
+    if cassette is None or cassette.recording:
+        lang_chain_client.configure_chain(
+            prompt_group=prompt_group,
+            input_variables=input_variables,
+        )
+    chain_client = lang_chain_client
+    if cassette is not None:
+        chain_client = CassetteChainClient(
+            cassette,
+            client=lang_chain_client if cassette.recording else None,
+            namespace=chain_namespace(
+                prompt_config,
+                prompt_group,
+                lang_chain_client.prompt_manager.get_prompts(prompt_group),
+                input_variables,
+            ),
+        )
+
+    # With a concurrency of 1 the iterations run one after another
     with Progress() as progress:
-        for iteration in progress.track(range(iterations), description="Processing..."):
-            try:
-                response = lang_chain_client.generate_response()
-                responses.append(response)
-            except ResponseGenerationError:
-                console.print(
-                    f"[bold red]Warning![/bold red] Failed to get a valid response for iteration [bold yellow]{iteration + 1}[/bold yellow]"
-                )
-
-    console.print("The first response:", style="bold underline")
-    console.print(responses[0])
+        task = progress.add_task("Processing...", total=iterations)
+        results = chain_client.generate_responses(
+            iterations,
+            max_concurrency=concurrency,
+            on_complete=lambda _: progress.advance(task),
+        )
+    attempt_counts = []
+    for iteration, (result, attempts) in enumerate(results):
+        attempt_counts.append(attempts)
+        if isinstance(result, ResponseGenerationError):
+            console.print(
+                f"[bold red]Warning![/bold red] Failed to get a valid response for iteration [bold yellow]{iteration + 1}[/bold yellow]"
+            )
+        else:
+            responses.append(result)
+
+    repairer = lang_chain_client.output_repairer
+    if repairer and repairer.repairs_attempted:
+        console.print(
+            f"Repaired {repairer.repairs_succeeded} of {repairer.repairs_attempted} malformed outputs locally, "
+            f"saving {repairer.llm_calls_saved} LLM calls"
+        )
+    # Replayed iterations have no attempt counts
+    retried = sum(1 for attempts in attempt_counts if attempts and attempts > 1)
+    if retried:
+        console.print(
+            f"{retried} iterations needed retries; attempts per iteration: {attempt_counts}"
+        )
+
+    if not responses:
+        console.print("[bold red]Error![/bold red] No responses to analyse")
+        raise typer.Exit(code=1)
 
     # Dynamic selection of the embedding generator based on the provider
-    embedding_generator_adapter = get_embedding_generator_adapter(
-        embeddings_provider, embeddings_model
+    embedding_generator_adapter = get_embedding_generator(
+        embeddings_provider, embeddings_model, cassette, **adapter_kwargs
     )
 
     # Initialize the SemanticDistanceCalculator with the adapter
@@ -165,7 +623,18 @@ def check_chain(
         embedding_generator=embedding_generator_adapter
     )
 
-    analysis = ResponseAnalysis(responses, semantic_distance_calculator)
+    try:
+        analysis = ResponseAnalysis(
+            responses,
+            semantic_distance_calculator,
+            baseline=baseline,
+            near_duplicate_threshold=near_duplicate_threshold,
+        )
+    except ValueError as e:
+        raise typer.BadParameter(str(e))
+
+    console.print(f"The {baseline} response:", style="bold underline")
+    console.print(analysis.base_response)
     # console.print(analysis.deep_diff_responses(), width=120)
 
     pydantic_object = None
@@ -184,6 +653,233 @@ def check_chain(
     # Analyse the responses and then present the similarty scores
     analysis.deep_diff_responses()
     presenter.display_semantic_similarity_table()
+    # Every pair of responses is embedded and compared, which a medoid baseline has done anyway
+    if pairwise_summary or baseline == "medoid":
+        presenter.display_pairwise_summary()
+    presenter.display_near_duplicates()
+    if cluster_threshold is not None:
+        presenter.display_clusters(cluster_threshold, cluster_min_samples)
+
+
+@app.command()
+def stub_server(
+    host: str = typer.Option("127.0.0.1", help="Interface to listen on"),
+    port: int = typer.Option(8000, help="Port to listen on"),
+    latency_ms: float = typer.Option(0.0, help="Mean response latency in milliseconds"),
+    latency_distribution: str = typer.Option(
+        "constant", help=f"One of: {', '.join(LATENCY_DISTRIBUTIONS)}"
+    ),
+    rate_limit_probability: float = typer.Option(
+        0.0, min=0.0, max=1.0, help="Share of requests answered with a 429"
+    ),
+    retry_after: float = typer.Option(
+        1.0, help="Retry-After seconds sent with injected 429s"
+    ),
+    variants: int = typer.Option(
+        1, min=1, help="Number of distinct chat responses to choose from"
+    ),
+    embedding_dimensions: int = typer.Option(
+        1536, help="Default dimension of the embeddings"
+    ),
+    seed: int = typer.Option(None, help="Seed for repeatable runs"),
+):
+    """
+    Run a local OpenAI-compatible stand-in server for offline load testing.
+
+    Point clients at it with --base-url and --embeddings-base-url, e.g.
+    http://127.0.0.1:8000/v1 (for Groq omit the /v1).
+    """
+    console = Console()
+    try:
+        server = create_stub_server(
+            host,
+            port,
+            latency_ms=latency_ms,
+            latency_distribution=latency_distribution,
+            rate_limit_probability=rate_limit_probability,
+            retry_after=retry_after,
+            variants=variants,
+            embedding_dimensions=embedding_dimensions,
+            seed=seed,
+        )
+    except ValueError as e:
+        raise typer.BadParameter(str(e))
+    console.print(f"Stub server listening on [bold]{server.base_url}[/bold]")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        console.print(
+            f"Served {server.config.requests} requests, {server.config.rate_limited} rate limited"
+        )
+
+
+cache_app = typer.Typer(help="Inspect and maintain an embeddings cache.")
+app.add_typer(cache_app, name="cache")
+
+DEFAULT_CACHE_PATH = "embeddings_cache.pkl"
+
+
+def open_cache(path: str) -> EmbeddingStore:
+    if not os.path.exists(path):
+        raise typer.BadParameter(f"No embeddings cache at {path}")
+    if is_legacy_pickle(path):
+        # Opening it here would migrate it without knowing its model
+        raise typer.BadParameter(
+            f"{path} is a pickle cache from an older version; import it with "
+            "'det cache import' and --model"
+        )
+    return open_embedding_store(path)
+
+
+@cache_app.command("stats")
+def cache_stats(
+    path: str = typer.Argument(DEFAULT_CACHE_PATH, help="The embeddings cache file"),
+):
+    """
+    Show the entries, size, hit rate and per-model breakdown of a cache.
+    """
+    console = Console()
+    store = open_cache(path)
+    stats = store.stats()
+    hit_rate = f"{stats['hit_rate']:.1%}" if stats["hit_rate"] is not None else "N/A"
+    console.print(
+        f"{stats['entries']} embeddings, {stats['bytes'] / 1e6:.1f} MB of vectors, "
+        f"{stats['disk_bytes'] / 1e6:.1f} MB on disk ({stats['reclaimable_bytes'] / 1e6:.1f} MB reclaimable)"
+    )
+    console.print(
+        f"Hit rate {hit_rate} ({stats['hits']} hits, {stats['misses']} misses)"
+    )
+
+    table = Table(title="Embeddings per Model")
+    table.add_column("Model", style="cyan")
+    table.add_column("Entries", justify="right")
+    table.add_column("MB", justify="right")
+    table.add_column("Uses", justify="right")
+    for model, model_stats in sorted(stats["models"].items()):
+        table.add_row(
+            model or "(unnamespaced)",
+            str(model_stats["entries"]),
+            f"{model_stats['bytes'] / 1e6:.1f}",
+            str(model_stats["uses"]),
+        )
+    console.print(table)
+    store.close()
+
+
+@cache_app.command("prune")
+def cache_prune(
+    path: str = typer.Argument(DEFAULT_CACHE_PATH, help="The embeddings cache file"),
+    max_entries: int = typer.Option(None, min=0, help="Most embeddings to keep"),
+    max_bytes: int = typer.Option(None, min=0, help="Most vector bytes to keep"),
+    policy: str = typer.Option(
+        "lru", help=f"Which embeddings to evict, one of: {', '.join(EVICTION_POLICIES)}"
+    ),
+    model: str = typer.Option(None, help="Remove every embedding of this model"),
+    compact: bool = typer.Option(True, help="Reclaim the freed space afterwards"),
+):
+    """
+    Evict embeddings beyond a size or entry limit, or all embeddings of a model.
+    """
+    console = Console()
+    store = open_cache(path)
+    removed = 0
+    if model is not None:
+        keys = [key for key in store.keys() if namespace_of(key) == model]
+        store.delete_many(keys)
+        removed += len(keys)
+    if max_entries is not None or max_bytes is not None:
+        try:
+            removed += store.evict(max_entries, max_bytes, policy)
+        except ValueError as e:
+            raise typer.BadParameter(str(e))
+    if compact:
+        store.compact()
+    console.print(f"Removed {removed} embeddings, {len(store)} remain")
+    store.close()
+
+
+@cache_app.command("compact")
+def cache_compact(
+    path: str = typer.Argument(DEFAULT_CACHE_PATH, help="The embeddings cache file"),
+):
+    """
+    Reclaim the disk space of evicted and overwritten embeddings.
+    """
+    console = Console()
+    store = open_cache(path)
+    before = store.disk_bytes()
+    store.compact()
+    console.print(
+        f"Compacted {path}: {before / 1e6:.1f} MB to {store.disk_bytes() / 1e6:.1f} MB"
+    )
+    store.close()
+
+
+@cache_app.command("export")
+def cache_export(
+    destination: str = typer.Argument(
+        ..., help="The new cache file; .sqlite or .db exports to SQLite"
+    ),
+    path: str = typer.Option(DEFAULT_CACHE_PATH, help="The embeddings cache file"),
+    model: str = typer.Option(None, help="Only export the embeddings of this model"),
+    dtype: str = typer.Option(
+        "float32",
+        help=f"How the exported embeddings are stored, one of: {', '.join(STORE_DTYPES)}",
+    ),
+):
+    """
+    Copy the embeddings of a cache into another cache file, quantising them with --dtype.
+    """
+    console = Console()
+    if os.path.exists(destination):
+        raise typer.BadParameter(f"{destination} already exists")
+    if dtype not in STORE_DTYPES:
+        raise typer.BadParameter(f"dtype must be one of {', '.join(STORE_DTYPES)}")
+    store = open_cache(path)
+    exported = open_embedding_store(destination, dtype=dtype)
+    count = copy_entries(store, exported, namespace=model)
+    exported.close()
+    store.close()
+    console.print(f"Exported {count} embeddings to {destination}")
+
+
+@cache_app.command("import")
+def cache_import(
+    source: str = typer.Argument(
+        ...,
+        help="The cache file to import, including a pickle cache from older versions",
+    ),
+    path: str = typer.Option(DEFAULT_CACHE_PATH, help="The embeddings cache file"),
+    model: str = typer.Option(
+        None,
+        help="Only import the embeddings of this model; required for a pickle cache, "
+        "which does not record its model",
+    ),
+):
+    """
+    Merge the embeddings of another cache file into a cache.
+    """
+    console = Console()
+    if not os.path.exists(source):
+        raise typer.BadParameter(f"No embeddings cache at {source}")
+    store = open_embedding_store(path)
+    if is_legacy_pickle(source):
+        if model is None:
+            raise typer.BadParameter("--model is required to import a pickle cache")
+        legacy = read_legacy_pickle(source)
+        store.put_many(
+            (cache_key(model, text), embedding) for text, embedding in legacy.items()
+        )
+        count = len(legacy)
+    else:
+        imported = open_embedding_store(source)
+        count = copy_entries(imported, store, namespace=model)
+        imported.close()
+    store.close()
+    console.print(f"Imported {count} embeddings into {path}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,298 @@
+"""
+Stub Server Module
+
+# stub_server.py
+
+This module provides a local stand-in for an OpenAI-compatible API, so the concurrency, rate
+limiting and batching behaviour of `OpenAIClient`, `GroqClient` and `OpenAIEmbeddingGenerator`
+can be load tested offline and repeatably. It implements:
+
+    - `GET  /v1/models`
+    - `POST /v1/chat/completions`, including `n` completions per request
+    - `POST /v1/embeddings`, including `dimensions` and the SDK's base64 encoding
+
+Groq's `/openai/v1/...` paths are served as well. Responses are drawn from a configurable number
+of variants, latency is sampled from a configurable distribution, and a configurable share of
+requests is answered with a 429 carrying a `Retry-After` header.
+
+Example usage:
+
+    det stub-server --port 8000 --latency-ms 200 --latency-distribution lognormal \
+        --rate-limit-probability 0.05 --variants 3
+
+    export OPENAI_API_KEY=stub
+    det check-responses --llm-provider OpenAI --llm-model stub \
+        --base-url http://127.0.0.1:8000/v1 \
+        --embeddings-provider OpenAI --embeddings-model stub \
+        --embeddings-base-url http://127.0.0.1:8000/v1 \
+        --iterations 200 --concurrency 32
+
+or from Python:
+
+    from det.stub_server import create_stub_server
+
+    server = create_stub_server(port=0, latency_ms=50)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    client = OpenAIClient(model="stub", api_key="stub", base_url=server.base_url)
+
+Embeddings are derived from a digest of the text, so identical texts always get identical vectors
+and different texts get different ones.
+"""
+
+import base64
+import hashlib
+import json
+import logging
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+LATENCY_DISTRIBUTIONS = ("constant", "uniform", "exponential", "lognormal")
+
+
+class StubServerConfig:
+    """
+    The behaviour of the stub server.
+    """
+
+    def __init__(
+        self,
+        latency_ms: float = 0.0,
+        latency_distribution: str = "constant",
+        latency_sigma: float = 0.5,
+        rate_limit_probability: float = 0.0,
+        retry_after: float = 1.0,
+        variants: int = 1,
+        embedding_dimensions: int = 1536,
+        models: tuple = ("stub",),
+        seed: int = None,
+    ):
+        """
+        :param latency_ms: The mean latency of a response in milliseconds.
+        :param latency_distribution: One of 'constant', 'uniform' (0 to twice the mean),
+            'exponential' or 'lognormal'.
+        :param latency_sigma: The shape of the lognormal distribution.
+        :param rate_limit_probability: The share of requests answered with a 429.
+        :param retry_after: The `Retry-After` value sent with a 429, in seconds.
+        :param variants: The number of distinct chat responses to choose from.
+        :param embedding_dimensions: The default dimension of the embeddings.
+        :param models: The model ids listed by `/v1/models`.
+        :param seed: Seeds latency, 429 injection and variant selection for repeatable runs.
+        :raises ValueError: If the latency distribution is unknown.
+        """
+        if latency_distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(
+                f"Latency distribution must be one of {LATENCY_DISTRIBUTIONS}, got {latency_distribution}"
+            )
+        self.latency_ms = latency_ms
+        self.latency_distribution = latency_distribution
+        self.latency_sigma = latency_sigma
+        self.rate_limit_probability = rate_limit_probability
+        self.retry_after = retry_after
+        self.variants = max(1, variants)
+        self.embedding_dimensions = embedding_dimensions
+        self.models = models
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.rate_limited = 0
+
+    def sample_latency(self) -> float:
+        """Returns the latency of the next response in seconds."""
+        mean = self.latency_ms / 1000
+        if mean <= 0:
+            return 0.0
+        with self.lock:
+            if self.latency_distribution == "uniform":
+                return self.random.uniform(0, 2 * mean)
+            if self.latency_distribution == "exponential":
+                return self.random.expovariate(1 / mean)
+            if self.latency_distribution == "lognormal":
+                # Parameterised so that the distribution's mean is `mean`
+                mu = np.log(mean) - self.latency_sigma**2 / 2
+                return self.random.lognormvariate(mu, self.latency_sigma)
+        return mean
+
+    def should_rate_limit(self) -> bool:
+        with self.lock:
+            self.requests += 1
+            limited = self.random.random() < self.rate_limit_probability
+            self.rate_limited += limited
+        return limited
+
+    def choose_variant(self) -> int:
+        with self.lock:
+            return self.random.randrange(self.variants)
+
+
+def _embedding(text: str, dimensions: int) -> np.ndarray:
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+    vector = np.random.default_rng(seed).standard_normal(dimensions).astype(np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+class StubRequestHandler(BaseHTTPRequestHandler):
+    """Serves the OpenAI-compatible endpoints according to the server's config."""
+
+    protocol_version = "HTTP/1.1"
+
+    @property
+    def config(self) -> StubServerConfig:
+        return self.server.config
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+    def _path(self) -> str:
+        # Groq's SDK prefixes the OpenAI-compatible paths with /openai
+        path = self.path.split("?", 1)[0]
+        return path[len("/openai") :] if path.startswith("/openai/") else path
+
+    def _send_json(self, status: int, body: dict, headers: dict = None):
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _read_json(self) -> dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def _error(self, status: int, message: str, error_type: str, headers: dict = None):
+        error = {"message": message, "type": error_type, "param": None, "code": None}
+        self._send_json(status, {"error": error}, headers)
+
+    def do_GET(self):
+        if self._path() != "/v1/models":
+            return self._error(
+                404, f"Unknown path {self.path}", "invalid_request_error"
+            )
+        self._send_json(
+            200,
+            {
+                "object": "list",
+                "data": [
+                    {"id": model, "object": "model", "created": 0, "owned_by": "det"}
+                    for model in self.config.models
+                ],
+            },
+        )
+
+    def do_POST(self):
+        handlers = {
+            "/v1/chat/completions": self._chat_completions,
+            "/v1/embeddings": self._embeddings,
+        }
+        handler = handlers.get(self._path())
+        body = self._read_json()
+        if handler is None:
+            return self._error(
+                404, f"Unknown path {self.path}", "invalid_request_error"
+            )
+        time.sleep(self.config.sample_latency())
+        if self.config.should_rate_limit():
+            return self._error(
+                429,
+                "Rate limit reached (injected by the det stub server)",
+                "rate_limit_exceeded",
+                {"Retry-After": f"{self.config.retry_after:g}"},
+            )
+        handler(body)
+
+    def _chat_completions(self, body: dict):
+        messages = body.get("messages") or [{}]
+        prompt = str(messages[-1].get("content", ""))
+        n = int(body.get("n") or 1)
+        choices = [
+            {
+                "index": i,
+                "message": {
+                    "role": "assistant",
+                    "content": f"Stub response variant {self.config.choose_variant()} to: {prompt}",
+                },
+                "finish_reason": "stop",
+                "logprobs": None,
+            }
+            for i in range(n)
+        ]
+        prompt_tokens = len(prompt) // 4 + 1
+        completion_tokens = sum(len(c["message"]["content"]) // 4 for c in choices)
+        self._send_json(
+            200,
+            {
+                "id": f"chatcmpl-stub-{self.config.requests}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body.get("model", "stub"),
+                "choices": choices,
+                "usage": {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "total_tokens": prompt_tokens + completion_tokens,
+                },
+            },
+        )
+
+    def _embeddings(self, body: dict):
+        texts = body.get("input", [])
+        if isinstance(texts, str):
+            texts = [texts]
+        dimensions = int(body.get("dimensions") or self.config.embedding_dimensions)
+        as_base64 = body.get("encoding_format") == "base64"
+        data = []
+        for i, text in enumerate(texts):
+            vector = _embedding(str(text), dimensions)
+            embedding = (
+                base64.b64encode(vector.tobytes()).decode("ascii")
+                if as_base64
+                else vector.tolist()
+            )
+            data.append({"object": "embedding", "index": i, "embedding": embedding})
+        tokens = sum(len(str(text)) // 4 + 1 for text in texts)
+        self._send_json(
+            200,
+            {
+                "object": "list",
+                "data": data,
+                "model": body.get("model", "stub"),
+                "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+            },
+        )
+
+
+class StubServer(ThreadingHTTPServer):
+    """A threaded HTTP server carrying the stub configuration."""
+
+    daemon_threads = True
+
+    def __init__(self, address, config: StubServerConfig):
+        super().__init__(address, StubRequestHandler)
+        self.config = config
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+
+def create_stub_server(
+    host: str = "127.0.0.1", port: int = 8000, **config
+) -> StubServer:
+    """
+    Creates (but does not start) a stub server; port 0 picks a free port.
+
+    :param host: The interface to listen on.
+    :param port: The port to listen on.
+    :param config: Keyword arguments for `StubServerConfig`.
+    :return: The server; call `serve_forever()` to start it.
+    """
+    return StubServer((host, port), StubServerConfig(**config))
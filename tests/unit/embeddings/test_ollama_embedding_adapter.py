@@ -0,0 +1,84 @@
+# tests/unit/embeddings/test_ollama_embedding_adapter.py
+
+import numpy as np
+import pytest
+
+from det.embeddings.adapters import OllamaEmbeddingGeneratorAdapter
+from det.embeddings.generator import OllamaEmbeddingGenerator
+from det.helpers import get_embedding_generator_adapter
+
+
+@pytest.fixture
+def ollama_client(mocker):
+    client_class = mocker.patch("det.embeddings.generator.OllamaClient")
+    client = client_class.return_value
+    client.embed.side_effect = lambda model, input, keep_alive: {
+        "model": model,
+        "embeddings": [[float(len(text)), 0.5] for text in input],
+    }
+    return client_class
+
+
+def test_texts_are_sent_in_batches_over_one_client(ollama_client):
+    generator = OllamaEmbeddingGenerator(
+        "nomic-embed-text", host="http://box:11434", batch_size=2
+    )
+
+    embeddings = generator.generate_embeddings(["a", "bb", "ccc", "dddd", "e"])
+
+    ollama_client.assert_called_once_with(host="http://box:11434")
+    calls = ollama_client.return_value.embed.call_args_list
+    batches = [call.kwargs["input"] for call in calls]
+    assert batches == [["a", "bb"], ["ccc", "dddd"], ["e"]]
+    assert [embedding[0] for embedding in embeddings] == [1.0, 2.0, 3.0, 4.0, 1.0]
+
+
+def test_older_clients_embed_one_text_per_request(ollama_client, mocker):
+    # ollama<0.3 has no batched `embed`, only the single-prompt `embeddings`
+    client = mocker.Mock(spec=["embeddings"])
+    client.embeddings.side_effect = lambda model, prompt, keep_alive: {
+        "embedding": [float(len(prompt)), 0.5]
+    }
+    ollama_client.return_value = client
+
+    embeddings = OllamaEmbeddingGenerator(batch_size=2).generate_embeddings(
+        ["a", "bb", "ccc"]
+    )
+
+    prompts = [call.kwargs["prompt"] for call in client.embeddings.call_args_list]
+    assert prompts == ["a", "bb", "ccc"]
+    assert embeddings == [[1.0, 0.5], [2.0, 0.5], [3.0, 0.5]]
+
+
+def test_failed_requests_raise(ollama_client):
+    ollama_client.return_value.embed.side_effect = ConnectionError("refused")
+
+    with pytest.raises(ConnectionError):
+        OllamaEmbeddingGenerator().generate_embeddings(["a"])
+
+
+def test_adapter_is_selected_by_name_and_cached(ollama_client, tmp_path):
+    adapter = get_embedding_generator_adapter(
+        "Ollama", "nomic-embed-text", cache_file_path=str(tmp_path / "cache")
+    )
+    assert isinstance(adapter, OllamaEmbeddingGeneratorAdapter)
+
+    adapter.generate_embeddings(["a", "bb"])
+    embeddings = adapter.generate_embeddings(["bb", "a", "ccc"])
+
+    assert ollama_client.return_value.embed.call_count == 2
+    assert ollama_client.return_value.embed.call_args.kwargs["input"] == ["ccc"]
+    np.testing.assert_array_equal(embeddings, [[2.0, 0.5], [1.0, 0.5], [3.0, 0.5]])
+
+
+def test_cache_options_are_passed_to_the_cache(ollama_client, tmp_path):
+    adapter = get_embedding_generator_adapter(
+        "Ollama",
+        "nomic-embed-text",
+        cache_file_path=str(tmp_path / "cache.sqlite"),
+        cache_options={"max_entries": 2, "eviction": "lfu", "dtype": "float16"},
+    )
+
+    cache = adapter.embeddings_cache
+    assert (cache.max_entries, cache.eviction, cache.dtype) == (2, "lfu", "float16")
+    assert cache.namespace == "nomic-embed-text"
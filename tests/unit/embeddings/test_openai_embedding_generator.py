@@ -0,0 +1,120 @@
+# tests/unit/embeddings/test_openai_embedding_generator.py
+
+import threading
+from types import SimpleNamespace
+
+import httpx
+import numpy as np
+import openai
+import pytest
+
+from det.embeddings.generator import (
+    EmbeddingGenerationError,
+    OpenAIEmbeddingGenerator,
+    estimate_tokens,
+)
+
+
+def too_many_tokens():
+    request = httpx.Request("POST", "https://api.openai.com/v1/embeddings")
+    return openai.BadRequestError(
+        "This model's maximum context length is 8192 tokens",
+        response=httpx.Response(400, request=request),
+        body=None,
+    )
+
+
+@pytest.fixture
+def make_generator(mocker):
+    """Builds generators whose client embeds each text as [its length, 1.0]."""
+    client = mocker.patch("det.embeddings.generator.OpenAI").return_value
+    requests = []
+    lock = threading.Lock()
+
+    def create(input, model, **options):
+        with lock:
+            requests.append(list(input))
+        # The API does not promise to keep the order, only to index the results
+        data = [
+            SimpleNamespace(index=i, embedding=[float(len(text)), 1.0])
+            for i, text in enumerate(input)
+        ]
+        return SimpleNamespace(data=data[::-1])
+
+    client.embeddings.create.side_effect = create
+
+    def make(**kwargs):
+        generator = OpenAIEmbeddingGenerator(api_key="testing", **kwargs)
+        generator.requests = requests
+        return generator
+
+    return make
+
+
+def test_batches_respect_item_and_token_limits(make_generator):
+    generator = make_generator(max_batch_size=3, max_batch_tokens=30, max_concurrency=2)
+    texts = ["a" * 40, "b", "c", "d", "e", "f" * 80, "g"]
+
+    embeddings = generator.generate_embeddings(texts)
+
+    assert [embedding[0] for embedding in embeddings] == [len(text) for text in texts]
+    for batch in generator.requests:
+        assert len(batch) <= 3
+        assert sum(estimate_tokens(text) for text in batch) <= 30 or len(batch) == 1
+    assert sorted(text for batch in generator.requests for text in batch) == sorted(
+        texts
+    )
+
+
+def test_over_length_texts_are_chunked_and_pooled(make_generator):
+    generator = make_generator(max_input_tokens=10)
+
+    embeddings = generator.generate_embeddings(["short", "x" * 100])
+
+    assert embeddings[0] == [5.0, 1.0]
+    # Each chunk is within the limit, and the pooled embedding has unit length
+    pieces = [text for batch in generator.requests for text in batch if "x" in text]
+    assert len(pieces) > 1 and "".join(pieces) == "x" * 100
+    assert all(estimate_tokens(piece) <= 10 for piece in pieces)
+    assert np.linalg.norm(embeddings[1]) == pytest.approx(1.0)
+
+
+def test_rejected_batches_are_split_and_retried(make_generator):
+    generator = make_generator()
+    create = generator.client.embeddings.create
+    succeed = create.side_effect
+
+    def reject_long(input, model, **options):
+        if sum(len(text) for text in input) > 8:
+            raise too_many_tokens()
+        return succeed(input, model, **options)
+
+    create.side_effect = reject_long
+
+    embeddings = generator.generate_embeddings(["aaaa", "bbbb", "cccccccccccc"])
+
+    assert len(embeddings) == 3
+    assert embeddings[:2] == [[4.0, 1.0], [4.0, 1.0]]
+    assert np.linalg.norm(embeddings[2]) == pytest.approx(1.0)
+
+
+def test_failures_raise_instead_of_dropping_texts(make_generator):
+    generator = make_generator()
+    generator.client.embeddings.create.side_effect = RuntimeError("unavailable")
+
+    with pytest.raises(EmbeddingGenerationError, match="unavailable"):
+        generator.generate_embeddings(["a"])
+    assert generator.generate_embeddings([]) == []
+
+
+def test_dimensions_are_only_sent_when_set(make_generator):
+    generator = make_generator()
+    generator.generate_embeddings(["a"])
+    assert "dimensions" not in generator.client.embeddings.create.call_args.kwargs
+
+    generator = make_generator(model="text-embedding-3-small", dimensions=256)
+    generator.generate_embeddings(["a"])
+    assert generator.client.embeddings.create.call_args.kwargs["dimensions"] == 256
+
+    with pytest.raises(ValueError):
+        make_generator(dimensions=0)
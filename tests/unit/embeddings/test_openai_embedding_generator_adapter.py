@@ -1,5 +1,6 @@
 # tests/unit/embeddings/test_openai_embedding_generator_adapter.py
 
+import numpy as np
 import pytest
 
 
@@ -39,9 +40,11 @@ def test_consistent_results_for_repeated_inputs(
     )
 
     # Verify results are identical, implying deterministic output
-    assert (
-        first_result == second_result
-    ), "Expected identical results for repeated inputs, implying deterministic behavior."
+    np.testing.assert_array_equal(
+        first_result,
+        second_result,
+        err_msg="Expected identical results for repeated inputs, implying deterministic behavior.",
+    )
 
 
 def test_cache_efficiency_for_repeated_inputs(
@@ -113,9 +116,13 @@ def test_empty_cache_file_handling(
 
     # Generate embeddings to ensure the adapter functions correctly
     embeddings = adapter.generate_embeddings(sample_texts)
-    assert (
-        embeddings == expected_embeddings
-    ), "The adapter should handle an empty cache file correctly."
+    # Cached embeddings are stored as float32
+    np.testing.assert_allclose(
+        embeddings,
+        expected_embeddings,
+        rtol=1e-6,
+        err_msg="The adapter should handle an empty cache file correctly.",
+    )
 
 
 def test_cache_creation_on_new_adapter_instance(
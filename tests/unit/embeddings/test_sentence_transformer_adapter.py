@@ -0,0 +1,79 @@
+# tests/unit/embeddings/test_sentence_transformer_adapter.py
+
+import sys
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+import numpy as np
+import pytest
+
+from det.embeddings.adapters import SentenceTransformerEmbeddingGeneratorAdapter
+from det.embeddings.generator import SentenceTransformerEmbeddingGenerator
+from det.helpers import get_embedding_generator_adapter
+
+
+@pytest.fixture
+def fake_sentence_transformers(monkeypatch):
+    """Stands in for torch and sentence-transformers, which are optional."""
+    model = Mock()
+    model.encode.side_effect = lambda texts, **kwargs: np.array(
+        [[float(len(text)), 1.0] for text in texts], dtype=np.float32
+    )
+    module = SimpleNamespace(SentenceTransformer=Mock(return_value=model))
+    torch = SimpleNamespace(set_num_threads=Mock())
+    onnxruntime = SimpleNamespace(SessionOptions=Mock(side_effect=SimpleNamespace))
+    monkeypatch.setitem(sys.modules, "sentence_transformers", module)
+    monkeypatch.setitem(sys.modules, "torch", torch)
+    monkeypatch.setitem(sys.modules, "onnxruntime", onnxruntime)
+    return SimpleNamespace(module=module, model=model, torch=torch)
+
+
+def test_generator_batches_texts(fake_sentence_transformers):
+    generator = SentenceTransformerEmbeddingGenerator("all-MiniLM-L6-v2", batch_size=16)
+
+    embeddings = generator.generate_embeddings(["a", "bbb"])
+
+    # The process-wide torch thread count is left alone unless threads are given
+    fake_sentence_transformers.torch.set_num_threads.assert_not_called()
+    fake_sentence_transformers.module.SentenceTransformer.assert_called_once_with(
+        "all-MiniLM-L6-v2", device="cpu"
+    )
+    assert fake_sentence_transformers.model.encode.call_args.kwargs["batch_size"] == 16
+    np.testing.assert_array_equal(embeddings, [[1.0, 1.0], [3.0, 1.0]])
+    assert generator.generate_embeddings([]) == []
+
+
+def test_threads_are_set_on_the_backend_in_use(fake_sentence_transformers):
+    SentenceTransformerEmbeddingGenerator(threads=4)
+    fake_sentence_transformers.torch.set_num_threads.assert_called_once_with(4)
+
+    fake_sentence_transformers.torch.set_num_threads.reset_mock()
+    SentenceTransformerEmbeddingGenerator(threads=2, backend="onnx")
+
+    fake_sentence_transformers.torch.set_num_threads.assert_not_called()
+    kwargs = fake_sentence_transformers.module.SentenceTransformer.call_args.kwargs
+    assert kwargs["backend"] == "onnx"
+    assert kwargs["model_kwargs"]["session_options"].intra_op_num_threads == 2
+
+
+def test_generator_explains_the_missing_dependency(monkeypatch):
+    monkeypatch.setitem(sys.modules, "sentence_transformers", None)
+
+    with pytest.raises(ImportError, match=r"pip install \"det\[local\]\""):
+        SentenceTransformerEmbeddingGenerator()
+
+
+def test_adapter_is_selected_by_name_and_cached(fake_sentence_transformers, tmp_path):
+    adapter = get_embedding_generator_adapter(
+        "SentenceTransformer",
+        "all-MiniLM-L6-v2",
+        cache_file_path=str(tmp_path / "cache"),
+    )
+    assert isinstance(adapter, SentenceTransformerEmbeddingGeneratorAdapter)
+
+    adapter.generate_embeddings(["a", "bb"])
+    embeddings = adapter.generate_embeddings(["bb", "a"])
+
+    fake_sentence_transformers.model.encode.assert_called_once()
+    np.testing.assert_array_equal(embeddings, [[2.0, 1.0], [1.0, 1.0]])
+    assert adapter.embeddings_cache.namespace == "all-MiniLM-L6-v2"
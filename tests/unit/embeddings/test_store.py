@@ -0,0 +1,353 @@
+# tests/unit/embeddings/test_store.py
+
+import multiprocessing
+import pickle
+from unittest.mock import Mock
+
+import numpy as np
+import pytest
+
+from det.det_response.semantic_distance import SemanticDistanceCalculator
+from det.embeddings.cache import EmbeddingsCache, cache_key
+from det.embeddings.store import (
+    MmapEmbeddingStore,
+    SQLiteEmbeddingStore,
+    copy_entries,
+    open_embedding_store,
+)
+
+
+def test_vectors_are_zero_copy_float32_views(tmp_path):
+    store = MmapEmbeddingStore(str(tmp_path / "cache"))
+    store.put_many([("a", [0.1, 0.2, 0.3]), ("b", [1.0, 2.0])])
+
+    vector = store["a"]
+    assert vector.dtype == np.float32
+    assert not vector.flags.owndata
+    np.testing.assert_allclose(vector, [0.1, 0.2, 0.3], rtol=1e-6)
+    np.testing.assert_array_equal(store["b"], [1.0, 2.0])
+    assert "c" not in store and store.get("c") is None
+
+
+def test_entries_persist_and_appends_remap(tmp_path):
+    path = str(tmp_path / "cache")
+    store = MmapEmbeddingStore(path)
+    store["a"] = [1.0, 2.0]
+    first = store["a"]
+    # Appending after a lookup remaps the grown file without invalidating earlier views
+    store["b"] = [3.0, 4.0]
+    np.testing.assert_array_equal(store["b"], [3.0, 4.0])
+    np.testing.assert_array_equal(first, [1.0, 2.0])
+
+    reopened = MmapEmbeddingStore(path)
+    assert len(reopened) == 2
+    np.testing.assert_array_equal(reopened["b"], [3.0, 4.0])
+
+
+def test_index_entries_without_data_are_ignored(tmp_path):
+    path = str(tmp_path / "cache")
+    store = MmapEmbeddingStore(path)
+    store["a"] = [1.0, 2.0]
+    # Simulate a crash after the index was written but before the vector was
+    with open(path, "a") as index_file:
+        index_file.write('["b", 2, 2]\n')
+
+    reopened = MmapEmbeddingStore(path)
+    assert "b" not in reopened
+    reopened["c"] = [5.0]
+    np.testing.assert_array_equal(reopened["c"], [5.0])
+
+
+def test_legacy_pickle_cache_is_migrated(tmp_path):
+    path = tmp_path / "embeddings_cache.pkl"
+    with open(path, "wb") as cache_file:
+        pickle.dump({"a": [0.5, 0.25]}, cache_file)
+
+    store = MmapEmbeddingStore(str(path))
+
+    np.testing.assert_array_equal(store["a"], [0.5, 0.25])
+    assert (tmp_path / "embeddings_cache.pkl.bak").exists()
+    assert len(MmapEmbeddingStore(str(path))) == 1
+
+
+def test_cache_generates_only_missing_embeddings(tmp_path):
+    generator = Mock()
+    generator.generate_embeddings.return_value = [[0.5, 0.5]]
+    cache = EmbeddingsCache(generator, str(tmp_path / "cache"))
+
+    cache.generate_embeddings(["a"])
+    embeddings = EmbeddingsCache(
+        generator, str(tmp_path / "cache")
+    ).generate_embeddings(["a"])
+
+    generator.generate_embeddings.assert_called_once_with(["a"])
+    np.testing.assert_array_equal(embeddings, [[0.5, 0.5]])
+
+
+def test_cache_keeps_input_order_and_embeds_repeats_once(tmp_path):
+    generator = Mock()
+    generator.generate_embeddings.side_effect = lambda texts: [
+        [float(ord(text)), 0.0] for text in texts
+    ]
+    cache = EmbeddingsCache(generator, str(tmp_path / "cache"))
+    cache.generate_embeddings(["b"])
+
+    embeddings = cache.generate_embeddings(["a", "b", "c", "a", "b"])
+
+    # Hits and misses interleave in the order asked for
+    np.testing.assert_array_equal(
+        np.array(embeddings)[:, 0], [ord(text) for text in "abcab"]
+    )
+    assert generator.generate_embeddings.call_args.args[0] == ["a", "c"]
+    stats = cache.embeddings_cache.stats()
+    assert stats["hits"] == 3 and stats["misses"] == 3
+
+
+def _write_entries(path, worker, count):
+    store = open_embedding_store(path)
+    for i in range(count):
+        store.put_many([(f"{worker}-{i}", [float(worker), float(i)])])
+
+
+@pytest.mark.parametrize("filename", ["cache", "cache.sqlite"])
+def test_processes_share_one_store(tmp_path, filename):
+    path = str(tmp_path / filename)
+    # Open before the writers so entries added by other processes are picked up later
+    store = open_embedding_store(path)
+    start_method = (
+        "fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn"
+    )
+    context = multiprocessing.get_context(start_method)
+    workers = [
+        context.Process(target=_write_entries, args=(path, worker, 50))
+        for worker in range(4)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+        assert worker.exitcode == 0
+
+    assert len(store) == 200
+    for worker in range(4):
+        np.testing.assert_array_equal(store[f"{worker}-49"], [worker, 49.0])
+
+
+def test_sqlite_store_commits_each_batch(tmp_path):
+    path = str(tmp_path / "cache.db")
+    store = open_embedding_store(path)
+    assert isinstance(store, SQLiteEmbeddingStore)
+    store.put_many([("a", [0.5, 0.25])])
+
+    # Visible to a new connection without closing the first, as after a crash
+    reopened = SQLiteEmbeddingStore(path)
+    vector = reopened["a"]
+    assert vector.dtype == np.float32
+    np.testing.assert_array_equal(vector, [0.5, 0.25])
+    assert list(reopened.keys()) == ["a"]
+
+
+def test_unknown_backend_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        open_embedding_store(str(tmp_path / "cache"), backend="redis")
+
+
+def test_cache_keys_are_namespaced_by_model(tmp_path):
+    path = str(tmp_path / "cache")
+    small = Mock(model="small")
+    small.generate_embeddings.return_value = [[1.0, 0.0]]
+    large = Mock(model="large")
+    large.generate_embeddings.return_value = [[0.0, 1.0, 0.0]]
+
+    EmbeddingsCache(small, path).generate_embeddings(["a" * 10000])
+    embeddings = EmbeddingsCache(large, path).generate_embeddings(["a" * 10000])
+
+    # The other model's vector is not returned
+    large.generate_embeddings.assert_called_once()
+    np.testing.assert_array_equal(embeddings, [[0.0, 1.0, 0.0]])
+    keys = sorted(MmapEmbeddingStore(path).keys())
+    assert [key.split(":")[0] for key in keys] == ["large", "small"]
+    assert keys[0] == cache_key("large", "a" * 10000)
+    assert len(keys[0]) == len("large:") + 64
+
+
+def test_reduced_dimensions_have_their_own_namespace(tmp_path):
+    path = str(tmp_path / "cache")
+    full = Mock(model="text-embedding-3-small", dimensions=None)
+    full.generate_embeddings.return_value = [[1.0, 0.0, 0.0, 0.0]]
+    reduced = Mock(model="text-embedding-3-small", dimensions=2)
+    reduced.generate_embeddings.return_value = [[0.0, 1.0]]
+
+    EmbeddingsCache(full, path).generate_embeddings(["a"])
+    cache = EmbeddingsCache(reduced, path)
+    embeddings = cache.generate_embeddings(["a"])
+
+    assert cache.namespace == "text-embedding-3-small@2"
+    np.testing.assert_array_equal(embeddings, [[0.0, 1.0]])
+
+
+def test_legacy_pickle_entries_are_rekeyed(tmp_path):
+    path = tmp_path / "embeddings_cache.pkl"
+    with open(path, "wb") as cache_file:
+        pickle.dump({"a": [0.5, 0.25]}, cache_file)
+    generator = Mock(model="ada")
+
+    embeddings = EmbeddingsCache(generator, str(path)).generate_embeddings(["a"])
+
+    generator.generate_embeddings.assert_not_called()
+    np.testing.assert_array_equal(embeddings, [[0.5, 0.25]])
+
+
+@pytest.mark.parametrize("filename", ["cache", "cache.sqlite"])
+def test_lru_eviction_keeps_recently_used_entries(tmp_path, filename):
+    store = open_embedding_store(str(tmp_path / filename))
+    for i in range(10):
+        store.put_many([(f"m:{i}", [float(i)])])
+    store.record_usage(["m:0"])
+
+    evicted = store.evict(max_entries=5, policy="lru", headroom=0.9)
+
+    # Evicts down to 90% of the limit, oldest first, sparing the recently used entry
+    assert evicted == 6
+    assert sorted(store.keys()) == ["m:0", "m:7", "m:8", "m:9"]
+
+
+def test_eviction_without_headroom_keeps_exactly_the_limit(tmp_path):
+    store = open_embedding_store(str(tmp_path / "cache"))
+    store.put_many([(f"m:{i}", [float(i)]) for i in range(10)])
+
+    assert store.evict(max_entries=5) == 5
+    assert sorted(store.keys()) == ["m:5", "m:6", "m:7", "m:8", "m:9"]
+
+
+def test_lfu_eviction_keeps_frequently_used_entries(tmp_path):
+    store = open_embedding_store(str(tmp_path / "cache"))
+    store.put_many([(f"m:{i}", [float(i)]) for i in range(4)])
+    store.record_usage(["m:0", "m:0", "m:1"])
+    store.flush()
+
+    store.evict(max_bytes=8, policy="lfu")
+
+    assert sorted(store.keys()) == ["m:0", "m:1"]
+
+
+def test_compact_reclaims_space_and_keeps_entries(tmp_path):
+    path = str(tmp_path / "cache")
+    store = MmapEmbeddingStore(path)
+    store.put_many([(f"m:{i}", [float(i)] * 4) for i in range(10)])
+    before = store["m:9"]
+    store.delete_many([f"m:{i}" for i in range(8)])
+    assert store.reclaimable_bytes() == 8 * 16
+
+    store.compact()
+
+    assert store.reclaimable_bytes() == 0
+    np.testing.assert_array_equal(store["m:9"], [9.0] * 4)
+    np.testing.assert_array_equal(before, [9.0] * 4)
+    reopened = MmapEmbeddingStore(path)
+    assert sorted(reopened.keys()) == ["m:8", "m:9"]
+
+
+def test_cache_limits_and_stats(tmp_path):
+    generator = Mock(model="small")
+    generator.generate_embeddings.side_effect = lambda texts: [[1.0, 0.0]] * len(texts)
+    cache = EmbeddingsCache(
+        generator, str(tmp_path / "cache"), max_entries=3, eviction="lfu"
+    )
+
+    cache.generate_embeddings(["a", "b"])
+    cache.generate_embeddings(["a", "c", "d"])
+
+    stats = cache.embeddings_cache.stats()
+    assert stats["entries"] <= 3
+    assert stats["hits"] == 1 and stats["misses"] == 4
+    assert stats["hit_rate"] == pytest.approx(0.2)
+    assert list(stats["models"]) == ["small"]
+    # The entry that was hit survives eviction
+    assert cache.key("a") in cache.embeddings_cache
+    assert cache.key("b") not in cache.embeddings_cache
+
+
+def test_copy_entries_filters_by_model(tmp_path):
+    source = open_embedding_store(str(tmp_path / "cache"))
+    source.put_many([("small:1", [1.0]), ("large:1", [2.0])])
+    destination = open_embedding_store(str(tmp_path / "export.db"))
+
+    assert copy_entries(source, destination, namespace="large") == 1
+    assert list(destination.keys()) == ["large:1"]
+
+
+@pytest.mark.parametrize(
+    "filename,dtype,size,tolerance",
+    [
+        # The mmap store pads each vector to whole float32 words
+        ("cache", "float16", 3072, 1e-4),
+        ("cache", "int8", 1540, 2e-3),
+        ("cache.sqlite", "float16", 3070, 1e-4),
+        ("cache.sqlite", "int8", 1539, 2e-3),
+    ],
+)
+def test_quantised_vectors_round_trip(tmp_path, filename, dtype, size, tolerance):
+    rng = np.random.default_rng(0)
+    vectors = SemanticDistanceCalculator.normalise(rng.standard_normal((20, 1535)))
+    path = str(tmp_path / filename)
+    store = open_embedding_store(path, dtype=dtype)
+    store.put_many((f"m:{i}", vector) for i, vector in enumerate(vectors))
+    store.close()
+
+    reopened = open_embedding_store(path)
+    loaded = np.vstack([reopened[f"m:{i}"] for i in range(len(vectors))])
+
+    assert loaded.dtype == np.float32
+    assert set(reopened.sizes().values()) == {size}
+    error = np.abs(
+        SemanticDistanceCalculator.cosine_similarity_matrix(loaded)
+        - SemanticDistanceCalculator.cosine_similarity_matrix(vectors)
+    )
+    assert error.max() < tolerance
+
+
+def test_stores_mix_encodings_and_compaction_keeps_them(tmp_path):
+    path = str(tmp_path / "cache")
+    MmapEmbeddingStore(path).put_many([("m:exact", [0.1, 0.2, 0.3])])
+    quantised = MmapEmbeddingStore(path, dtype="int8")
+    quantised.put_many([("m:small", [1.0, -0.5, 0.0]), ("m:gone", [1.0, 1.0, 1.0])])
+    quantised.delete_many(["m:gone"])
+
+    quantised.compact()
+
+    reopened = MmapEmbeddingStore(path)
+    np.testing.assert_array_equal(reopened["m:exact"], np.float32([0.1, 0.2, 0.3]))
+    np.testing.assert_allclose(reopened["m:small"], [1.0, -0.5, 0.0], atol=1 / 127)
+    assert "m:gone" not in reopened
+    assert reopened.sizes() == {"m:exact": 12, "m:small": 8}
+
+
+def test_sqlite_stores_from_before_quantisation_are_upgraded(tmp_path):
+    import sqlite3
+
+    path = str(tmp_path / "cache.sqlite")
+    connection = sqlite3.connect(path)
+    connection.execute(
+        "CREATE TABLE embeddings (key TEXT PRIMARY KEY, dim INTEGER NOT NULL, "
+        "vector BLOB NOT NULL, last_used REAL NOT NULL DEFAULT 0, "
+        "uses INTEGER NOT NULL DEFAULT 0)"
+    )
+    connection.execute(
+        "INSERT INTO embeddings (key, dim, vector) VALUES (?, ?, ?)",
+        ("m:old", 2, np.float32([0.5, 0.25]).tobytes()),
+    )
+    connection.commit()
+    connection.close()
+
+    store = SQLiteEmbeddingStore(path, dtype="float16")
+    store.put_many([("m:new", [0.5, 0.25])])
+
+    np.testing.assert_array_equal(store["m:old"], [0.5, 0.25])
+    np.testing.assert_array_equal(store["m:new"], [0.5, 0.25])
+    assert store.sizes() == {"m:old": 8, "m:new": 4}
+
+
+def test_unknown_dtype_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        open_embedding_store(str(tmp_path / "cache"), dtype="int4")
@@ -0,0 +1,125 @@
+from unittest.mock import Mock
+
+import numpy as np
+import pytest
+from langchain_core.pydantic_v1 import BaseModel
+
+from det.det_response.analysis import ResponseAnalysis
+from det.det_response.semantic_distance import SemanticDistanceCalculator
+
+
+class Answer(BaseModel):
+    title: str
+    score: int
+
+
+VECTORS = {
+    "Risk": [1.0, 0.0],
+    "Risky": [0.6, 0.8],
+    "1": [0.0, 1.0],
+    "2": [1.0, 1.0],
+}
+
+
+def make_calculator():
+    generator = Mock()
+    generator.generate_embeddings.side_effect = lambda texts: [
+        VECTORS[text] for text in texts
+    ]
+    return SemanticDistanceCalculator(generator)
+
+
+def test_field_similarities_use_one_batched_call():
+    calculator = make_calculator()
+    responses = [
+        Answer(title="Risk", score=1),
+        Answer(title="Risky", score=1),
+        Answer(title="Risk", score=2),
+    ]
+
+    similarities = ResponseAnalysis(
+        responses, calculator
+    ).calculate_field_similarities()
+
+    generator = calculator.embedding_generator
+    generator.generate_embeddings.assert_called_once()
+    # Each distinct value is embedded once
+    assert sorted(generator.generate_embeddings.call_args.args[0]) == [
+        "1",
+        "2",
+        "Risk",
+        "Risky",
+    ]
+    assert similarities["title"] == pytest.approx([1.0, 0.6, 1.0])
+    assert similarities["score"] == pytest.approx([1.0, 1.0, 1 / np.sqrt(2)])
+
+
+def test_field_similarities_match_pairwise_similarity():
+    responses = [Answer(title="Risk", score=1), Answer(title="Risky", score=2)]
+
+    batched = ResponseAnalysis(
+        responses, make_calculator()
+    ).calculate_field_similarities()
+
+    calculator = make_calculator()
+    for field in ("title", "score"):
+        base, other = (str(getattr(response, field)) for response in responses)
+        assert batched[field][1] == pytest.approx(
+            calculator.semantic_similarity(base, [other])[0]
+        )
+
+
+def test_field_similarities_of_no_responses():
+    assert ResponseAnalysis([], make_calculator()).calculate_field_similarities() == {}
+
+
+def test_medoid_baseline_ignores_an_outlier_first_response():
+    vectors = {"outlier": [0.0, 1.0], "usual": [1.0, 0.0], "close": [0.7, -0.7]}
+    generator = Mock()
+    generator.generate_embeddings.side_effect = lambda texts: [
+        vectors[text] for text in texts
+    ]
+    responses = ["outlier", "usual", "usual", "close"]
+
+    analysis = ResponseAnalysis(
+        responses, SemanticDistanceCalculator(generator), baseline="medoid"
+    )
+    statistics = analysis.pairwise_statistics()
+
+    assert analysis.base_response == "usual"
+    assert statistics["medoid_index"] == 1
+    # Each distinct response is embedded once
+    generator.generate_embeddings.assert_called_once_with(["outlier", "usual", "close"])
+    assert statistics["min_similarity"] == pytest.approx(-np.sqrt(0.5))
+    assert np.argmin(statistics["centrality"]) == 0
+    assert statistics["centrality"][1] == statistics["centrality"][2]
+
+
+def test_pairwise_statistics_match_the_full_matrix():
+    rng = np.random.default_rng(1)
+    embeddings = rng.standard_normal((50, 8))
+    responses = [f"response {i % 30}" for i in range(50)]
+    vectors = {text: embeddings[i] for i, text in enumerate(responses)}
+    generator = Mock()
+    generator.generate_embeddings.side_effect = lambda texts: [
+        vectors[text] for text in texts
+    ]
+    calculator = SemanticDistanceCalculator(generator)
+
+    statistics = ResponseAnalysis(responses, calculator).pairwise_statistics(
+        block_size=7
+    )
+
+    full = calculator.cosine_similarity_matrix([vectors[text] for text in responses])
+    off_diagonal = ~np.eye(50, dtype=bool)
+    np.testing.assert_allclose(
+        statistics["centrality"],
+        [full[i][off_diagonal[i]].mean() for i in range(50)],
+        atol=1e-5,
+    )
+    assert statistics["mean_similarity"] == pytest.approx(
+        full[off_diagonal].mean(), abs=1e-5
+    )
+    assert statistics["min_similarity"] == pytest.approx(
+        full[off_diagonal].min(), abs=1e-5
+    )
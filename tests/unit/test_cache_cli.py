@@ -0,0 +1,35 @@
+import pickle
+
+from typer.testing import CliRunner
+
+from det.embeddings.store import open_embedding_store
+from det.main import app
+
+runner = CliRunner()
+
+
+def test_import_stats_and_prune(tmp_path):
+    legacy = tmp_path / "old.pkl"
+    with open(legacy, "wb") as cache_file:
+        pickle.dump({f"text {i}": [float(i)] * 4 for i in range(20)}, cache_file)
+    path = str(tmp_path / "cache")
+
+    result = runner.invoke(app, ["cache", "import", str(legacy), "--path", path])
+    assert result.exit_code != 0  # a pickle cache does not record its model
+
+    result = runner.invoke(
+        app, ["cache", "import", str(legacy), "--path", path, "--model", "ada"]
+    )
+    assert result.exit_code == 0, result.output
+
+    result = runner.invoke(app, ["cache", "stats", path])
+    assert result.exit_code == 0, result.output
+    assert "20 embeddings" in result.output
+    assert "ada" in result.output
+
+    result = runner.invoke(app, ["cache", "prune", path, "--max-entries", "10"])
+    assert result.exit_code == 0, result.output
+    store = open_embedding_store(path)
+    # An explicit prune keeps exactly the requested number of entries
+    assert len(store) == 10
+    assert store.reclaimable_bytes() == 0
@@ -0,0 +1,184 @@
+import asyncio
+from unittest.mock import Mock, create_autospec
+
+import pytest
+
+from det.cassette import (
+    Cassette,
+    CassetteChainClient,
+    CassetteEmbeddingGenerator,
+    CassetteExhaustedError,
+    CassetteLLMClient,
+    CassetteMissError,
+    chain_namespace,
+)
+from det.embeddings.generator import EmbeddingGeneratorInterface
+from det.llm.base import LLMGeneratorInterface, ResponseGenerationError
+from resources.risk_definition import RiskDefinition
+
+
+class CountingClient(LLMGeneratorInterface):
+    def __init__(self):
+        self.calls = 0
+
+    def generate_response(self, prompt: str, **kwargs) -> str:
+        self.calls += 1
+        return f"{prompt} #{self.calls}"
+
+
+def test_llm_responses_replay_in_recorded_order(tmp_path):
+    path = str(tmp_path / "run.cassette")
+    recorder = CassetteLLMClient(Cassette(path, mode="record"), client=CountingClient())
+    recorded = recorder.generate_responses("prompt", 3, temperature=0)
+
+    replayer = CassetteLLMClient(Cassette(path, mode="replay"))
+
+    assert replayer.generate_responses("prompt", 3, temperature=0) == recorded
+
+
+def test_replaying_past_the_recording_raises(tmp_path):
+    path = str(tmp_path / "run.cassette")
+    recorder = CassetteLLMClient(Cassette(path, mode="record"), client=CountingClient())
+    recorded = recorder.generate_responses("prompt", 3)
+
+    replayer = CassetteLLMClient(Cassette(path, mode="replay"))
+
+    # Repeating recorded responses would pass them off as new samples
+    with pytest.raises(CassetteExhaustedError, match="only 3 of the 3 recorded remain"):
+        replayer.generate_responses("prompt", 4)
+    assert replayer.generate_responses("prompt", 3) == recorded
+    with pytest.raises(CassetteExhaustedError):
+        replayer.generate_response("prompt")
+
+
+def test_async_replay(tmp_path):
+    path = str(tmp_path / "run.cassette")
+    recorder = CassetteLLMClient(Cassette(path, mode="record"), client=CountingClient())
+    recorded = asyncio.run(recorder.agenerate_response("prompt"))
+
+    replayer = CassetteLLMClient(Cassette(path, mode="replay"))
+
+    assert asyncio.run(replayer.agenerate_response("prompt")) == recorded
+
+
+def test_failed_llm_calls_are_not_recorded(tmp_path):
+    path = str(tmp_path / "run.cassette")
+    client = Mock(spec=LLMGeneratorInterface)
+    client.generate_responses.return_value = [None, "answer", None]
+    recorder = CassetteLLMClient(Cassette(path, mode="record"), client=client)
+    recorder.generate_responses("prompt", 3)
+
+    replayer = CassetteLLMClient(Cassette(path, mode="replay"))
+
+    assert replayer.generate_responses("prompt", 1) == ["answer"]
+
+
+def test_replay_miss_raises(tmp_path):
+    path = str(tmp_path / "run.cassette")
+    recorder = CassetteLLMClient(Cassette(path, mode="record"), client=CountingClient())
+    recorder.generate_response("prompt")
+
+    replayer = CassetteLLMClient(Cassette(path, mode="replay"))
+
+    with pytest.raises(CassetteMissError):
+        replayer.generate_response("another prompt")
+
+
+def test_replay_requires_existing_cassette(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        Cassette(str(tmp_path / "missing.cassette"), mode="replay")
+
+
+def test_embeddings_replay_per_text(tmp_path):
+    path = str(tmp_path / "run.cassette")
+    generator = create_autospec(EmbeddingGeneratorInterface, instance=True)
+    generator.generate_embeddings.return_value = [[0.5, 0.25], [1.0, 2.0]]
+    recorder = CassetteEmbeddingGenerator(
+        Cassette(path, mode="record"), "model", generator
+    )
+    recorder.generate_embeddings(["a", "b"])
+
+    replayer = CassetteEmbeddingGenerator(Cassette(path, mode="replay"), "model")
+
+    assert replayer.generate_embeddings(["b", "a"]) == [[1.0, 2.0], [0.5, 0.25]]
+    # A text's embedding is the same each time, so it can be replayed again
+    assert replayer.generate_embeddings(["a"]) == [[0.5, 0.25]]
+
+
+def test_embeddings_are_recorded_once_per_text(tmp_path):
+    path = str(tmp_path / "run.cassette")
+    generator = create_autospec(EmbeddingGeneratorInterface, instance=True)
+    generator.generate_embeddings.return_value = [[0.5, 0.25], [0.5, 0.25]]
+    cassette = Cassette(path, mode="record")
+    recorder = CassetteEmbeddingGenerator(cassette, "model", generator)
+
+    recorder.generate_embeddings(["a", "a"])
+    recorder.generate_embeddings(["a", "a"])
+
+    request = {"model": "model", "text": "a"}
+    assert cassette.recorded("embedding", request)
+    with pytest.raises(CassetteExhaustedError, match="only 1 of the 1 recorded"):
+        Cassette(path, mode="replay").replay("embedding", request, count=2)
+
+
+def test_chain_responses_and_errors_replay(tmp_path):
+    path = str(tmp_path / "run.cassette")
+    risk = RiskDefinition(
+        risk_statement="statement",
+        risk_description="description",
+        context="context",
+        risk_categorization="categorization",
+        security_controls=["AC-2"],
+        implementation_guidance="guidance",
+        assessment_approach="approach",
+        risk_likelihood="High",
+        risk_impact="Low",
+        authorization_recommendation="Mitigate",
+        continuous_monitoring_strategy="strategy",
+    )
+    chain = Mock()
+    chain.generate_responses.return_value = [
+        (risk, 1),
+        (ResponseGenerationError("failed", attempts=3), 3),
+    ]
+    recorder = CassetteChainClient(
+        Cassette(path, mode="record"), chain, "RiskDefinition"
+    )
+    recorder.generate_responses(2)
+
+    replayer = CassetteChainClient(
+        Cassette(path, mode="replay"), namespace="RiskDefinition"
+    )
+    replayed = replayer.generate_responses(2)
+
+    assert replayed[0] == (risk, None)
+    assert isinstance(replayed[1][0], ResponseGenerationError)
+
+
+def test_chain_namespace_changes_with_the_prompt_group_config(tmp_path):
+    path = str(tmp_path / "run.cassette")
+    prompts = {
+        "system_prompt": "system",
+        "prompt": "prompt",
+        "model": {"provider": "OpenAI", "model": "gpt-4o-mini"},
+    }
+    namespace = chain_namespace("prompts.json", "Risk", prompts, {"topic": "x"})
+    chain = Mock()
+    chain.generate_responses.return_value = [("response", 1)]
+    CassetteChainClient(
+        Cassette(path, mode="record"), chain, namespace
+    ).generate_responses(1)
+
+    other_model = {**prompts, "model": {"provider": "OpenAI", "model": "gpt-4o"}}
+    replayer = CassetteChainClient(
+        Cassette(path, mode="replay"),
+        namespace=chain_namespace("prompts.json", "Risk", other_model, {"topic": "x"}),
+    )
+
+    # Replaying after the config changed misses instead of returning stale responses
+    with pytest.raises(CassetteMissError):
+        replayer.generate_responses(1)
+    assert (
+        chain_namespace("prompts.json", "Risk", dict(prompts), {"topic": "x"})
+        == namespace
+    )
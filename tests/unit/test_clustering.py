@@ -0,0 +1,99 @@
+from unittest.mock import Mock
+
+import numpy as np
+import pytest
+
+from det.det_response.analysis import ResponseAnalysis
+from det.det_response.clustering import NOISE, cluster_embeddings
+from det.det_response.semantic_distance import SemanticDistanceCalculator
+
+VECTORS = {
+    "Yes": [1.0, 0.0, 0.0],
+    "Yes.": [0.99, 0.14, 0.0],
+    "Yes!": [0.98, 0.0, 0.2],
+    "No": [0.0, 1.0, 0.0],
+    "No.": [0.14, 0.99, 0.0],
+    "Maybe": [0.0, 0.0, 1.0],
+}
+
+
+def make_calculator():
+    generator = Mock()
+    generator.generate_embeddings.side_effect = lambda texts: [
+        VECTORS[text] for text in texts
+    ]
+    return SemanticDistanceCalculator(generator)
+
+
+def test_clusters_are_numbered_by_size():
+    embeddings = [VECTORS[text] for text in ["No", "Yes", "Yes.", "No.", "Yes!"]]
+
+    labels = cluster_embeddings(embeddings, threshold=0.9)
+
+    assert labels.tolist() == [1, 0, 0, 1, 0]
+
+
+def test_weights_count_towards_size_and_core_responses():
+    embeddings = [VECTORS["Yes"], VECTORS["No"], VECTORS["Maybe"]]
+
+    labels = cluster_embeddings(embeddings, weights=[1, 5, 2], min_samples=2)
+
+    # "Yes" has no neighbours and only one copy, so it is noise
+    assert labels.tolist() == [NOISE, 0, 1]
+
+
+def test_border_responses_join_but_do_not_extend_clusters():
+    # A chain a - b - c where only b has enough neighbours to be a core response
+    embeddings = [[1.0, 0.0], [0.95, 0.31], [0.81, 0.59]]
+
+    assert cluster_embeddings(embeddings, threshold=0.9, min_samples=3).tolist() == [
+        0,
+        0,
+        0,
+    ]
+    assert cluster_embeddings(
+        embeddings, threshold=0.9, min_samples=3, block_size=1
+    ).tolist() == [0, 0, 0]
+    # With a and c as their own cores, single linkage still chains them together
+    assert cluster_embeddings(embeddings, threshold=0.9).tolist() == [0, 0, 0]
+    assert cluster_embeddings(embeddings, threshold=0.99).tolist() == [0, 1, 2]
+
+
+def test_empty_embeddings_have_no_clusters():
+    assert cluster_embeddings([]).tolist() == []
+
+
+def test_cluster_responses_reports_modes():
+    responses = ["Yes", "No", "Yes.", "Yes", "No.", "Maybe", "Yes"]
+    calculator = make_calculator()
+
+    clusters = ResponseAnalysis(responses, calculator).cluster_responses(threshold=0.9)
+
+    # Each distinct response is embedded once
+    calculator.embedding_generator.generate_embeddings.assert_called_once()
+    assert [cluster["size"] for cluster in clusters] == [4, 2, 1]
+    assert [cluster["share"] for cluster in clusters] == pytest.approx(
+        [4 / 7, 2 / 7, 1 / 7]
+    )
+    assert clusters[0]["representative"] == "Yes"
+    assert clusters[0]["responses"] == ["Yes", "Yes."]
+    assert clusters[2]["representative"] == "Maybe"
+    assert clusters[2]["intra_similarity"] is None
+
+    # The mean over the 6 pairs of the 4 "Yes" responses: 3 identical, 3 at 0.99
+    similarity = 0.99 / np.linalg.norm(VECTORS["Yes."])
+    assert clusters[0]["intra_similarity"] == pytest.approx((3 + 3 * similarity) / 6)
+
+
+def test_cluster_responses_puts_noise_last():
+    responses = ["Maybe", "Yes", "Yes", "No"]
+
+    clusters = ResponseAnalysis(responses, make_calculator()).cluster_responses(
+        threshold=0.9, min_samples=2
+    )
+
+    assert [(cluster["label"], cluster["size"]) for cluster in clusters] == [
+        (0, 2),
+        (NOISE, 2),
+    ]
+    assert clusters[1]["responses"] == ["Maybe", "No"]
@@ -0,0 +1,85 @@
+import asyncio
+from unittest.mock import AsyncMock, Mock, patch
+
+import groq
+import httpx
+import pytest
+
+from det.llm.llm_groq import GroqClient
+
+
+def completion(*contents):
+    return Mock(
+        choices=[Mock(message=Mock(content=content)) for content in contents],
+        usage=None,
+    )
+
+
+@pytest.fixture
+def mock_groq_client():
+    with patch("det.llm.llm_groq.Groq") as MockGroq:
+        mock_groq_instance = Mock()
+        MockGroq.return_value = mock_groq_instance
+        client = GroqClient(model="llama3-8b-8192")
+        return mock_groq_instance, client
+
+
+def test_generate_responses_uses_multi_sampling(mock_groq_client):
+    """Several responses come back from one request using the `n` parameter."""
+    mock_groq_instance, groq_client = mock_groq_client
+    mock_groq_instance.chat.completions.create.return_value = completion("a", "b")
+
+    responses = groq_client.generate_responses("prompt", n=2, max_tokens=10)
+
+    assert responses == ["a", "b"]
+    assert mock_groq_instance.chat.completions.create.call_args.kwargs["n"] == 2
+
+
+def test_quoted_n_in_the_message_turns_multi_sampling_off(mock_groq_client):
+    """Groq names the rejected parameter only in the message."""
+    mock_groq_instance, groq_client = mock_groq_client
+    request = httpx.Request("POST", "https://api.groq.com/openai/v1/chat/completions")
+    mock_groq_instance.chat.completions.create.side_effect = [
+        groq.BadRequestError(
+            "'n' : number must be at most 1",
+            response=httpx.Response(400, request=request),
+            body=None,
+        ),
+        completion("a"),
+        completion("b"),
+    ]
+
+    responses = groq_client.generate_responses("prompt", n=2)
+
+    assert responses == ["a", "b"]
+    assert groq_client.supports_multi_sampling is False
+
+
+def test_agenerate_response_uses_the_async_client(mock_groq_client):
+    _, groq_client = mock_groq_client
+    with patch("det.llm.llm_groq.AsyncGroq") as MockAsyncGroq:
+        create = MockAsyncGroq.return_value.chat.completions.create = AsyncMock(
+            return_value=completion("response")
+        )
+
+        response = asyncio.run(
+            groq_client.agenerate_response("prompt", temperature=0, max_tokens=10)
+        )
+
+    assert response == "response"
+    create.assert_awaited_once_with(
+        model="llama3-8b-8192",
+        messages=[{"role": "user", "content": "prompt"}],
+        temperature=0,
+        max_tokens=10,
+    )
+
+
+def test_agenerate_response_returns_none_on_error(mock_groq_client):
+    _, groq_client = mock_groq_client
+    with patch("det.llm.llm_groq.AsyncGroq") as MockAsyncGroq:
+        MockAsyncGroq.return_value.chat.completions.create = AsyncMock(
+            side_effect=ValueError("boom")
+        )
+
+        assert asyncio.run(groq_client.agenerate_response("prompt")) is None
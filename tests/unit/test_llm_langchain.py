@@ -1,3 +1,6 @@
+import threading
+import time
+
 import pytest
 from unittest.mock import patch
 from det.utils.prompt_manager import PromptManager
@@ -157,3 +160,166 @@ def test_configure_chain_missing_user_prompt(resources_dir):
                 client.configure_chain(
                     prompt_group="RiskDefinition", input_variables={}
                 )
+
+
+def test_generate_responses_returns_one_entry_per_iteration(resources_dir):
+    """Test that parallel generation returns one response per iteration."""
+    prompts_file_path = resources_dir / "prompts.json"
+    mock_llm_handler = create_mock_llm_handler()
+    with patch("det.llm.llm_langchain.LLMHandler", return_value=mock_llm_handler):
+        client = LangChainClient(prompts_file_path=prompts_file_path)
+        client.configure_chain(
+            prompt_group="RiskDefinition",
+            input_variables={"risk_statement": "Sample risk statement"},
+        )
+
+        client.chain = MagicMock()
+        client.chain.invoke.side_effect = ["first", "second", "third"]
+
+        completed = []
+        responses = client.generate_responses(
+            3, max_concurrency=1, on_complete=completed.append
+        )
+
+        assert responses == [("first", 1), ("second", 1), ("third", 1)]
+        assert completed == [0, 1, 2]
+        client.chain.invoke.assert_called_with(
+            {"risk_statement": "Sample risk statement"}
+        )
+
+
+def test_generate_responses_retries_failed_iterations(resources_dir):
+    """Test that failed iterations are retried and exhausted ones become errors."""
+    prompts_file_path = resources_dir / "prompts.json"
+    mock_llm_handler = create_mock_llm_handler()
+    with patch("det.llm.llm_langchain.LLMHandler", return_value=mock_llm_handler):
+        client = LangChainClient(prompts_file_path=prompts_file_path, max_retries=2)
+        client.configure_chain(
+            prompt_group="RiskDefinition",
+            input_variables={"risk_statement": "Sample risk statement"},
+        )
+
+        client.chain = MagicMock()
+        client.chain.invoke.side_effect = [
+            "first",
+            OutputParserException("Parsing error"),
+            OutputParserException("Parsing error"),
+            "third",
+        ]
+
+        with patch("det.llm.llm_langchain.sleep"):
+            responses = client.generate_responses(3, max_concurrency=1)
+
+        results = [result for result, _ in responses]
+        assert results[0] == "first"
+        assert isinstance(results[1], ResponseGenerationError)
+        assert "Failed after 2 attempts: Parsing error" in str(results[1])
+        assert results[2] == "third"
+        # Attempt counts are returned in iteration order, not completion order
+        assert [attempts for _, attempts in responses] == [1, 2, 1]
+
+
+def test_generate_response_retries_transport_errors_with_backoff(resources_dir):
+    """Test that transport errors are retried with a jittered exponential backoff."""
+    prompts_file_path = resources_dir / "prompts.json"
+    mock_llm_handler = create_mock_llm_handler()
+    with patch("det.llm.llm_langchain.LLMHandler", return_value=mock_llm_handler):
+        client = LangChainClient(
+            prompts_file_path=prompts_file_path, backoff_base=0.5, backoff_max=10
+        )
+        client.configure_chain(
+            prompt_group="RiskDefinition",
+            input_variables={"risk_statement": "Sample risk statement"},
+        )
+
+        client.chain = MagicMock()
+        client.chain.invoke.side_effect = [
+            ConnectionError("reset"),
+            ConnectionError("reset"),
+            "Sample response",
+        ]
+
+        with patch("det.llm.llm_langchain.sleep") as mock_sleep:
+            response, attempts = client.generate_response_with_attempts()
+
+        assert response == "Sample response"
+        assert attempts == 3
+        delays = [call.args[0] for call in mock_sleep.call_args_list]
+        assert 0 <= delays[0] <= 0.5
+        assert 0 <= delays[1] <= 1.0
+
+
+def test_generate_response_does_not_retry_other_errors(resources_dir):
+    """Test that errors which cannot succeed on retry are raised immediately."""
+    prompts_file_path = resources_dir / "prompts.json"
+    mock_llm_handler = create_mock_llm_handler()
+    with patch("det.llm.llm_langchain.LLMHandler", return_value=mock_llm_handler):
+        client = LangChainClient(prompts_file_path=prompts_file_path)
+        client.configure_chain(
+            prompt_group="RiskDefinition",
+            input_variables={"risk_statement": "Sample risk statement"},
+        )
+
+        client.chain = MagicMock()
+        client.chain.invoke.side_effect = KeyError("risk_statement")
+
+        with pytest.raises(KeyError):
+            client.generate_response()
+        assert client.chain.invoke.call_count == 1
+
+
+def test_generate_response_attempt_timeout(resources_dir):
+    """Test that a hung attempt is abandoned after the attempt timeout."""
+    prompts_file_path = resources_dir / "prompts.json"
+    mock_llm_handler = create_mock_llm_handler()
+    with patch("det.llm.llm_langchain.LLMHandler", return_value=mock_llm_handler):
+        client = LangChainClient(
+            prompts_file_path=prompts_file_path,
+            max_retries=2,
+            backoff_base=0.01,
+            attempt_timeout=0.05,
+        )
+        client.configure_chain(
+            prompt_group="RiskDefinition",
+            input_variables={"risk_statement": "Sample risk statement"},
+        )
+
+        client.chain = MagicMock()
+        client.chain.invoke.side_effect = lambda _: time.sleep(1)
+
+        started = time.monotonic()
+        with pytest.raises(ResponseGenerationError, match="Failed after 2 attempts"):
+            client.generate_response()
+        assert time.monotonic() - started < 0.5
+
+
+def test_hung_attempts_do_not_hold_up_concurrent_iterations(resources_dir):
+    """Test that each attempt starts at once, however many iterations are in flight."""
+    prompts_file_path = resources_dir / "prompts.json"
+    mock_llm_handler = create_mock_llm_handler()
+    with patch("det.llm.llm_langchain.LLMHandler", return_value=mock_llm_handler):
+        client = LangChainClient(
+            prompts_file_path=prompts_file_path,
+            max_retries=1,
+            attempt_timeout=0.2,
+        )
+        client.configure_chain(
+            prompt_group="RiskDefinition",
+            input_variables={"risk_statement": "Sample risk statement"},
+        )
+
+        client.chain = MagicMock()
+        client.chain.invoke.side_effect = lambda _: time.sleep(1)
+
+        started = time.monotonic()
+        results = client.generate_responses(64, max_concurrency=64)
+
+        # Queued behind a shared pool, later iterations would time out without starting
+        assert time.monotonic() - started < 0.8
+        assert client.chain.invoke.call_count == 64
+        assert all(isinstance(result, ResponseGenerationError) for result, _ in results)
+        assert all(
+            thread.daemon
+            for thread in threading.enumerate()
+            if thread.name == "langchain-attempt"
+        )
@@ -0,0 +1,45 @@
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from det.llm.llm_ollama import OllamaClient
+
+
+@pytest.fixture
+def mock_async_client():
+    with patch("det.llm.llm_ollama.Client"), patch(
+        "det.llm.llm_ollama.AsyncClient"
+    ) as MockAsyncClient:
+        yield MockAsyncClient
+
+
+def test_agenerate_response_uses_the_async_client(mock_async_client):
+    chat = mock_async_client.return_value.chat = AsyncMock(
+        return_value={"message": {"content": "response"}}
+    )
+    client = OllamaClient(model="llama3", host="http://ollama:11434")
+
+    response = asyncio.run(client.agenerate_response("prompt"))
+
+    assert response == "response"
+    mock_async_client.assert_called_once_with(host="http://ollama:11434")
+    chat.assert_awaited_once_with(
+        model="llama3",
+        messages=[{"role": "user", "content": "prompt"}],
+        stream=False,
+        options={"temperature": 0},
+    )
+
+
+def test_agenerate_response_returns_none_on_error(mock_async_client):
+    mock_async_client.return_value.chat = AsyncMock(
+        side_effect=ConnectionError("refused")
+    )
+
+    assert asyncio.run(OllamaClient().agenerate_response("prompt")) is None
+
+
+def test_agenerate_response_rejects_non_string_prompts(mock_async_client):
+    with pytest.raises(ValueError):
+        asyncio.run(OllamaClient().agenerate_response(42))
@@ -0,0 +1,133 @@
+import asyncio
+from unittest.mock import AsyncMock, Mock, patch
+
+import httpx
+import openai
+import pytest
+
+from det.llm.llm_openai import OpenAIClient
+from det.llm.rate_limit import estimate_tokens
+
+
+def bad_request(message, param=None):
+    request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+    return openai.BadRequestError(
+        message,
+        response=httpx.Response(400, request=request),
+        body={"message": message, "param": param},
+    )
+
+
+def completion(*contents):
+    return Mock(
+        choices=[Mock(message=Mock(content=content)) for content in contents],
+        usage=None,
+    )
+
+
+@pytest.fixture
+def mock_openai_client():
+    with patch("det.llm.llm_openai.OpenAI") as MockOpenAI:
+        mock_openai_instance = Mock()
+        MockOpenAI.return_value = mock_openai_instance
+        client = OpenAIClient(model="gpt-3.5-turbo")
+        return mock_openai_instance, client
+
+
+def test_generate_responses_uses_multi_sampling(mock_openai_client):
+    """Several responses come back from one request using the `n` parameter."""
+    mock_openai_instance, openai_client = mock_openai_client
+    mock_openai_instance.chat.completions.create.return_value = completion(
+        "response 0", "response 1", "response 2"
+    )
+
+    responses = openai_client.generate_responses("prompt", n=3, max_tokens=10)
+
+    assert responses == ["response 0", "response 1", "response 2"]
+    mock_openai_instance.chat.completions.create.assert_called_once()
+    assert mock_openai_instance.chat.completions.create.call_args.kwargs["n"] == 3
+
+
+def test_generate_responses_falls_back_without_multi_sampling(mock_openai_client):
+    """Models without `n` support get one request per response."""
+    mock_openai_instance, openai_client = mock_openai_client
+    openai_client.supports_multi_sampling = False
+    mock_openai_instance.chat.completions.create.return_value = completion("response")
+
+    responses = openai_client.generate_responses("prompt", n=3)
+
+    assert responses == ["response"] * 3
+    assert mock_openai_instance.chat.completions.create.call_count == 3
+    assert "n" not in mock_openai_instance.chat.completions.create.call_args.kwargs
+
+
+def test_rejecting_n_turns_multi_sampling_off(mock_openai_client):
+    """A 400 naming the `n` parameter falls back to separate requests from then on."""
+    mock_openai_instance, openai_client = mock_openai_client
+    mock_openai_instance.chat.completions.create.side_effect = [
+        bad_request("Unsupported value: 'n' must be 1", param="n"),
+        completion("a"),
+        completion("b"),
+    ]
+
+    responses = openai_client.generate_responses("prompt", n=2)
+
+    assert responses == ["a", "b"]
+    assert openai_client.supports_multi_sampling is False
+
+
+def test_other_bad_requests_keep_multi_sampling(mock_openai_client, caplog):
+    """A 400 that merely contains the letter n is an ordinary failure."""
+    mock_openai_instance, openai_client = mock_openai_client
+    mock_openai_instance.chat.completions.create.side_effect = bad_request(
+        "Invalid value for temperature: must be in [0, 2]; got n = 3",
+        param="temperature",
+    )
+
+    responses = asyncio.run(openai_client.agenerate_responses("prompt", n=2))
+
+    assert responses == [None, None]
+    assert openai_client.supports_multi_sampling is True
+    assert "An error occurred" in caplog.text
+
+
+def test_agenerate_response_uses_the_async_client(mock_openai_client):
+    _, openai_client = mock_openai_client
+    with patch("det.llm.llm_openai.AsyncOpenAI") as MockAsyncOpenAI:
+        create = MockAsyncOpenAI.return_value.chat.completions.create = AsyncMock(
+            return_value=completion("response")
+        )
+
+        response = asyncio.run(
+            openai_client.agenerate_response("prompt", temperature=0, max_tokens=10)
+        )
+
+    assert response == "response"
+    create.assert_awaited_once_with(
+        model="gpt-3.5-turbo",
+        messages=[{"role": "user", "content": "prompt"}],
+        temperature=0,
+        max_tokens=10,
+    )
+
+
+def test_agenerate_response_returns_none_on_error(mock_openai_client):
+    _, openai_client = mock_openai_client
+    with patch("det.llm.llm_openai.AsyncOpenAI") as MockAsyncOpenAI:
+        MockAsyncOpenAI.return_value.chat.completions.create = AsyncMock(
+            side_effect=ValueError("boom")
+        )
+
+        assert asyncio.run(openai_client.agenerate_response("prompt")) is None
+
+
+def test_multi_sampling_budgets_tokens_like_single_requests(mock_openai_client):
+    mock_openai_instance, openai_client = mock_openai_client
+    mock_openai_instance.chat.completions.create.return_value = completion("a", "b")
+    openai_client.rate_limiter = Mock(call=Mock(side_effect=lambda fn, **kwargs: fn()))
+
+    openai_client.generate_responses("x" * 40, n=2)
+
+    assert openai_client.rate_limiter.call.call_args.kwargs["estimated_tokens"] == (
+        estimate_tokens("x" * 40, n=2)
+    )
@@ -0,0 +1,133 @@
+from unittest.mock import Mock
+
+import pytest
+from typer.testing import CliRunner
+
+from det.cassette import Cassette
+from det.main import app, cache_kwargs, get_embedding_generator
+
+runner = CliRunner(env={"COLUMNS": "240"})
+
+
+@pytest.mark.parametrize("provider", ["Ollama", "SentenceTransformer"])
+def test_embeddings_dimensions_are_only_for_openai(provider, mocker):
+    get_llm_client = mocker.patch("det.main.get_llm_client")
+
+    result = runner.invoke(
+        app,
+        [
+            "check-responses",
+            "--llm-provider",
+            "OpenAI",
+            "--llm-model",
+            "gpt-4o-mini",
+            "--embeddings-provider",
+            provider,
+            "--embeddings-model",
+            "nomic-embed-text",
+            "--embeddings-dimensions",
+            "256",
+        ],
+    )
+
+    assert result.exit_code == 2
+    assert "only supported by the OpenAI embeddings provider" in result.output
+    get_llm_client.assert_not_called()
+
+
+def test_embeddings_base_url_is_rejected_for_local_embeddings(mocker):
+    get_llm_client = mocker.patch("det.main.get_llm_client")
+
+    result = runner.invoke(
+        app,
+        [
+            "check-responses",
+            "--llm-provider",
+            "OpenAI",
+            "--llm-model",
+            "gpt-4o-mini",
+            "--embeddings-provider",
+            "SentenceTransformer",
+            "--embeddings-model",
+            "all-MiniLM-L6-v2",
+            "--embeddings-base-url",
+            "http://localhost:8000/v1",
+        ],
+    )
+
+    assert result.exit_code == 2
+    assert (
+        "--embeddings-base-url is only supported by the OpenAI and Ollama"
+        in result.output
+    )
+    get_llm_client.assert_not_called()
+
+
+def test_cache_kwargs_group_the_cache_options():
+    assert cache_kwargs(None, None, None, "lru") == {}
+    assert cache_kwargs("cache.sqlite", 100, None, "lfu", "int8") == {
+        "cache_file_path": "cache.sqlite",
+        "cache_options": {"max_entries": 100, "eviction": "lfu", "dtype": "int8"},
+    }
+
+
+def test_embeddings_served_from_a_warm_cache_are_recorded(tmp_path, monkeypatch):
+    cache_file_path = str(tmp_path / "cache")
+    cassette_path = str(tmp_path / "run.cassette")
+    generator = Mock(model="fake", dimensions=None)
+    generator.generate_embeddings.return_value = [[0.5, 0.25]]
+    get_embedding_generator(
+        "OpenAI", "fake", embedding_generator=generator, cache_file_path=cache_file_path
+    ).generate_embeddings(["hello"])
+
+    get_embedding_generator(
+        "OpenAI",
+        "fake",
+        Cassette(cassette_path, mode="record"),
+        embedding_generator=generator,
+        cache_file_path=cache_file_path,
+    ).generate_embeddings(["hello"])
+    clean = tmp_path / "clean"
+    clean.mkdir()
+    monkeypatch.chdir(clean)
+    replayer = get_embedding_generator(
+        "OpenAI", "fake", Cassette(cassette_path, mode="replay")
+    )
+
+    generator.generate_embeddings.assert_called_once()
+    assert replayer.generate_embeddings(["hello"]) == [[0.5, 0.25]]
+    # Replay leaves no embeddings cache behind
+    assert list(clean.iterdir()) == []
+
+
+@pytest.mark.parametrize(
+    "options, shown",
+    [([], False), (["--pairwise-summary"], True), (["--baseline", "medoid"], True)],
+)
+def test_pairwise_summary_is_opt_in(options, shown, mocker):
+    client = mocker.patch("det.main.get_llm_client").return_value
+    client.generate_responses.side_effect = lambda n, **kwargs: ["a", "b"][:n]
+    embeddings = mocker.patch("det.main.get_embedding_generator").return_value
+    embeddings.generate_embeddings.side_effect = lambda texts: [[1.0, 0.0]] * len(texts)
+    presenter = mocker.patch("det.main.ResponsePresenter").return_value
+
+    result = runner.invoke(
+        app,
+        [
+            "check-responses",
+            "--llm-provider",
+            "OpenAI",
+            "--llm-model",
+            "gpt-4o-mini",
+            "--embeddings-provider",
+            "OpenAI",
+            "--embeddings-model",
+            "text-embedding-3-small",
+            "--iterations",
+            "2",
+            *options,
+        ],
+    )
+
+    assert result.exit_code == 0, result.output
+    assert presenter.display_pairwise_summary.called == shown
@@ -0,0 +1,114 @@
+from unittest.mock import Mock
+
+import numpy as np
+import pytest
+
+from det.det_response.analysis import ResponseAnalysis
+from det.det_response.near_duplicates import (
+    MinHasher,
+    group_near_duplicates,
+    lsh_bands,
+    normalise_text,
+)
+from det.det_response.semantic_distance import SemanticDistanceCalculator
+
+ANSWER = "As an AI language model, I will respond consistently to the same prompt."
+PARAPHRASE = (
+    "As an AI language model I will respond consistently to an identical prompt"
+)
+OTHER = "No. Responses can vary from one run to the next, even at temperature zero."
+
+
+def test_normalise_text_ignores_case_punctuation_and_whitespace():
+    assert normalise_text("  Yes,  I WILL!\n") == "yes i will"
+
+
+def test_signature_similarity_estimates_jaccard():
+    hasher = MinHasher(num_perm=256)
+    a, b = hasher.shingles(ANSWER), hasher.shingles(PARAPHRASE)
+    jaccard = len(a & b) / len(a | b)
+
+    estimate = (hasher.signature(ANSWER) == hasher.signature(PARAPHRASE)).mean()
+
+    assert estimate == pytest.approx(jaccard, abs=0.1)
+    assert (hasher.signature(ANSWER) == hasher.signature(ANSWER.upper())).all()
+
+
+def test_signatures_are_deterministic():
+    assert (MinHasher().signature(ANSWER) == MinHasher().signature(ANSWER)).all()
+
+
+def test_lsh_bands_err_below_the_threshold():
+    bands, rows = lsh_bands(128, 0.8)
+
+    assert bands * rows == 128
+    assert (1 / bands) ** (1 / rows) <= 0.8
+
+
+def test_group_near_duplicates_around_the_most_common_text():
+    texts = [ANSWER + " ", OTHER, ANSWER, ANSWER.lower()]
+    signatures = MinHasher().signatures(texts)
+
+    representatives, similarities = group_near_duplicates(
+        signatures, weights=[1, 1, 5, 1], threshold=0.9
+    )
+
+    assert representatives.tolist() == [2, 1, 2, 2]
+    assert similarities.tolist() == [1.0, 1.0, 1.0, 1.0]
+
+
+def test_group_near_duplicates_rejects_a_bad_threshold():
+    with pytest.raises(ValueError):
+        group_near_duplicates(MinHasher().signatures([ANSWER]), threshold=0)
+
+
+def make_calculator():
+    generator = Mock()
+    generator.generate_embeddings.side_effect = lambda texts: [
+        [1.0, 0.0] if text.startswith("As") else [0.0, 1.0] for text in texts
+    ]
+    return SemanticDistanceCalculator(generator)
+
+
+def test_only_representatives_are_embedded():
+    responses = [ANSWER, PARAPHRASE, ANSWER, OTHER, ANSWER + "!"]
+    calculator = make_calculator()
+    analysis = ResponseAnalysis(responses, calculator, near_duplicate_threshold=0.5)
+
+    statistics = analysis.pairwise_statistics()
+
+    generator = calculator.embedding_generator
+    assert generator.generate_embeddings.call_args.args[0] == [ANSWER, OTHER]
+    assert statistics["medoid"] == ANSWER
+
+    groups = analysis.near_duplicate_groups()
+    assert [group["size"] for group in groups] == [4, 1]
+    assert groups[0]["representative"] == ANSWER
+    assert groups[0]["responses"] == [ANSWER, PARAPHRASE, ANSWER + "!"]
+    assert 0.5 <= groups[0]["lexical_similarity"] < 1.0
+    assert np.allclose(
+        analysis.calculate_semantic_similarities(), [1.0, 1.0, 1.0, 0.0, 1.0]
+    )
+
+
+def test_near_duplicates_update_as_responses_arrive():
+    analysis = ResponseAnalysis(
+        [OTHER], make_calculator(), near_duplicate_threshold=0.5
+    )
+    assert len(analysis.near_duplicate_groups()) == 1
+
+    analysis.add_responses([ANSWER, PARAPHRASE])
+
+    assert [group["responses"] for group in analysis.near_duplicate_groups()] == [
+        [ANSWER, PARAPHRASE],
+        [OTHER],
+    ]
+
+
+def test_near_duplicate_grouping_is_off_by_default():
+    analysis = ResponseAnalysis([ANSWER, PARAPHRASE], make_calculator())
+
+    assert analysis.near_duplicate_groups() == []
+
+    with pytest.raises(ValueError):
+        ResponseAnalysis([ANSWER], make_calculator(), near_duplicate_threshold=1.5)
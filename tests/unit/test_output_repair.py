@@ -0,0 +1,94 @@
+import json
+
+import pytest
+from langchain.output_parsers import PydanticOutputParser
+from langchain_core.exceptions import OutputParserException
+from langchain_core.messages import AIMessage
+
+from det.llm.output_repair import OutputRepairer, coerce_literals, repair_json
+from resources.risk_definition import RiskDefinition
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ('```json\n{"a": 1}\n```', {"a": 1}),
+        ('Here you go: {"a": 1} Hope this helps!', {"a": 1}),
+        ('{"a": [1, 2,], "b": 2,}', {"a": [1, 2], "b": 2}),
+        ('{"a": {"b": [1, 2', {"a": {"b": [1, 2]}}),
+        ('{"a": "line one\nline two"}', {"a": "line one\nline two"}),
+        ('{"a": True, "b": None}', {"a": True, "b": None}),
+        ("{“a”: 1}", {"a": 1}),
+        # String contents are left alone
+        ('{"a": "x, }", "b": [1,],}', {"a": "x, }", "b": [1]}),
+        ('{"a": "He said “hi”", "b": 1,}', {"a": "He said “hi”", "b": 1}),
+        (
+            '{"a": "x, ]", "b": "line one\nline two',
+            {"a": "x, ]", "b": "line one\nline two"},
+        ),
+    ],
+)
+def test_repair_json(text, expected):
+    assert json.loads(repair_json(text)) == expected
+
+
+def test_repair_json_gives_up_on_prose():
+    assert repair_json("I cannot answer that.") is None
+
+
+def test_coerce_literals_matches_case_and_spacing():
+    obj = {"risk_likelihood": "very_high", "risk_impact": "moderate", "context": "x"}
+    coerced = coerce_literals(obj, RiskDefinition)
+    assert coerced["risk_likelihood"] == "Very High"
+    assert coerced["risk_impact"] == "Moderate"
+    assert coerced["context"] == "x"
+
+
+def _risk_definition(**overrides):
+    fields = {
+        "risk_statement": "statement",
+        "risk_description": "description",
+        "context": "context",
+        "risk_categorization": "categorization",
+        "security_controls": ["AC-2", "IA-2"],
+        "implementation_guidance": "guidance",
+        "assessment_approach": "approach",
+        "risk_likelihood": "High",
+        "risk_impact": "Moderate",
+        "authorization_recommendation": "Mitigate",
+        "continuous_monitoring_strategy": "strategy",
+    }
+    fields.update(overrides)
+    return fields
+
+
+def test_output_repairer_saves_llm_calls():
+    parser = PydanticOutputParser(pydantic_object=RiskDefinition)
+    repairer = OutputRepairer(parser, RiskDefinition)
+    malformed = json.dumps(_risk_definition(risk_likelihood="high"))[:-1] + ",\n"
+
+    result = repairer.parse(AIMessage(content=f"```json\n{malformed}\n```"))
+
+    assert result.risk_likelihood == "High"
+    assert repairer.repairs_attempted == 1
+    assert repairer.llm_calls_saved == 1
+
+
+def test_output_repairer_passes_valid_output_through():
+    parser = PydanticOutputParser(pydantic_object=RiskDefinition)
+    repairer = OutputRepairer(parser, RiskDefinition)
+
+    result = repairer.parse(json.dumps(_risk_definition()))
+
+    assert result.risk_impact == "Moderate"
+    assert repairer.repairs_attempted == 0
+
+
+def test_output_repairer_raises_original_error_when_unrepairable():
+    parser = PydanticOutputParser(pydantic_object=RiskDefinition)
+    repairer = OutputRepairer(parser, RiskDefinition)
+
+    with pytest.raises(OutputParserException):
+        repairer.parse(json.dumps(_risk_definition(risk_likelihood="Catastrophic")))
+    assert repairer.repairs_attempted == 1
+    assert repairer.repairs_succeeded == 0
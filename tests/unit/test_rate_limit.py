@@ -0,0 +1,203 @@
+import asyncio
+from unittest.mock import Mock
+
+import httpx
+import openai
+import pytest
+
+from det.llm.rate_limit import (
+    RateLimiter,
+    backoff_delay,
+    estimate_tokens,
+    get_rate_limiter,
+    is_transient_error,
+    retry_after_seconds,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeRateLimitError(Exception):
+    status_code = 429
+
+    def __init__(self, headers=None):
+        super().__init__("Too Many Requests")
+        self.response = Mock(headers=headers or {})
+
+
+def test_request_bucket_waits_when_empty():
+    clock = FakeClock()
+    limiter = RateLimiter(requests_per_minute=2, clock=clock)
+
+    assert limiter._reserve(0) == 0
+    assert limiter._reserve(0) == 0
+    # The bucket is empty; one request refills every 30 seconds
+    assert limiter._reserve(0) == pytest.approx(30.0)
+
+    clock.now = 30.0
+    assert limiter._reserve(0) == 0
+
+
+def test_token_bucket_is_reconciled_with_usage():
+    clock = FakeClock()
+    limiter = RateLimiter(tokens_per_minute=1000, clock=clock)
+
+    assert limiter._reserve(800) == 0
+    assert limiter._reserve(800) > 0
+    # The first request used far fewer tokens than estimated
+    limiter.release(reserved_tokens=800, used_tokens=100)
+    assert limiter._reserve(800) == 0
+
+
+def test_token_refunds_do_not_exceed_the_bucket():
+    clock = FakeClock()
+    limiter = RateLimiter(tokens_per_minute=1000, clock=clock)
+
+    assert limiter._reserve(800) == 0
+    # The bucket refills while the request is in flight
+    clock.now = 60.0
+    assert limiter._reserve(100) == 0
+    limiter.release(reserved_tokens=800, used_tokens=0)
+
+    assert limiter._token_bucket == 1000
+
+
+def test_aimd_concurrency_limit():
+    limiter = RateLimiter(max_concurrency=8, min_concurrency=1)
+    assert limiter.concurrency_limit == 8
+
+    limiter.on_rate_limited(0)
+    assert limiter.concurrency_limit == 4
+    limiter.on_rate_limited(0)
+    assert limiter.concurrency_limit == 2
+
+    for _ in range(10):
+        limiter.on_success()
+    assert limiter.concurrency_limit > 2
+    assert limiter.rate_limited_count == 2
+
+
+def test_retry_after_headers():
+    assert retry_after_seconds(FakeRateLimitError({"retry-after": "2"})) == 2.0
+    assert retry_after_seconds(FakeRateLimitError({"retry-after-ms": "250"})) == 0.25
+    assert retry_after_seconds(FakeRateLimitError()) is None
+
+
+def test_backoff_delay_is_bounded():
+    assert backoff_delay(3, base=1.0, maximum=5.0, jitter=False) == 5.0
+    assert 0 <= backoff_delay(2, base=1.0, maximum=60.0) <= 4.0
+
+
+def test_call_retries_rate_limited_requests():
+    limiter = RateLimiter()
+    expected = Mock(usage=None)
+    fn = Mock(side_effect=[FakeRateLimitError({"retry-after-ms": "10"}), expected])
+
+    assert limiter.call(fn) is expected
+    assert fn.call_count == 2
+    assert limiter.rate_limited_count == 1
+    assert limiter.current_rate > 0
+
+
+def test_call_gives_up_after_max_retries():
+    limiter = RateLimiter(max_retries=1)
+    fn = Mock(side_effect=FakeRateLimitError({"retry-after-ms": "1"}))
+
+    with pytest.raises(FakeRateLimitError):
+        limiter.call(fn)
+    assert fn.call_count == 2
+
+
+def test_call_does_not_retry_other_errors():
+    limiter = RateLimiter()
+    fn = Mock(side_effect=ValueError("boom"))
+
+    with pytest.raises(ValueError):
+        limiter.call(fn)
+    assert fn.call_count == 1
+
+
+def test_acall_retries_rate_limited_requests():
+    limiter = RateLimiter()
+    calls = 0
+
+    async def send():
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            raise FakeRateLimitError({"retry-after-ms": "10"})
+        return "response"
+
+    assert asyncio.run(limiter.acall(send)) == "response"
+    assert calls == 2
+
+
+def test_get_rate_limiter_is_shared_per_provider():
+    limiter = get_rate_limiter("TestProvider", requests_per_minute=10)
+    assert get_rate_limiter("testprovider") is limiter
+    assert limiter.requests_per_minute == 10
+
+
+class FakeServerError(Exception):
+    status_code = 503
+
+    def __init__(self):
+        super().__init__("Service Unavailable")
+        self.response = Mock(headers={"retry-after-ms": "10"})
+
+
+def test_call_retries_transient_errors():
+    limiter = RateLimiter(backoff_base=0.01)
+    expected = Mock(usage=None)
+    fn = Mock(side_effect=[FakeServerError(), ConnectionResetError(), expected])
+
+    assert limiter.call(fn) is expected
+    assert fn.call_count == 3
+    # Only a 429 slows everyone down
+    assert limiter.rate_limited_count == 0
+    assert limiter.concurrency_limit == limiter.max_concurrency
+
+
+def test_acall_retries_transient_errors():
+    limiter = RateLimiter()
+    calls = 0
+
+    async def send():
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            raise FakeServerError()
+        return "response"
+
+    assert asyncio.run(limiter.acall(send)) == "response"
+    assert calls == 2
+
+
+def test_sdk_errors_are_classified():
+    request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+
+    def status_error(status_code):
+        response = httpx.Response(status_code, request=request)
+        return openai.APIStatusError("error", response=response, body=None)
+
+    assert is_transient_error(openai.APIConnectionError(request=request))
+    assert is_transient_error(openai.APITimeoutError(request=request))
+    assert is_transient_error(status_error(503))
+    assert is_transient_error(status_error(408))
+    assert not is_transient_error(status_error(400))
+    assert not is_transient_error(status_error(429))
+    assert not is_transient_error(ValueError("boom"))
+
+
+def test_estimate_tokens_counts_the_prompt_once_per_request():
+    assert estimate_tokens("x" * 40, 100) == 110
+    assert estimate_tokens("x" * 40) == 266
+    # n completions of one prompt
+    assert estimate_tokens("x" * 40, 100, n=3) == 310
+    assert estimate_tokens("x" * 40, n=3) == 778
@@ -0,0 +1,88 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from det.llm.base import LLMGeneratorInterface
+from det.runner import arun_iterations, run_iterations
+
+
+def test_run_iterations_serial_preserves_order():
+    """Serial runs return one result per iteration in iteration order."""
+    results = run_iterations(lambda i: i * 2, iterations=5)
+    assert results == [0, 2, 4, 6, 8]
+
+
+def test_run_iterations_concurrent_preserves_order():
+    """Concurrent runs return results in iteration order, not completion order."""
+
+    def task(iteration):
+        # Later iterations finish first
+        time.sleep(0.01 * (5 - iteration))
+        return iteration
+
+    results = run_iterations(task, iterations=5, concurrency=5)
+    assert results == [0, 1, 2, 3, 4]
+
+
+def test_run_iterations_bounds_concurrency():
+    """No more than `concurrency` iterations are in flight at once."""
+    lock = threading.Lock()
+    in_flight = 0
+    peak = 0
+
+    def task(_iteration):
+        nonlocal in_flight, peak
+        with lock:
+            in_flight += 1
+            peak = max(peak, in_flight)
+        time.sleep(0.01)
+        with lock:
+            in_flight -= 1
+
+    run_iterations(task, iterations=12, concurrency=3)
+    assert peak <= 3
+
+
+def test_run_iterations_reports_completion():
+    """The completion callback is called once per iteration."""
+    completed = []
+    run_iterations(
+        lambda i: i, iterations=4, concurrency=2, on_complete=completed.append
+    )
+    assert sorted(completed) == [0, 1, 2, 3]
+
+
+def test_run_iterations_rejects_invalid_concurrency():
+    with pytest.raises(ValueError, match="Concurrency must be at least 1"):
+        run_iterations(lambda i: i, iterations=1, concurrency=0)
+
+
+def test_arun_iterations_preserves_order_and_bounds_concurrency():
+    """Async runs return results in iteration order with bounded concurrency."""
+    in_flight = 0
+    peak = 0
+
+    async def task(iteration):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01 * (6 - iteration))
+        in_flight -= 1
+        return iteration
+
+    results = asyncio.run(arun_iterations(task, iterations=6, concurrency=2))
+    assert results == [0, 1, 2, 3, 4, 5]
+    assert peak == 2
+
+
+def test_agenerate_response_falls_back_to_executor():
+    """Clients without native async support run generate_response in an executor."""
+
+    class SyncOnlyClient(LLMGeneratorInterface):
+        def generate_response(self, prompt: str, **kwargs) -> str:
+            return f"{prompt}:{threading.current_thread() is threading.main_thread()}"
+
+    response = asyncio.run(SyncOnlyClient().agenerate_response("hello"))
+    assert response == "hello:False"
@@ -0,0 +1,78 @@
+from unittest.mock import Mock
+
+import numpy as np
+import pytest
+
+from det.det_response.semantic_distance import SemanticDistanceCalculator
+
+
+@pytest.fixture
+def calculator():
+    rng = np.random.default_rng(0)
+    vectors = {}
+    generator = Mock()
+    generator.generate_embeddings.side_effect = lambda texts: [
+        vectors.setdefault(text, rng.standard_normal(8)) for text in texts
+    ]
+    return SemanticDistanceCalculator(generator)
+
+
+def per_pair(calculator, texts_a, texts_b):
+    embeddings_a = calculator.embedding_generator.generate_embeddings(texts_a)
+    embeddings_b = calculator.embedding_generator.generate_embeddings(texts_b)
+    return np.array(
+        [
+            [calculator.calculate_cosine_similarity(a, b) for b in embeddings_b]
+            for a in embeddings_a
+        ]
+    )
+
+
+def test_kernels_match_the_per_pair_path(calculator):
+    texts = ["a", "b", "c", "d"]
+
+    np.testing.assert_allclose(
+        calculator.one_to_many("a", texts),
+        per_pair(calculator, ["a"], texts)[0],
+        atol=1e-6,
+    )
+    np.testing.assert_allclose(
+        calculator.many_to_many(["a", "b"], texts),
+        per_pair(calculator, ["a", "b"], texts),
+        atol=1e-6,
+    )
+    pairwise = calculator.pairwise(texts)
+    assert pairwise.dtype == np.float32
+    np.testing.assert_allclose(pairwise, per_pair(calculator, texts, texts), atol=1e-6)
+    np.testing.assert_allclose(np.diag(pairwise), 1.0, atol=1e-6)
+
+
+def test_semantic_similarity_keeps_its_interface(calculator):
+    similarities = calculator.semantic_similarity("a", ["a", "b"])
+
+    assert similarities[0] == pytest.approx(1.0)
+    assert len(similarities) == 2
+    assert calculator.semantic_similarity("a", []) == []
+
+
+def test_semantic_similarity_embeds_each_distinct_text_once(calculator):
+    generator = calculator.embedding_generator
+
+    similarities = calculator.semantic_similarity("a", ["b", "a", "b", "c"])
+
+    generator.generate_embeddings.assert_called_once_with(["a", "b", "c"])
+    assert similarities[1] == 1.0
+    assert similarities[0] == similarities[2]
+    assert len(similarities) == 4
+
+
+def test_identical_texts_skip_the_embedding_step(calculator):
+    assert calculator.semantic_similarity("a", ["a"] * 100) == [1.0] * 100
+    calculator.embedding_generator.generate_embeddings.assert_not_called()
+
+
+def test_zero_vectors_do_not_divide_by_zero():
+    matrix = SemanticDistanceCalculator.cosine_similarity_matrix(
+        [[0.0, 0.0], [1.0, 0.0]]
+    )
+    np.testing.assert_array_equal(matrix, [[0.0, 0.0], [0.0, 1.0]])
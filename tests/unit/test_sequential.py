@@ -0,0 +1,92 @@
+from unittest.mock import Mock
+
+import numpy as np
+import pytest
+
+from det.det_response.analysis import ResponseAnalysis
+from det.det_response.sequential import SequentialConsistencyMonitor
+
+
+def make_monitor(**kwargs):
+    calculator = Mock()
+    calculator.semantic_similarity.side_effect = lambda base, texts: [
+        1.0 if text == base else 0.5 for text in texts
+    ]
+    return SequentialConsistencyMonitor(ResponseAnalysis([], calculator), **kwargs)
+
+
+def test_add_responses_updates_counts_incrementally():
+    analysis = ResponseAnalysis(["a"], Mock())
+    analysis.add_responses(["a", "b"])
+
+    assert analysis.responses == ["a", "a", "b"]
+    assert analysis.response_counts == analysis.group_and_count_responses()
+    assert analysis.base_response == "a"
+
+
+def test_identical_responses_stop_early():
+    monitor = make_monitor(precision=0.05, min_iterations=10)
+
+    iterations = 0
+    while not monitor.should_stop and iterations < 200:
+        monitor.update(["same"] * 5)
+        iterations += 5
+
+    assert monitor.estimate == 1.0
+    assert iterations < 50
+    assert monitor.half_width <= 0.05
+
+
+def test_min_iterations_is_respected():
+    monitor = make_monitor(metric="similarity", min_iterations=10)
+    monitor.update(["same"] * 5)
+
+    # The similarity interval is already zero-width, but too few responses were seen
+    assert monitor.half_width == 0
+    assert not monitor.should_stop
+
+
+def test_varied_responses_do_not_stop():
+    monitor = make_monitor(precision=0.05, min_iterations=10)
+    monitor.update(["a", "b"] * 10)
+
+    assert monitor.estimate == pytest.approx(0.5)
+    low, high = monitor.interval
+    assert low < 0.5 < high
+    assert not monitor.should_stop
+
+
+def test_similarity_only_embeds_new_responses():
+    monitor = make_monitor(metric="similarity")
+    monitor.update(["a", "b"])
+    monitor.update(["b", None])
+
+    calculator = monitor.analysis.semantic_distance_calculator
+    assert [call.args for call in calculator.semantic_similarity.call_args_list] == [
+        ("a", ["b"]),
+        ("a", ["b"]),
+    ]
+    # The baseline is not scored against itself
+    assert monitor.similarities == [0.5, 0.5]
+    assert monitor.estimate == pytest.approx(0.5)
+
+
+def test_similarity_interval_uses_the_similarity_samples():
+    monitor = make_monitor(metric="similarity")
+    monitor.update(["a"])
+
+    assert monitor.estimate is None
+    assert monitor.interval == (0.0, 1.0)
+
+    monitor.update(["a", "b", "b"])
+
+    samples = [1.0, 0.5, 0.5]
+    half_width = monitor.z * np.std(samples, ddof=1) / np.sqrt(len(samples))
+    assert monitor.interval == pytest.approx(
+        (np.mean(samples) - half_width, np.mean(samples) + half_width)
+    )
+
+
+def test_unknown_metric_is_rejected():
+    with pytest.raises(ValueError):
+        make_monitor(metric="entropy")
@@ -0,0 +1,125 @@
+import asyncio
+import threading
+
+import pytest
+from typer.testing import CliRunner
+
+from det.embeddings.generator import OpenAIEmbeddingGenerator
+from det.llm.llm_openai import OpenAIClient
+from det.llm.rate_limit import RateLimiter
+from det.main import app
+from det.stub_server import create_stub_server
+
+
+@pytest.fixture
+def stub_server():
+    """Runs a stub server on a free port for the duration of a test."""
+    servers = []
+
+    def _start(**config):
+        server = create_stub_server(port=0, **config)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server
+
+    yield _start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def test_chat_completions_with_multi_sampling(stub_server):
+    server = stub_server(variants=1)
+    client = OpenAIClient(model="stub", api_key="stub", base_url=server.base_url)
+
+    responses = client.generate_responses("Hello", n=3, max_tokens=16)
+
+    assert responses == ["Stub response variant 0 to: Hello"] * 3
+    assert server.config.requests == 1
+
+
+def test_embeddings_are_deterministic_per_text(stub_server):
+    server = stub_server(embedding_dimensions=8)
+    generator = OpenAIEmbeddingGenerator(
+        model="stub", api_key="stub", base_url=server.base_url
+    )
+
+    first = generator.generate_embeddings(["a", "b", "a"])
+
+    assert len(first[0]) == 8
+    assert first[0] == first[2]
+    assert first[0] != first[1]
+
+
+def test_injected_rate_limits_are_retried(stub_server):
+    server = stub_server(rate_limit_probability=0.5, retry_after=0, seed=1)
+    client = OpenAIClient(
+        model="stub",
+        api_key="stub",
+        base_url=server.base_url,
+        rate_limiter=RateLimiter(max_retries=20),
+    )
+    # The SDK leaves the retries to the rate limiter
+    assert client.client.max_retries == 0
+
+    responses = [client.generate_response("Hello") for _ in range(5)]
+
+    assert all(response is not None for response in responses)
+    assert server.config.rate_limited > 0
+    assert client.rate_limiter.rate_limited_count == server.config.rate_limited
+
+
+def test_async_calls_work_across_event_loops(stub_server):
+    server = stub_server()
+    client = OpenAIClient(
+        model="stub",
+        api_key="stub",
+        base_url=server.base_url,
+        rate_limiter=RateLimiter(),
+    )
+
+    # Each asyncio.run closes its loop, and with it the connections opened in it
+    responses = [
+        asyncio.run(client.agenerate_response("Hello", max_tokens=16)) for _ in range(2)
+    ]
+
+    assert responses == ["Stub response variant 0 to: Hello"] * 2
+
+
+def test_adaptive_concurrent_rounds_lose_no_iterations(stub_server, tmp_path):
+    server = stub_server(variants=1, embedding_dimensions=8)
+    runner = CliRunner(env={"COLUMNS": "240", "OPENAI_API_KEY": "stub"})
+
+    result = runner.invoke(
+        app,
+        [
+            "check-responses",
+            "--llm-provider",
+            "OpenAI",
+            "--llm-model",
+            "stub",
+            "--base-url",
+            server.base_url,
+            "--embeddings-provider",
+            "OpenAI",
+            "--embeddings-model",
+            "stub",
+            "--embeddings-base-url",
+            server.base_url,
+            "--embeddings-cache",
+            str(tmp_path / "cache"),
+            "--adaptive",
+            "--max-iterations",
+            "24",
+            "--min-iterations",
+            "4",
+            "--precision",
+            "0.0001",
+            "--concurrency",
+            "4",
+        ],
+    )
+
+    assert result.exit_code == 0, result.output
+    assert "Failed to get a response" not in result.output
+    assert server.config.requests > 4